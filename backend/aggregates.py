@@ -0,0 +1,237 @@
+"""Running per-user aggregates behind the brain_profile endpoints.
+
+Every submitted round updates its player's user_game_aggregates row for
+that game type in constant time, in the transaction that writes the round:
+round count, correctness, Welford mean and variance of the response time,
+the correctness of the first and latest ``AGGREGATE_WINDOW_ROUNDS`` rounds
+(for the early/late learning trend) and a few game-specific sums and
+ranges. The profile endpoints read that single row, so their cost no
+longer grows with how much a user has played.
+
+Rounds played before the table existed are folded in by a rebuild, which
+recomputes the rows from the games and their round logs. Run it once after
+deploying, while no games are being played (rounds submitted during the
+rebuild would be overwritten):
+
+  python aggregates.py rebuild [--user-id N]
+"""
+import argparse
+import logging
+import math
+from functools import partial
+
+from sqlalchemy.orm import Session
+
+from config import settings
+from crud import rounds as rounds_crud
+from database import dialect_insert
+from models.game import Game
+from models.user_game_aggregate import UserGameAggregate
+
+logger = logging.getLogger(__name__)
+
+GAME_TYPES = ("pattern", "stroop", "chunking", "dual_nback")
+
+
+def _round_values(game_type: str, entry: dict):
+    """(response time, correctness in 0..1, extra sums) of a round log entry."""
+    response_time = entry.get("response_time", 0)
+    if game_type == "dual_nback":
+        hits = int(entry["letter_match"] == entry["correct_letter"]) + int(
+            entry["position_match"] == entry["correct_pos"]
+        )
+        return response_time, hits / 2, {}
+
+    correct = float(bool(entry.get("correct")))
+    if game_type == "pattern":
+        return response_time, correct, {"grid_size": entry.get("grid_size", 3)}
+    if game_type == "stroop":
+        conflict = not entry.get("congruent", True)
+        return response_time, correct, {
+            "conflict": int(conflict),
+            "conflict_correct": int(conflict and correct),
+        }
+    return response_time, correct, {}
+
+
+def _game_spans(game_type: str, state: dict):
+    """Per-game settings whose [min, max] across games the profiles report."""
+    if game_type == "dual_nback":
+        return {"n": state.get("n", 2)}
+    if game_type == "chunking":
+        length = state.get("length", len(state.get("sequence", [])))
+        return {"sequence_length": length} if length else {}
+    return {}
+
+
+def _empty(user_id: int, game_type: str):
+    return UserGameAggregate(
+        user_id=user_id,
+        game_type=game_type,
+        games=0,
+        rounds=0,
+        correct=0.0,
+        rt_mean=0.0,
+        rt_m2=0.0,
+        early=[],
+        late=[],
+        extras={},
+    )
+
+
+def add_game(agg: UserGameAggregate, state: dict):
+    agg.games += 1
+    spans = _game_spans(agg.game_type, state)
+    if spans:
+        extras = dict(agg.extras)
+        for key, value in spans.items():
+            low, high = extras.get(key, (value, value))
+            extras[key] = [min(low, value), max(high, value)]
+        agg.extras = extras
+
+
+def add_round(agg: UserGameAggregate, entry: dict, window: int | None = None):
+    window = window or settings.AGGREGATE_WINDOW_ROUNDS
+    response_time, correct, sums = _round_values(agg.game_type, entry)
+
+    agg.rounds += 1
+    agg.correct += correct
+    delta = response_time - agg.rt_mean
+    agg.rt_mean += delta / agg.rounds
+    agg.rt_m2 += delta * (response_time - agg.rt_mean)
+
+    # Assign new lists/dicts so the JSON columns are flagged as changed
+    if len(agg.early) < window:
+        agg.early = agg.early + [correct]
+    agg.late = (agg.late + [correct])[-window:]
+    if sums:
+        extras = dict(agg.extras)
+        for key, value in sums.items():
+            extras[key] = extras.get(key, 0) + value
+        agg.extras = extras
+
+
+def _locked(db: Session, user_id: int, game_type: str):
+    # Create the row if missing; a concurrent first game's INSERT becomes a
+    # no-op instead of an IntegrityError, and both then lock the same row
+    db.execute(
+        dialect_insert(db, UserGameAggregate)
+        .values(user_id=user_id, game_type=game_type)
+        .on_conflict_do_nothing(index_elements=["user_id", "game_type"])
+    )
+    return (
+        db.query(UserGameAggregate)
+        .filter(
+            UserGameAggregate.user_id == user_id,
+            UserGameAggregate.game_type == game_type,
+        )
+        .with_for_update()
+        .one()
+    )
+
+
+def record_game(db: Session, user_id: int, game_type: str, state: dict):
+    """Count a newly started game; committed by the caller with the game."""
+    add_game(_locked(db, user_id, game_type), state)
+
+
+def _fold_round(user_id: int, game_type: str, entry: dict, db: Session):
+    add_round(_locked(db, user_id, game_type), entry)
+
+
+def record_round(game, entry: dict):
+    """Fold a submitted round log entry into its player's aggregate.
+
+    Queued on the game, so it commits (or fails) with the round it counts.
+    """
+    game.add(partial(_fold_round, game.user_id, game.game_type, entry))
+
+
+def get_aggregate(db: Session, user_id: int, game_type: str):
+    return db.get(UserGameAggregate, (user_id, game_type))
+
+
+def summary(agg: UserGameAggregate):
+    """Metrics shared by the profile endpoints (needs at least one round).
+
+    Early/late accuracy compare the first and last third of the rounds, as
+    the profiles always have; past 3 * AGGREGATE_WINDOW_ROUNDS rounds they
+    compare the first and latest window instead.
+    """
+    rounds = agg.rounds
+    split = min(rounds // 3, len(agg.early), len(agg.late))
+    variance = max(agg.rt_m2, 0.0) / (rounds - 1) if rounds > 1 else 0.0
+    return {
+        "rounds": rounds,
+        "accuracy_percent": round(agg.correct / rounds * 100, 2),
+        "avg_response_time": round(agg.rt_mean, 2),
+        "consistency": round(math.sqrt(variance), 2),
+        "early_accuracy": (
+            round(sum(agg.early[:split]) / split * 100, 2) if split else None
+        ),
+        "late_accuracy": (
+            round(sum(agg.late[-split:]) / split * 100, 2) if split else None
+        ),
+    }
+
+
+def rebuild(db: Session, user_id: int | None = None, batch_size: int = 500):
+    """Recompute aggregates from the games and their round logs.
+
+    Replaces the rows of every user (or just `user_id`); returns how many
+    were written.
+    """
+    query = db.query(Game.id, Game.user_id, Game.game_type, Game.state).filter(
+        Game.game_type.in_(GAME_TYPES), Game.user_id != None
+    )
+    if user_id is not None:
+        query = query.filter(Game.user_id == user_id)
+
+    aggregates, last_id = {}, 0
+    while True:
+        games = (
+            query.filter(Game.id > last_id).order_by(Game.id).limit(batch_size).all()
+        )
+        if not games:
+            break
+        logs = rounds_crud.get_round_logs(db, games)
+        for game in games:
+            key = (game.user_id, game.game_type)
+            agg = aggregates.get(key)
+            if agg is None:
+                agg = aggregates[key] = _empty(*key)
+            add_game(agg, game.state or {})
+            for entry in logs[game.id]:
+                add_round(agg, entry)
+        last_id = games[-1].id
+        logger.info("Folded in games up to id %d", last_id)
+
+    stale = db.query(UserGameAggregate)
+    if user_id is not None:
+        stale = stale.filter(UserGameAggregate.user_id == user_id)
+    stale.delete(synchronize_session=False)
+    db.add_all(aggregates.values())
+    db.commit()
+    return len(aggregates)
+
+
+def main():
+    from database import SessionLocal
+    from models import user  # noqa: F401  (relationships resolve "User")
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    rebuild_parser = commands.add_parser(
+        "rebuild", help="recompute aggregates from game history"
+    )
+    rebuild_parser.add_argument("--user-id", type=int, help="only this user")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    with SessionLocal() as db:
+        count = rebuild(db, args.user_id)
+    print(f"rebuilt {count} aggregates")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""add user_game_aggregates table
+
+Revision ID: 07b32e622f24
+Revises: a6d3c1f09e57
+Create Date: 2026-10-17 21:12:05.551884
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '07b32e622f24'
+down_revision: Union[str, Sequence[str], None] = 'a6d3c1f09e57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Empty at first: `python aggregates.py rebuild` fills it from history
+    op.create_table(
+        "user_game_aggregates",
+        sa.Column(
+            "user_id",
+            sa.Integer(),
+            sa.ForeignKey("users.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("game_type", sa.String(), primary_key=True),
+        sa.Column("games", sa.Integer(), nullable=False),
+        sa.Column("rounds", sa.Integer(), nullable=False),
+        sa.Column("correct", sa.Float(), nullable=False),
+        sa.Column("rt_mean", sa.Float(), nullable=False),
+        sa.Column("rt_m2", sa.Float(), nullable=False),
+        sa.Column("early", sa.JSON(), nullable=False),
+        sa.Column("late", sa.JSON(), nullable=False),
+        sa.Column("extras", sa.JSON(), nullable=False),
+        sa.Column("updated_at", sa.DateTime()),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("user_game_aggregates")
@@ -0,0 +1,35 @@
+"""add cohort_stats table
+
+Revision ID: 349fb219fbb1
+Revises: 8f2864bb64fd
+Create Date: 2026-10-17 23:52:41.906215
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '349fb219fbb1'
+down_revision: Union[str, Sequence[str], None] = '8f2864bb64fd'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Filled by the nightly `python cohorts.py run`
+    op.create_table(
+        "cohort_stats",
+        sa.Column("metric", sa.String(), primary_key=True),
+        sa.Column("cohort", sa.String(), primary_key=True),
+        sa.Column("users", sa.Integer(), nullable=False),
+        sa.Column("stats", sa.JSON(), nullable=False),
+        sa.Column("computed_at", sa.DateTime()),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("cohort_stats")
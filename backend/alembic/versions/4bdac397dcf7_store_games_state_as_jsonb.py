@@ -0,0 +1,88 @@
+"""store games.state as jsonb
+
+Revision ID: 4bdac397dcf7
+Revises: 07b32e622f24
+Create Date: 2026-10-17 22:03:41.118532
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4bdac397dcf7'
+down_revision: Union[str, Sequence[str], None] = '07b32e622f24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# games.state used to hold json.dumps() text, i.e. a JSON *string*; unwrap
+# those into the object they spell out. Games that never got a submit after
+# game_rounds was introduced still carry their rounds in state["log"]; those
+# move to game_rounds so every round can be counted in SQL.
+POSTGRES_UPGRADE = [
+    "ALTER TABLE games ALTER COLUMN state TYPE JSONB USING CASE "
+    "WHEN json_typeof(state) = 'string' THEN (state #>> '{}')::jsonb "
+    "ELSE state::jsonb END",
+    "INSERT INTO game_rounds (game_id, round_number, entry, created_at) "
+    "SELECT g.id, COALESCE((e.value ->> 'round')::int, e.ordinality::int), "
+    "e.value::json, CURRENT_TIMESTAMP "
+    "FROM games AS g "
+    "CROSS JOIN LATERAL jsonb_array_elements(g.state -> 'log') "
+    "WITH ORDINALITY AS e(value, ordinality) "
+    "WHERE jsonb_typeof(g.state -> 'log') = 'array' "
+    "ORDER BY g.id, e.ordinality",
+    "UPDATE games SET state = state - 'log' WHERE state ? 'log'",
+]
+SQLITE_UPGRADE = [
+    "UPDATE games SET state = json_extract(state, '$') "
+    "WHERE json_type(state) = 'text'",
+    "INSERT INTO game_rounds (game_id, round_number, entry, created_at) "
+    "SELECT g.id, COALESCE(json_extract(e.value, '$.round'), e.key + 1), "
+    "e.value, CURRENT_TIMESTAMP "
+    "FROM games AS g, json_each(g.state, '$.log') AS e "
+    "WHERE json_type(g.state, '$.log') = 'array' "
+    "ORDER BY g.id, e.key",
+    "UPDATE games SET state = json_remove(state, '$.log') "
+    "WHERE json_type(state, '$.log') IS NOT NULL",
+]
+
+
+def upgrade() -> None:
+    postgres = op.get_bind().dialect.name == "postgresql"
+    for statement in POSTGRES_UPGRADE if postgres else SQLITE_UPGRADE:
+        op.execute(statement)
+
+    # game_rounds takes a write per submitted round: keep it writable
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_game_rounds_correct",
+            "game_rounds",
+            ["game_id"],
+            postgresql_where=sa.text("CAST(entry ->> 'correct' AS BOOLEAN)"),
+            sqlite_where=sa.text("JSON_EXTRACT(entry, '$.\"correct\"')"),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_game_rounds_correct", table_name="game_rounds")
+    # Back to JSON strings; moved logs stay in game_rounds, where the
+    # routes look for them anyway
+    if op.get_bind().dialect.name == "postgresql":
+        op.alter_column(
+            "games",
+            "state",
+            type_=sa.JSON(),
+            existing_type=postgresql.JSONB(),
+            postgresql_using="to_json(state::text)",
+        )
+    else:
+        op.execute(
+            "UPDATE games SET state = json_quote(state) "
+            "WHERE json_type(state) = 'object'"
+        )
@@ -0,0 +1,41 @@
+"""add game_rounds table
+
+Revision ID: 5d2c9a7e41f3
+Revises: cbcf03befb50
+Create Date: 2026-10-17 10:12:44.518203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d2c9a7e41f3'
+down_revision: Union[str, Sequence[str], None] = 'cbcf03befb50'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "game_rounds",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column(
+            "game_id",
+            sa.Integer(),
+            sa.ForeignKey("games.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("round_number", sa.Integer(), nullable=False),
+        sa.Column("entry", sa.JSON(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now()),
+    )
+    op.create_index("ix_game_rounds_game_id_id", "game_rounds", ["game_id", "id"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_game_rounds_game_id_id", table_name="game_rounds")
+    op.drop_table("game_rounds")
@@ -0,0 +1,44 @@
+"""add game_archives table
+
+Revision ID: 71f2d9c8e4b3
+Revises: e3a8f06c5b21
+Create Date: 2026-10-17 18:20:53.611947
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '71f2d9c8e4b3'
+down_revision: Union[str, Sequence[str], None] = 'e3a8f06c5b21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "game_archives",
+        sa.Column(
+            "game_id",
+            sa.Integer(),
+            sa.ForeignKey("games.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("codec", sa.String(), nullable=False),
+        sa.Column("payload", sa.LargeBinary(), nullable=False),
+        sa.Column("raw_size", sa.Integer(), nullable=False),
+        sa.Column("archived_at", sa.DateTime(), server_default=sa.func.now()),
+    )
+    # The payload is already compressed; don't let TOAST try again
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute(
+            "ALTER TABLE game_archives ALTER COLUMN payload SET STORAGE EXTERNAL"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("game_archives")
@@ -0,0 +1,36 @@
+"""add percentile_sketches table
+
+Revision ID: 7fa7f9dfeb0d
+Revises: 4bdac397dcf7
+Create Date: 2026-10-17 22:48:19.604113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7fa7f9dfeb0d'
+down_revision: Union[str, Sequence[str], None] = '4bdac397dcf7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Empty at first: `python percentiles.py rebuild` seeds it from
+    # game_summaries
+    op.create_table(
+        "percentile_sketches",
+        sa.Column("game_type", sa.String(), primary_key=True),
+        sa.Column("metric", sa.String(), primary_key=True),
+        sa.Column("digest", sa.JSON(), nullable=False),
+        sa.Column("count", sa.Float(), nullable=False),
+        sa.Column("updated_at", sa.DateTime()),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("percentile_sketches")
@@ -0,0 +1,51 @@
+"""add leaderboard_entries table
+
+Revision ID: 8f2864bb64fd
+Revises: 7fa7f9dfeb0d
+Create Date: 2026-10-17 23:21:07.480112
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8f2864bb64fd'
+down_revision: Union[str, Sequence[str], None] = '7fa7f9dfeb0d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Empty at first: `python leaderboards.py rebuild` fills it from
+    # game_summaries
+    op.create_table(
+        "leaderboard_entries",
+        sa.Column("game_type", sa.String(), primary_key=True),
+        sa.Column("period", sa.String(), primary_key=True),
+        sa.Column("period_start", sa.Date(), primary_key=True),
+        sa.Column(
+            "user_id",
+            sa.Integer(),
+            sa.ForeignKey("users.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("score", sa.Integer(), nullable=False),
+        sa.Column("game_id", sa.Integer(), nullable=False),
+        sa.Column("achieved_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index(
+        "ix_leaderboard_entries_board_score",
+        "leaderboard_entries",
+        ["game_type", "period", "period_start", "score"],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        "ix_leaderboard_entries_board_score", table_name="leaderboard_entries"
+    )
+    op.drop_table("leaderboard_entries")
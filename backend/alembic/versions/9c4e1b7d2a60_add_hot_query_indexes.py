@@ -0,0 +1,93 @@
+"""add indexes for hot query shapes
+
+Revision ID: 9c4e1b7d2a60
+Revises: 5d2c9a7e41f3
+Create Date: 2026-10-17 14:03:27.905118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c4e1b7d2a60'
+down_revision: Union[str, Sequence[str], None] = '5d2c9a7e41f3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+UNFINISHED = sa.text("end_time IS NULL")
+
+# (name, table, columns, extra dialect kwargs)
+INDEXES = [
+    (
+        "ix_games_user_id_game_type_end_time",
+        "games",
+        ["user_id", "game_type", "end_time"],
+        {},
+    ),
+    (
+        "ix_games_unfinished",
+        "games",
+        ["start_time"],
+        {"postgresql_where": UNFINISHED, "sqlite_where": UNFINISHED},
+    ),
+    (
+        "ix_pattern_rounds_game_id_round_number",
+        "pattern_rounds",
+        ["game_id", "round_number"],
+        {},
+    ),
+    (
+        "ix_binary_rounds_game_id_turn",
+        "binary_rounds",
+        ["game_id", "turn"],
+        {"postgresql_include": ["guesser", "guess", "feedback"]},
+    ),
+    (
+        "ix_stroop_rounds_game_id_round_number",
+        "stroop_rounds",
+        ["game_id", "round_number"],
+        {},
+    ),
+    (
+        "ix_dual_rounds_game_id_round_number",
+        "dual_rounds",
+        ["game_id", "round_number"],
+        {},
+    ),
+    (
+        "ix_chunk_rounds_game_id_round_number",
+        "chunk_rounds",
+        ["game_id", "round_number"],
+        {},
+    ),
+]
+
+
+def upgrade() -> None:
+    # CONCURRENTLY keeps the tables writable while the indexes build, but it
+    # can't run inside a transaction
+    with op.get_context().autocommit_block():
+        for name, table, columns, kwargs in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+                **kwargs,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(
+                name,
+                table_name=table,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
@@ -0,0 +1,54 @@
+"""add game_summaries table
+
+Revision ID: a6d3c1f09e57
+Revises: 71f2d9c8e4b3
+Create Date: 2026-10-17 20:05:38.240716
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a6d3c1f09e57'
+down_revision: Union[str, Sequence[str], None] = '71f2d9c8e4b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "game_summaries",
+        sa.Column(
+            "game_id",
+            sa.Integer(),
+            sa.ForeignKey("games.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("game_type", sa.String(), nullable=False),
+        sa.Column("score", sa.Integer()),
+        sa.Column("rounds", sa.Integer()),
+        sa.Column("accuracy_percent", sa.Float()),
+        sa.Column("avg_response_time", sa.Float()),
+        sa.Column("winner", sa.String(), nullable=True),
+        sa.Column("duration_sec", sa.Float(), nullable=True),
+        sa.Column("completed_at", sa.DateTime()),
+        sa.Column("stats", sa.JSON(), nullable=False),
+    )
+    op.create_index(
+        "ix_game_summaries_user_id_game_type_completed_at",
+        "game_summaries",
+        ["user_id", "game_type", "completed_at"],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        "ix_game_summaries_user_id_game_type_completed_at",
+        table_name="game_summaries",
+    )
+    op.drop_table("game_summaries")
@@ -0,0 +1,82 @@
+"""optionally partition game_rounds by month
+
+game_rounds has no user_id, so ``-x partitioning=user_hash`` and
+``-x partitioning=month`` both partition it by month on created_at (see
+partitioning.py).
+
+Revision ID: b7e2d94a1c36
+Revises: 349fb219fbb1
+Create Date: 2026-10-17 23:58:26.104817
+
+"""
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+import partitioning
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e2d94a1c36'
+down_revision: Union[str, Sequence[str], None] = '349fb219fbb1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLE = partitioning.GAME_ROUNDS
+
+
+def _options():
+    """Whether to partition, from ``-x partitioning``, and ``-x months_ahead``."""
+    options = context.get_x_argument(as_dictionary=True)
+    strategy = options.get("partitioning", "off")
+    if strategy not in partitioning.STRATEGIES:
+        raise ValueError(
+            f"partitioning must be one of {', '.join(partitioning.STRATEGIES)}"
+        )
+    postgres = op.get_context().dialect.name == "postgresql"
+    return postgres and strategy != "off", int(options.get("months_ahead", 3))
+
+
+def _is_partitioned():
+    if op.get_context().dialect.name != "postgresql":
+        return False
+    if context.is_offline_mode():
+        # No catalog to read when generating SQL: trust the -x option
+        return _options()[0]
+    return TABLE in partitioning.partitioned_tables(op.get_bind())
+
+
+def _months(months_ahead):
+    """Months to create up front: from the oldest round to the months ahead."""
+    this_month = date.today().replace(day=1)
+    first = this_month
+    if not context.is_offline_mode():
+        oldest = op.get_bind().execute(
+            sa.text(f"SELECT min(created_at) FROM {TABLE}")
+        ).scalar()
+        if oldest is not None:
+            first = min(first, oldest.date().replace(day=1))
+    months, month = [], first
+    while month <= partitioning.add_months(this_month, months_ahead):
+        months.append(month)
+        month = partitioning.add_months(month, 1)
+    return months
+
+
+def upgrade() -> None:
+    partition, months_ahead = _options()
+    if not partition:
+        return
+    for statement in partitioning.partition_table_sql(
+        TABLE, "month", months=_months(months_ahead)
+    ):
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if _is_partitioned():
+        for statement in partitioning.unpartition_table_sql(TABLE):
+            op.execute(statement)
@@ -0,0 +1,119 @@
+"""add partition keys to round tables and optionally partition them
+
+Partitioning is chosen on the command line, e.g.
+``alembic -x partitioning=user_hash upgrade head`` (see partitioning.py).
+
+Revision ID: e3a8f06c5b21
+Revises: 9c4e1b7d2a60
+Create Date: 2026-10-17 16:41:09.372554
+
+"""
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+import partitioning
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3a8f06c5b21'
+down_revision: Union[str, Sequence[str], None] = '9c4e1b7d2a60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# round tables that had no timestamp column, and what to backfill it from
+# (dual games record no times)
+NEW_TIMESTAMPS = {"pattern_rounds": "g.start_time", "dual_rounds": None}
+
+
+def _options():
+    """Layout to build, from ``alembic -x partitioning=user_hash|month``.
+
+    Optional: ``-x partitions=N`` (hash partitions, 16) and
+    ``-x months_ahead=N`` (months created ahead, 3).
+    """
+    options = context.get_x_argument(as_dictionary=True)
+    strategy = options.get("partitioning", "off")
+    if strategy not in partitioning.STRATEGIES:
+        raise ValueError(
+            f"partitioning must be one of {', '.join(partitioning.STRATEGIES)}"
+        )
+    if op.get_context().dialect.name != "postgresql":
+        strategy = "off"
+    return (
+        strategy,
+        int(options.get("partitions", 16)),
+        int(options.get("months_ahead", 3)),
+    )
+
+
+def _partitioned_tables():
+    """Round tables that are partitioned now, read from the catalog."""
+    if op.get_context().dialect.name != "postgresql":
+        return []
+    if context.is_offline_mode():
+        # No catalog to read when generating SQL: trust the -x option
+        return [] if _options()[0] == "off" else list(partitioning.ROUND_TABLES)
+    return list(partitioning.partitioned_tables(op.get_bind()))
+
+
+def _months(table, months_ahead):
+    """Months to create up front: from the oldest row to the months ahead."""
+    this_month = date.today().replace(day=1)
+    first = this_month
+    if not context.is_offline_mode():
+        oldest = op.get_bind().execute(
+            sa.text(f'SELECT min("timestamp") FROM {table}')
+        ).scalar()
+        if oldest is not None:
+            first = min(first, oldest.date().replace(day=1))
+    months, month = [], first
+    while month <= partitioning.add_months(this_month, months_ahead):
+        months.append(month)
+        month = partitioning.add_months(month, 1)
+    return months
+
+
+def upgrade() -> None:
+    for table, games in partitioning.ROUND_TABLES.items():
+        op.add_column(table, sa.Column("user_id", sa.Integer(), nullable=True))
+        assignments = "user_id = g.user_id"
+        if table in NEW_TIMESTAMPS:
+            op.add_column(
+                table, sa.Column("timestamp", sa.DateTime(), nullable=True)
+            )
+            if NEW_TIMESTAMPS[table]:
+                assignments += f', "timestamp" = {NEW_TIMESTAMPS[table]}'
+        op.execute(
+            f"UPDATE {table} AS r SET {assignments} "
+            f"FROM {games} AS g WHERE g.id = r.game_id"
+        )
+        # Rounds whose game is gone; reads filter on user_id, so no NULLs
+        op.execute(f"UPDATE {table} SET user_id = 0 WHERE user_id IS NULL")
+        op.alter_column(table, "user_id", existing_type=sa.Integer(), nullable=False)
+
+    strategy, partitions, months_ahead = _options()
+    if strategy == "off":
+        return
+    for table in partitioning.ROUND_TABLES:
+        statements = partitioning.partition_table_sql(
+            table,
+            strategy,
+            partitions=partitions,
+            months=_months(table, months_ahead) if strategy == "month" else (),
+        )
+        for statement in statements:
+            op.execute(statement)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in _partitioned_tables():
+        for statement in partitioning.unpartition_table_sql(table):
+            op.execute(statement)
+    for table in partitioning.ROUND_TABLES:
+        if table in NEW_TIMESTAMPS:
+            op.drop_column(table, "timestamp")
+        op.drop_column(table, "user_id")
@@ -0,0 +1,160 @@
+"""Cold storage for finished games.
+
+Games that ended more than ``ARCHIVE_AFTER_DAYS`` ago have their JSON state
+and their game_rounds log moved into one compressed game_archives row
+(zstd, or zlib when the zstandard package isn't installed). The games row
+keeps a stub state with the scalar fields (winner, finished, n, ...) plus
+``rounds_total``/``correct_total``, which is all /progress needs; stats
+endpoints that want the full log get it decompressed by crud.rounds.
+
+Run it from cron:
+
+  python archival.py [--older-than-days N] [--batch-size N]
+"""
+import argparse
+import json
+import logging
+import zlib
+from datetime import datetime, timedelta
+
+from sqlalchemy import exists
+from sqlalchemy.orm import Session
+
+from models.game import Game
+from models.game_archive import GameArchive
+from models.game_round import GameRound
+
+try:
+    import zstandard
+except ImportError:  # zlib is always available
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+CODEC = "zstd" if zstandard else "zlib"
+ZSTD_LEVEL = 10
+ZLIB_LEVEL = 9
+
+
+def compress(data: bytes):
+    """(codec, compressed bytes) using the best codec available."""
+    if zstandard:
+        return "zstd", zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    return "zlib", zlib.compress(data, ZLIB_LEVEL)
+
+
+def decompress(codec: str, payload: bytes) -> bytes:
+    if codec == "zlib":
+        return zlib.decompress(payload)
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstd-archived game needs the zstandard package")
+        return zstandard.ZstdDecompressor().decompress(payload)
+    raise ValueError(f"Unknown archive codec {codec!r}")
+
+
+def stub_state(state: dict, rounds):
+    """What stays on the games row: scalar fields and the round totals."""
+    stub = {k: v for k, v in state.items() if not isinstance(v, (list, dict))}
+    stub.update(
+        archived=True,
+        rounds_total=len(rounds),
+        correct_total=sum(1 for r in rounds if r.get("correct")),
+    )
+    return stub
+
+
+def load_archives(db: Session, game_ids):
+    """{game_id: {"state": ..., "rounds": [...]}} for the archived ones."""
+    rows = (
+        db.query(GameArchive.game_id, GameArchive.codec, GameArchive.payload)
+        .filter(GameArchive.game_id.in_(list(game_ids)))
+        .all()
+    )
+    return {
+        row.game_id: json.loads(decompress(row.codec, row.payload))
+        for row in rows
+    }
+
+
+def archive_games(db: Session, older_than: timedelta, batch_size: int = 500):
+    """Archive finished games that ended before now - `older_than`.
+
+    Commits after every batch; returns (games archived, bytes before, bytes
+    after compression).
+    """
+    cutoff = datetime.utcnow() - older_than
+    archived = raw_total = compressed_total = 0
+    while True:
+        games = (
+            db.query(Game.id, Game.state)
+            .filter(
+                Game.end_time != None,
+                Game.end_time < cutoff,
+                ~exists().where(GameArchive.game_id == Game.id),
+            )
+            .order_by(Game.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not games:
+            break
+
+        ids = [game.id for game in games]
+        rounds = {game_id: [] for game_id in ids}
+        for row in (
+            db.query(GameRound.game_id, GameRound.entry)
+            .filter(GameRound.game_id.in_(ids))
+            .order_by(GameRound.game_id, GameRound.id)
+        ):
+            rounds[row.game_id].append(row.entry)
+
+        for game in games:
+            state = dict(game.state or {})
+            log = list(state.pop("log", [])) + rounds[game.id]
+            raw = json.dumps({"state": state, "rounds": log}).encode()
+            codec, payload = compress(raw)
+            db.add(
+                GameArchive(
+                    game_id=game.id, codec=codec, payload=payload, raw_size=len(raw)
+                )
+            )
+            db.query(Game).filter(Game.id == game.id).update(
+                {Game.state: stub_state(state, log)},
+                synchronize_session=False,
+            )
+            raw_total += len(raw)
+            compressed_total += len(payload)
+
+        db.query(GameRound).filter(GameRound.game_id.in_(ids)).delete(
+            synchronize_session=False
+        )
+        db.commit()
+        archived += len(ids)
+        logger.info("Archived %d games (%d so far)", len(ids), archived)
+    return archived, raw_total, compressed_total
+
+
+def main():
+    from config import settings
+    from database import SessionLocal
+    from models import user  # noqa: F401  (relationships resolve "User")
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--older-than-days", type=float, default=settings.ARCHIVE_AFTER_DAYS
+    )
+    parser.add_argument("--batch-size", type=int, default=settings.ARCHIVE_BATCH_SIZE)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    with SessionLocal() as db:
+        count, raw, compressed = archive_games(
+            db, timedelta(days=args.older_than_days), args.batch_size
+        )
+    ratio = f", {raw / compressed:.1f}x smaller" if compressed else ""
+    print(f"archived {count} games ({raw} -> {compressed} bytes{ratio}, {CODEC})")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,75 @@
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from anyio import to_thread
 from passlib.context import CryptContext
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from config import settings
+
+pwd_context = CryptContext(
+    schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS
+)
+
+
+class HashingBusy(Exception):
+    """Raised when the password hashing queue is full."""
+
 
 def hash_password(password: str):
     return pwd_context.hash(password)
 
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
+
+
+# ---------- Bounded hashing pool ----------
+# bcrypt is deliberately slow, so it runs in its own worker processes and
+# never holds an event-loop or request threadpool slot. At most
+# workers + queue depth hashes are in flight; callers beyond that get
+# HashingBusy immediately instead of piling up behind each other.
+_executor = None
+_executor_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(
+    max(1, settings.PASSWORD_HASH_WORKERS) + settings.PASSWORD_HASH_QUEUE_DEPTH
+)
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ProcessPoolExecutor(
+                    max_workers=settings.PASSWORD_HASH_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+    return _executor
+
+
+async def _run_bounded(fn, *args):
+    if not _slots.acquire(blocking=False):
+        raise HashingBusy()
+    try:
+        if settings.PASSWORD_HASH_WORKERS <= 0:
+            return await to_thread.run_sync(fn, *args)
+        return await asyncio.wrap_future(_get_executor().submit(fn, *args))
+    finally:
+        _slots.release()
+
+
+async def hash_password_async(password: str):
+    return await _run_bounded(hash_password, password)
+
+
+async def verify_password_async(plain_password, hashed_password):
+    return await _run_bounded(verify_password, plain_password, hashed_password)
+
+
+def shutdown_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
@@ -0,0 +1,35 @@
+from sqlalchemy import event
+
+from auth.cache import TTLCache
+from config import settings
+from models.user import User
+
+user_cache = TTLCache(
+    max_size=settings.USER_CACHE_MAX_SIZE, ttl=settings.USER_CACHE_TTL_SECONDS
+)
+
+
+def get_cached_user(user_id: int, username: str | None = None):
+    user = user_cache.get(user_id)
+    # A username claim that no longer matches means the account changed
+    # after the token was issued, so force a reload from the database.
+    if user is not None and username is not None and user.username != username:
+        user_cache.pop(user_id)
+        return None
+    return user
+
+
+def cache_user(user: User):
+    user_cache.set(user.id, user)
+
+
+def invalidate_user(user_id: int):
+    user_cache.pop(user_id)
+
+
+# Drop cached users whenever their row changes so edits and deletions are
+# visible on the next request instead of after the TTL runs out.
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_on_change(mapper, connection, target):
+    invalidate_user(target.id)
@@ -0,0 +1,169 @@
+"""/pattern/brain_profile for a heavy player: history scan vs aggregates.
+
+Seeds one user with --games pattern games of --rounds rounds each, then
+times the original implementation (one PatternRound query per game, metrics
+in pure Python, kept below for reference) against the current endpoint
+function (one user_game_aggregates row, see aggregates.py), and checks that
+both return the same profile. The one-off `aggregates.rebuild` that folds
+the seeded history in is timed too.
+
+    python benchmarks/bench_brain_profile.py --games 500 --rounds 25
+    DATABASE_URL=postgresql://... python benchmarks/bench_brain_profile.py
+"""
+import argparse
+import random
+import statistics
+import time
+from types import SimpleNamespace
+
+import common
+
+
+def seed(db, games, rounds):
+    from sqlalchemy import insert
+
+    from models.game import Game
+    from models.game_round import GameRound
+    from models.pattern_round import PatternRound
+    from models.user import User
+
+    user = User(username="profile_bench", email="profile_bench@example.com")
+    db.add(user)
+    db.commit()
+
+    rng = random.Random(19)
+    game_ids = [
+        row.id
+        for row in db.execute(
+            insert(Game).returning(Game.id),
+            [
+                {"user_id": user.id, "game_type": "pattern", "score": 0}
+                for _ in range(games)
+            ],
+        )
+    ]
+    played = [
+        {
+            "game_id": game_id,
+            "user_id": user.id,
+            "round_number": r,
+            "correct": rng.random() < 0.5 + r / (2 * rounds),
+            "grid_size": 3 + r // 8,
+            "sequence_length": 3 + r // 2,
+            "response_time": rng.uniform(1.0, 5.0),
+        }
+        for game_id in game_ids
+        for r in range(1, rounds + 1)
+    ]
+    db.execute(insert(PatternRound), played)
+    # The round log the submit route writes alongside
+    db.execute(
+        insert(GameRound),
+        [
+            {
+                "game_id": row["game_id"],
+                "round_number": row["round_number"],
+                "entry": {
+                    "round": row["round_number"],
+                    "correct": row["correct"],
+                    "grid_size": row["grid_size"],
+                    "response_time": row["response_time"],
+                },
+            }
+            for row in played
+        ],
+    )
+    db.commit()
+    return user
+
+
+def legacy_profile(db, current_user):
+    """The pre-NumPy implementation, minus the profile label."""
+    from models.game import Game
+    from models.pattern_round import PatternRound
+
+    pattern_games = db.query(Game).filter(
+        Game.user_id == current_user.id, Game.game_type == "pattern"
+    ).all()
+    all_rounds = []
+    for game in pattern_games:
+        all_rounds.extend(
+            db.query(PatternRound)
+            .filter(
+                PatternRound.user_id == current_user.id,
+                PatternRound.game_id == game.id,
+            )
+            .order_by(PatternRound.round_number)
+            .all()
+        )
+
+    response_times = [r.response_time for r in all_rounds]
+    correct = [r.correct for r in all_rounds]
+    grid_sizes = [r.grid_size for r in all_rounds]
+    split = len(correct) // 3
+    early_acc = round(sum(correct[:split]) / split * 100, 2)
+    late_acc = round(sum(correct[-split:]) / split * 100, 2)
+    return {
+        "avg_accuracy_percent": round(sum(correct) / len(correct) * 100, 2),
+        "avg_response_time": round(sum(response_times) / len(response_times), 2),
+        "consistency": round(statistics.stdev(response_times), 2),
+        "avg_grid_size": round(sum(grid_sizes) / len(grid_sizes), 2),
+        "early_accuracy": early_acc,
+        "late_accuracy": late_acc,
+        "learning_trend": late_acc - early_acc,
+    }
+
+
+def timed(label, fn, repeat):
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        latencies.append((time.perf_counter() - start) * 1000)
+    common.summarize(label, latencies)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--games", type=int, default=500)
+    parser.add_argument("--rounds", type=int, default=25)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    common.reset_database()
+    import aggregates
+    from config import settings
+    from database import SessionLocal
+    from routes.pattern_analysis import get_brain_profile
+
+    with SessionLocal() as db:
+        user = SimpleNamespace(id=seed(db, args.games, args.rounds).id)
+        print(f"{args.games} games, {args.games * args.rounds} rounds")
+        timed("rebuild, once", lambda: aggregates.rebuild(db, user.id), 1)
+
+        # Fresh session per call so nothing is served from the identity map
+        def run_legacy():
+            with SessionLocal() as session:
+                return legacy_profile(session, user)
+
+        def run_current():
+            with SessionLocal() as session:
+                return get_brain_profile(db=session, current_user=user)
+
+        legacy = timed("per-game queries", run_legacy, args.repeat)
+        current = timed("aggregate row", run_current, args.repeat)
+
+    # Past 3 * AGGREGATE_WINDOW_ROUNDS rounds the learning trend compares the
+    # first and latest window instead of thirds, so only the rest must match
+    if current["rounds_total"] > 3 * settings.AGGREGATE_WINDOW_ROUNDS:
+        for key in ("early_accuracy", "late_accuracy", "learning_trend"):
+            legacy.pop(key)
+            current["summary"].pop(key)
+    assert current["summary"] == legacy, (current["summary"], legacy)
+    assert current["rounds_total"] == args.games * args.rounds
+    print("profiles match")
+
+
+if __name__ == "__main__":
+    main()
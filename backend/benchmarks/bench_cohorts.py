@@ -0,0 +1,147 @@
+"""cohorts.py run: wall time by worker count.
+
+Seeds --users players over twelve monthly cohorts with pattern rounds,
+Stroop round logs and dual n-back games, then runs the cohort job with
+1, 2, 4, ... workers (up to --max-workers, default the CPU count) and
+checks every run writes the same stats. On a database that isn't the
+bottleneck the time should drop close to 1/workers.
+
+    python benchmarks/bench_cohorts.py --users 2000
+    DATABASE_URL=postgresql://... python benchmarks/bench_cohorts.py
+"""
+import argparse
+import os
+import random
+import time
+from datetime import datetime
+
+import common
+
+
+def seed(db, users, pattern_rounds, stroop_rounds, dual_games):
+    from sqlalchemy import insert
+
+    from models.game import Game
+    from models.game_round import GameRound
+    from models.pattern_round import PatternRound
+    from models.user import User
+
+    rng = random.Random(25)
+    user_ids = [
+        row.id
+        for row in db.execute(
+            insert(User).returning(User.id),
+            [
+                {"username": f"cohort_{i}", "email": f"cohort_{i}@example.com"}
+                for i in range(users)
+            ],
+        )
+    ]
+
+    def games(game_type, state=None):
+        return [
+            row.id
+            for row in db.execute(
+                insert(Game).returning(Game.id),
+                [
+                    {
+                        "user_id": user_id,
+                        "game_type": game_type,
+                        "start_time": datetime(2025, 1 + user_id % 12, 1 + i % 28),
+                        "state": state(i) if state else {},
+                    }
+                    for user_id in user_ids
+                    for i in range(per_user)
+                ],
+            )
+        ]
+
+    per_user = 1
+    pattern_ids = games("pattern")
+    stroop_ids = games("stroop")
+    per_user = max(1, dual_games // users)
+    games("dual_nback", lambda i: {"n": 1 + i // 3})
+
+    owners = dict(zip(pattern_ids, user_ids))
+    per_game = pattern_rounds // users
+    db.execute(
+        insert(PatternRound),
+        [
+            {
+                "game_id": game_id,
+                "user_id": owners[game_id],
+                "round_number": r,
+                "grid_size": 3 + r // 8,
+                "correct": rng.random() < 0.9 - r / (2 * per_game),
+                "response_time": rng.uniform(1.0, 5.0),
+            }
+            for game_id in pattern_ids
+            for r in range(1, per_game + 1)
+        ],
+    )
+    per_game = stroop_rounds // users
+    db.execute(
+        insert(GameRound),
+        [
+            {
+                "game_id": game_id,
+                "round_number": r,
+                "entry": {
+                    "congruent": r % 2 == 0,
+                    "correct": rng.random() < (0.95 if r % 2 == 0 else 0.8),
+                    "response_time": rng.uniform(0.4, 1.2) + (r % 2 == 1) * 0.2,
+                },
+            }
+            for game_id in stroop_ids
+            for r in range(1, per_game + 1)
+        ],
+    )
+    db.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--pattern-rounds", type=int, default=400000)
+    parser.add_argument("--stroop-rounds", type=int, default=200000)
+    parser.add_argument("--dual-games", type=int, default=40000)
+    parser.add_argument("--chunk-rows", type=int, default=50000)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    common.reset_database()
+    import cohorts
+    from database import SessionLocal
+    from models.cohort_stat import CohortStat
+
+    with SessionLocal() as db:
+        seed(
+            db, args.users, args.pattern_rounds, args.stroop_rounds, args.dual_games
+        )
+    print(
+        f"{args.users} users, {args.pattern_rounds} pattern rounds, "
+        f"{args.stroop_rounds} stroop rounds, {args.dual_games} dual games"
+    )
+
+    results, baseline = None, None
+    workers = 1
+    while workers <= args.max_workers:
+        with SessionLocal() as db:
+            start = time.perf_counter()
+            cohorts.run(db, workers, args.chunk_rows)
+            elapsed = time.perf_counter() - start
+            stats = {
+                (row.metric, row.cohort): row.stats for row in db.query(CohortStat)
+            }
+        baseline = baseline or elapsed
+        print(
+            f"{workers:>3} workers  {elapsed:6.2f}s  speedup {baseline / elapsed:4.2f}x"
+        )
+        assert results is None or stats == results
+        results = stats
+        workers *= 2
+    print("all runs match")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""/export/rounds memory: peak Python allocations vs rows exported.
+
+Seeds one user with --rounds game_rounds rows (in --games games), streams
+the export and reports time, bytes written and the tracemalloc peak of a
+second, traced pass, first for a tenth of the rows and then for all of
+them. With server-side cursors the peak should not grow with the rows.
+
+    python benchmarks/bench_export.py --rounds 200000
+    DATABASE_URL=postgresql://... python benchmarks/bench_export.py
+"""
+import argparse
+import time
+import tracemalloc
+
+import common
+
+
+def seed(db, games, rounds):
+    from sqlalchemy import insert
+
+    from models.game import Game
+    from models.game_round import GameRound
+    from models.user import User
+
+    per_game = rounds // games
+    users = [
+        User(username=f"export_bench_{i}", email=f"export_bench_{i}@example.com")
+        for i in range(2)
+    ]
+    db.add_all(users)
+    db.commit()
+    for user, user_games in zip(users, (games // 10, games)):
+        game_ids = [
+            row.id
+            for row in db.execute(
+                insert(Game).returning(Game.id),
+                [
+                    {"user_id": user.id, "game_type": "dual_nback", "score": 0}
+                    for _ in range(user_games)
+                ],
+            )
+        ]
+        db.execute(
+            insert(GameRound),
+            [
+                {
+                    "game_id": game_id,
+                    "round_number": r,
+                    "entry": {
+                        "round": r,
+                        "correct": r % 3 != 0,
+                        "letter": "K",
+                        "position": r % 9,
+                        "response_time": 0.8,
+                    },
+                }
+                for game_id in game_ids
+                for r in range(1, per_game + 1)
+            ],
+        )
+    db.commit()
+    return [(users[0].id, games // 10 * per_game), (users[1].id, games * per_game)]
+
+
+def measure(user_id, fmt, compress):
+    from routes.export import stream_export
+
+    start = time.perf_counter()
+    written = sum(len(chunk) for chunk in stream_export(user_id, fmt, compress))
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    for _ in stream_export(user_id, fmt, compress):
+        pass
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, written, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--games", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=200000)
+    parser.add_argument("--format", default="ndjson", choices=("ndjson", "csv"))
+    parser.add_argument("--gzip", action="store_true")
+    args = parser.parse_args()
+
+    common.reset_database()
+    from database import SessionLocal
+
+    with SessionLocal() as db:
+        players = seed(db, args.games, args.rounds)
+
+    for user_id, rows in players:
+        elapsed, written, peak = measure(user_id, args.format, args.gzip)
+        print(
+            f"{rows:>9} rows  {written / 1e6:8.1f} MB  {elapsed:6.2f}s  "
+            f"peak {peak / 1e6:6.2f} MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Round inserts from concurrent submits: one commit each vs group commit.
+
+Each worker thread plays the part of a request inserting one round row. The
+baseline commits every row in its own transaction (what submit routes do by
+default); the batched run hands rows to GroupCommitWriter, which shares one
+multi-row INSERT transaction between everything that arrives in its window.
+
+    python benchmarks/bench_group_commit.py --workers 32 --rounds 200
+    DATABASE_URL=postgresql://... python benchmarks/bench_group_commit.py
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import common
+
+
+def make_row(game_id, i):
+    from models.game_round import GameRound
+
+    return GameRound(game_id=game_id, round_number=i, entry={"round": i, "score": 5})
+
+
+def run(label, game_ids, rounds, insert_one):
+    latencies = []
+
+    def worker(game_id):
+        for i in range(rounds):
+            start = time.perf_counter()
+            insert_one(make_row(game_id, i))
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(game_ids)) as pool:
+        list(pool.map(worker, game_ids))
+    elapsed = time.perf_counter() - start
+    common.summarize(label, latencies)
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=32)
+    parser.add_argument("--rounds", type=int, default=100, help="rows per worker")
+    parser.add_argument("--max-delay-ms", type=float, default=2)
+    parser.add_argument("--max-batch", type=int, default=500)
+    args = parser.parse_args()
+
+    from database import SessionLocal
+    from models.game import Game
+    from round_writer import GroupCommitWriter
+
+    common.reset_database()
+    with SessionLocal() as db:
+        games = [
+            Game(user_id=1, game_type="bench", state={})
+            for _ in range(args.workers)
+        ]
+        db.add_all(games)
+        db.commit()
+        game_ids = [g.id for g in games]
+    total = args.workers * args.rounds
+
+    def commit_each(row):
+        with SessionLocal() as db:
+            db.add(row)
+            db.commit()
+
+    elapsed = run("commit per row", game_ids, args.rounds, commit_each)
+    print(f"{'':<28} {total / elapsed:8.0f} rows/s  {total / elapsed:8.0f} commits/s\n")
+
+    writer = GroupCommitWriter(
+        SessionLocal, max_batch=args.max_batch, max_delay=args.max_delay_ms / 1000
+    )
+    elapsed = run(
+        "group commit", game_ids, args.rounds, lambda row: writer.write([row])
+    )
+    writer.close()
+    stats = writer.stats()
+    print(
+        f"{'':<28} {total / elapsed:8.0f} rows/s  "
+        f"{stats['transactions'] / elapsed:8.0f} commits/s  "
+        f"({stats['rows_per_transaction']} rows per commit)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Login storm: hammer /auth/login while one player runs pattern rounds,
+and report the player's /pattern/submit latency.
+
+Runs twice: once hashing in the request threadpool (PASSWORD_HASH_WORKERS=0,
+the old behaviour) and once with the bounded hashing process pool.
+
+    python benchmarks/bench_login_storm.py [concurrent_logins] [seconds]
+"""
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+
+async def storm(concurrency, duration):
+    import common
+    import httpx
+    from fastapi.testclient import TestClient
+
+    from main import app
+
+    common.reset_database()
+    with TestClient(app) as sync_client:
+        headers = common.register_and_login(sync_client)
+        email = "storm@example.com"
+        sync_client.post(
+            "/auth/register",
+            json={"username": "storm", "email": email, "password": "stormpass"},
+        )
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        deadline = time.perf_counter() + duration
+        login_codes = {}
+        submit_latencies = []
+
+        async def login_loop():
+            while time.perf_counter() < deadline:
+                res = await client.post(
+                    "/auth/login", data={"username": email, "password": "stormpass"}
+                )
+                login_codes[res.status_code] = login_codes.get(res.status_code, 0) + 1
+
+        async def player_loop():
+            while time.perf_counter() < deadline:
+                start = (
+                    await client.post("/pattern/start", headers=headers, json={"grid_size": 3})
+                ).json()
+                game_id, sequence = start["game_id"], start["sequence"]
+                for _ in range(10):
+                    t0 = time.perf_counter()
+                    res = await client.post(
+                        "/pattern/submit",
+                        headers=headers,
+                        json={"game_id": game_id, "sequence": sequence, "response_time": 2.5},
+                    )
+                    submit_latencies.append((time.perf_counter() - t0) * 1000)
+                    body = res.json()
+                    if body.get("game_over") or time.perf_counter() >= deadline:
+                        break
+                    sequence = body["next_round"]["sequence"]
+
+        await asyncio.gather(player_loop(), *(login_loop() for _ in range(concurrency)))
+
+    mode = "process pool" if int(os.environ["PASSWORD_HASH_WORKERS"]) else "threadpool"
+    common.summarize(f"/pattern/submit ({mode})", submit_latencies)
+    print(f"{'':<28} login responses by status: {login_codes}")
+
+
+def main():
+    concurrency = sys.argv[1] if len(sys.argv) > 1 else "64"
+    duration = sys.argv[2] if len(sys.argv) > 2 else "10"
+    for workers in ("0", str(max(1, (os.cpu_count() or 2) // 2))):
+        env = dict(os.environ, PASSWORD_HASH_WORKERS=workers)
+        subprocess.run(
+            [sys.executable, __file__, "--run", concurrency, duration], env=env, check=True
+        )
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--run"]:
+        asyncio.run(storm(int(sys.argv[2]), float(sys.argv[3])))
+    else:
+        main()
@@ -0,0 +1,76 @@
+"""Cold-start time of an API worker: importing the app and running startup.
+
+Each sample is a fresh interpreter, so module imports and the lifespan's
+schema check are measured the way an autoscaled worker pays for them. The
+database is measured twice: unstamped (create_all inspects every table) and
+stamped at the Alembic head (create_all is skipped).
+
+    python benchmarks/bench_startup.py --runs 10
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+import common
+
+CHILD = """
+import asyncio, json, time
+t0 = time.perf_counter()
+import main
+t1 = time.perf_counter()
+
+async def boot():
+    async with main.lifespan(main.app):
+        return time.perf_counter()
+
+t2 = asyncio.run(boot())
+print(json.dumps({"import": (t1 - t0) * 1000, "lifespan": (t2 - t1) * 1000}))
+"""
+
+
+def sample(runs):
+    results = {"import": [], "lifespan": [], "total": []}
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", CHILD],
+            cwd=common.BACKEND_DIR,
+            env=os.environ,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        timings = json.loads(out.stdout.strip().splitlines()[-1])
+        results["import"].append(timings["import"])
+        results["lifespan"].append(timings["lifespan"])
+        results["total"].append(timings["import"] + timings["lifespan"])
+    return results
+
+
+def stamp_head():
+    subprocess.run(
+        [sys.executable, "-m", "alembic", "stamp", "head"],
+        cwd=common.BACKEND_DIR,
+        env=os.environ,
+        capture_output=True,
+        check=True,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    common.reset_database()
+    for label, value in sample(args.runs).items():
+        common.summarize(f"unstamped {label}", value)
+
+    stamp_head()
+    for label, value in sample(args.runs).items():
+        common.summarize(f"at alembic head {label}", value)
+
+
+if __name__ == "__main__":
+    main()
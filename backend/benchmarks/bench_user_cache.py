@@ -0,0 +1,59 @@
+"""Measure DB queries and latency per authenticated request with and
+without the user cache in routes/auth.get_current_user.
+
+    python benchmarks/bench_user_cache.py [iterations]
+"""
+import sys
+import time
+
+import common
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from auth.user_cache import user_cache
+from database import engine
+from main import app
+
+query_count = 0
+
+
+@event.listens_for(engine, "before_cursor_execute")
+def _count(conn, cursor, statement, parameters, context, executemany):
+    global query_count
+    query_count += 1
+
+
+def run(client, headers, iterations):
+    global query_count
+    latencies = []
+    query_count = 0
+    for _ in range(iterations):
+        start = time.perf_counter()
+        res = client.get("/auth/me", headers=headers)
+        latencies.append((time.perf_counter() - start) * 1000)
+        assert res.status_code == 200, res.text
+    return latencies, query_count / iterations
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    common.reset_database()
+
+    with TestClient(app) as client:
+        headers = common.register_and_login(client)
+
+        ttl = user_cache.ttl
+        user_cache.ttl = 0  # every lookup misses
+        user_cache.clear()
+        uncached, uncached_q = run(client, headers, iterations)
+
+        user_cache.ttl = ttl
+        cached, cached_q = run(client, headers, iterations)
+
+    common.summarize("/auth/me without cache", uncached)
+    common.summarize("/auth/me with cache", cached)
+    print(f"queries/request: {uncached_q:.2f} -> {cached_q:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Shared setup for the benchmark scripts in this directory.
+
+Benchmarks run the FastAPI app in-process against a throwaway SQLite
+database unless DATABASE_URL is already set in the environment, e.g.
+
+    DATABASE_URL=postgresql://... python benchmarks/bench_user_cache.py
+"""
+import os
+import statistics
+import sys
+import uuid
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, BACKEND_DIR)
+
+BENCH_DB_PATH = os.path.join(BACKEND_DIR, "bench.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{BENCH_DB_PATH}")
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+
+def reset_database():
+    from database import Base, engine
+    import models  # noqa: F401  (registers every model on Base.metadata)
+    from models import game, user  # noqa: F401
+
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+
+def register_and_login(client):
+    """Create a fresh account and return auth headers for it."""
+    name = f"bench_{uuid.uuid4().hex[:10]}"
+    email = f"{name}@example.com"
+    password = "benchpass"
+    client.post(
+        "/auth/register",
+        json={"username": name, "email": email, "password": password},
+    )
+    res = client.post("/auth/login", data={"username": email, "password": password})
+    res.raise_for_status()
+    return {"Authorization": f"Bearer {res.json()['access_token']}"}
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(label, latencies_ms):
+    print(
+        f"{label:<28} n={len(latencies_ms):<6} "
+        f"mean={statistics.fmean(latencies_ms):7.2f}ms "
+        f"p50={percentile(latencies_ms, 50):7.2f}ms "
+        f"p95={percentile(latencies_ms, 95):7.2f}ms "
+        f"p99={percentile(latencies_ms, 99):7.2f}ms"
+    )
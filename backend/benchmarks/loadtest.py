@@ -0,0 +1,232 @@
+"""Concurrent-player load test for the game endpoints.
+
+Each virtual player registers, logs in, then loops over game sessions:
+
+  pattern  /pattern/start + 10 x /pattern/submit
+  binary   /binary/start + /binary/guess until someone wins
+  dual     /dual/start + 20 x /dual/submit
+  stroop   /stroop/start + N x /stroop/submit
+
+By default the app runs in-process against the SQLite stand-in from
+common.py; pass --base-url to drive a running server (e.g. one backed by a
+local Postgres) instead.
+
+    python benchmarks/loadtest.py --players 50 --duration 30
+    python benchmarks/loadtest.py --base-url http://localhost:8000 --players 200
+"""
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from collections import defaultdict
+
+import common
+import httpx
+
+SCENARIOS = ("pattern", "binary", "dual", "stroop")
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    async def call(self, client, method, url, endpoint=None, **kwargs):
+        endpoint = endpoint or url
+        start = time.perf_counter()
+        res = await client.request(method, url, **kwargs)
+        self.latencies[endpoint].append((time.perf_counter() - start) * 1000)
+        if res.status_code >= 400:
+            self.errors[endpoint] += 1
+            res.raise_for_status()
+        return res.json()
+
+    def report(self, elapsed):
+        total = sum(len(v) for v in self.latencies.values())
+        print(f"\n{total} requests in {elapsed:.1f}s = {total / elapsed:.1f} req/s\n")
+        print(
+            f"{'endpoint':<20} {'count':>7} {'req/s':>8} {'errors':>7} "
+            f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"
+        )
+        for endpoint in sorted(self.latencies):
+            values = self.latencies[endpoint]
+            print(
+                f"{endpoint:<20} {len(values):>7} {len(values) / elapsed:>8.1f} "
+                f"{self.errors[endpoint]:>7} "
+                f"{common.percentile(values, 50):>8.2f} "
+                f"{common.percentile(values, 95):>8.2f} "
+                f"{common.percentile(values, 99):>8.2f}"
+            )
+
+
+async def sign_in(client, rec):
+    name = f"load_{uuid.uuid4().hex[:12]}"
+    email = f"{name}@example.com"
+    await rec.call(
+        client,
+        "POST",
+        "/auth/register",
+        json={"username": name, "email": email, "password": "loadpass"},
+    )
+    while True:
+        try:
+            body = await rec.call(
+                client,
+                "POST",
+                "/auth/login",
+                data={"username": email, "password": "loadpass"},
+            )
+            return {"Authorization": f"Bearer {body['access_token']}"}
+        except httpx.HTTPStatusError as exc:
+            # The hashing pool sheds load with 503 + Retry-After
+            if exc.response.status_code != 503:
+                raise
+            await asyncio.sleep(float(exc.response.headers.get("Retry-After", 1)))
+
+
+async def play_pattern(client, rec, headers):
+    body = await rec.call(
+        client, "POST", "/pattern/start", headers=headers, json={"grid_size": 3}
+    )
+    game_id, sequence = body["game_id"], body["sequence"]
+    for _ in range(10):
+        body = await rec.call(
+            client,
+            "POST",
+            "/pattern/submit",
+            headers=headers,
+            json={
+                "game_id": game_id,
+                "sequence": sequence,
+                "response_time": round(random.uniform(1.0, 4.0), 2),
+            },
+        )
+        if body.get("game_over") or not body.get("next_round"):
+            break
+        sequence = body["next_round"]["sequence"]
+
+
+async def play_binary(client, rec, headers):
+    body = await rec.call(
+        client, "POST", "/binary/start", headers=headers, json={"difficulty": "normal"}
+    )
+    game_id, low, high = body["game_id"], body["range_min"], body["range_max"]
+    while low <= high:
+        guess = random.randint(low, high)
+        body = await rec.call(
+            client,
+            "POST",
+            "/binary/guess",
+            headers=headers,
+            json={"game_id": game_id, "guess": guess},
+        )
+        if body.get("winner") or "message" in body:
+            break
+        if body["result"] == "too_low":
+            low = guess + 1
+        else:
+            high = guess - 1
+        if body["ai_result"] == "too_low":
+            low = max(low, body["ai_guess"] + 1)
+        else:
+            high = min(high, body["ai_guess"] - 1)
+
+
+async def play_dual(client, rec, headers):
+    body = await rec.call(client, "POST", "/dual/start", headers=headers, json={"n": 2})
+    game_id = body["game_id"]
+    for _ in range(20):
+        body = await rec.call(
+            client,
+            "POST",
+            "/dual/submit",
+            headers=headers,
+            json={
+                "game_id": game_id,
+                "letter_match": random.random() < 0.3,
+                "position_match": random.random() < 0.3,
+                "response_time": round(random.uniform(0.4, 1.5), 2),
+            },
+        )
+        if body.get("game_over"):
+            break
+
+
+async def play_stroop(client, rec, headers, rounds):
+    body = await rec.call(
+        client, "POST", "/stroop/start", headers=headers, json={"rounds": rounds}
+    )
+    game_id, color = body["game_id"], body["font_color"]
+    for _ in range(rounds):
+        body = await rec.call(
+            client,
+            "POST",
+            "/stroop/submit",
+            headers=headers,
+            json={
+                "game_id": game_id,
+                "response_color": color,
+                "response_time": round(random.uniform(0.3, 1.2), 2),
+            },
+        )
+        color = body["next_round"]["font_color"]
+
+
+async def player(client, rec, scenarios, deadline, stroop_rounds):
+    headers = await sign_in(client, rec)
+    while time.perf_counter() < deadline:
+        scenario = random.choice(scenarios)
+        if scenario == "pattern":
+            await play_pattern(client, rec, headers)
+        elif scenario == "binary":
+            await play_binary(client, rec, headers)
+        elif scenario == "dual":
+            await play_dual(client, rec, headers)
+        else:
+            await play_stroop(client, rec, headers, stroop_rounds)
+
+
+async def run(args):
+    if args.base_url:
+        client = httpx.AsyncClient(base_url=args.base_url, timeout=60)
+    else:
+        from main import app
+
+        common.reset_database()
+        client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://loadtest", timeout=60
+        )
+
+    rec = Recorder()
+    async with client:
+        start = time.perf_counter()
+        deadline = start + args.duration
+        await asyncio.gather(
+            *(
+                player(client, rec, args.scenarios, deadline, args.stroop_rounds)
+                for _ in range(args.players)
+            )
+        )
+        elapsed = time.perf_counter() - start
+    rec.report(elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--players", type=int, default=20, help="concurrent players")
+    parser.add_argument("--duration", type=float, default=20, help="seconds to run")
+    parser.add_argument("--base-url", help="target server (default: in-process app)")
+    parser.add_argument(
+        "--scenarios",
+        nargs="+",
+        choices=SCENARIOS,
+        default=list(SCENARIOS),
+        help="game sessions each player picks from",
+    )
+    parser.add_argument("--stroop-rounds", type=int, default=10)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
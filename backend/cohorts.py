@@ -0,0 +1,344 @@
+"""Nightly cohort analytics over every user, served by /cohorts/{metric}.
+
+Players are grouped into cohorts by the month of their first game. For
+each cohort, and for everyone ("all"), the job computes:
+
+  pattern_grid         pattern accuracy and response time by grid size
+  stroop_interference  congruent vs incongruent Stroop rounds, and the cost
+  nback_progression    dual n-back level and accuracy by how many games a
+                       player had played (the 1st, 2nd, ... game)
+
+The source tables are split into key ranges of about COHORT_CHUNK_ROWS rows
+(round ids; user ids for n-back progression, which needs each player's
+games in order). A process pool reduces every range to per-cohort sums
+with NumPy, and the parent adds those up. Chunks are independent and the
+sums are tiny, so the runtime scales with the worker count until the
+database is the bottleneck. The results replace the cohort_stats rows in
+one transaction.
+
+  python cohorts.py run [--workers N] [--chunk-rows N]
+"""
+import argparse
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from config import settings
+from database import SessionLocal, engine
+from models.cohort_stat import CohortStat
+from models.game import Game
+from models.game_round import GameRound
+from models.game_summary import GameSummary
+from models.pattern_round import PatternRound
+
+logger = logging.getLogger(__name__)
+
+MAX_GRID = 16  # larger grids share the last bucket
+MAX_GAMES = 30  # games past the 30th count as the 30th
+
+# Set in every worker: cohort index by user id (-1 = no games yet)
+_cohort_of = None
+_cohort_count = 0
+
+
+def _set_cohorts(cohort_of, cohort_count):
+    global _cohort_of, _cohort_count
+    _cohort_of, _cohort_count = cohort_of, cohort_count
+
+
+def _init_worker(cohort_of, cohort_count):
+    # Forked workers must not reuse the parent's pooled connections
+    engine.dispose(close=False)
+    _set_cohorts(cohort_of, cohort_count)
+
+
+def _cohorts(user_ids):
+    ids = user_ids.astype(np.int64)
+    known = (ids >= 0) & (ids < len(_cohort_of))
+    cohorts = np.full(len(ids), -1, dtype=np.int64)
+    cohorts[known] = _cohort_of[ids[known]]
+    return cohorts
+
+
+def _sums(cohorts, buckets, bucket_count, *weights):
+    """Row count and weight sums per (cohort, bucket).
+
+    Shape (1 + len(weights), cohorts, buckets); rows of users without a
+    cohort are dropped.
+    """
+    keep = cohorts >= 0
+    flat = cohorts[keep] * bucket_count + buckets[keep]
+    size = _cohort_count * bucket_count
+    return np.stack(
+        [np.bincount(flat, minlength=size)]
+        + [np.bincount(flat, weights=w[keep], minlength=size) for w in weights]
+    ).reshape(1 + len(weights), _cohort_count, bucket_count)
+
+
+def _array(rows, columns):
+    if not rows:
+        return np.empty((0, columns))
+    return np.array(list(map(tuple, rows)), dtype=float)
+
+
+def _pattern_chunk(db: Session, lo: int, hi: int):
+    rows = (
+        db.query(
+            PatternRound.user_id,
+            PatternRound.grid_size,
+            PatternRound.correct,
+            PatternRound.response_time,
+        )
+        .filter(
+            PatternRound.id >= lo,
+            PatternRound.id < hi,
+            PatternRound.grid_size != None,
+            PatternRound.correct != None,
+            PatternRound.response_time != None,
+        )
+        .all()
+    )
+    user, grid, correct, response_time = _array(rows, 4).T
+    grid = np.clip(grid, 0, MAX_GRID).astype(np.int64)
+    return _sums(_cohorts(user), grid, MAX_GRID + 1, correct, response_time)
+
+
+def _stroop_chunk(db: Session, lo: int, hi: int):
+    fields = [
+        GameRound.entry["congruent"].as_boolean(),
+        GameRound.entry["correct"].as_boolean(),
+        GameRound.entry["response_time"].as_float(),
+    ]
+    rows = (
+        db.query(Game.user_id, *fields)
+        .join(Game, Game.id == GameRound.game_id)
+        .filter(
+            GameRound.id >= lo,
+            GameRound.id < hi,
+            Game.game_type == "stroop",
+            *(field != None for field in fields),
+        )
+        .all()
+    )
+    user, congruent, correct, response_time = _array(rows, 4).T
+    # bucket 0: incongruent, 1: congruent
+    return _sums(
+        _cohorts(user), congruent.astype(np.int64), 2, correct, response_time
+    )
+
+
+def _nback_chunk(db: Session, lo: int, hi: int):
+    rows = (
+        db.query(
+            Game.user_id,
+            func.coalesce(Game.state["n"].as_integer(), 2),
+            GameSummary.accuracy_percent,
+        )
+        .outerjoin(GameSummary, GameSummary.game_id == Game.id)
+        .filter(
+            Game.game_type == "dual_nback", Game.user_id >= lo, Game.user_id < hi
+        )
+        .order_by(Game.user_id, Game.start_time, Game.id)
+        .all()
+    )
+    user, n, accuracy = _array(rows, 3).T
+    # Position of each game among its player's: rows are grouped by user
+    position = np.arange(len(user))
+    first = np.ones(len(user), dtype=bool)
+    first[1:] = user[1:] != user[:-1]
+    game_number = position - np.maximum.accumulate(np.where(first, position, 0))
+    finished = ~np.isnan(accuracy)
+    return _sums(
+        _cohorts(user),
+        np.minimum(game_number, MAX_GAMES - 1),
+        MAX_GAMES,
+        n,
+        finished,
+        np.where(finished, accuracy, 0.0),
+    )
+
+
+def _percent(part, whole):
+    share = np.divide(part * 100.0, whole, where=whole > 0, out=part * 0.0)
+    return np.round(share, 2)
+
+
+def _mean(total, count):
+    return np.round(np.divide(total, count, where=count > 0, out=total * 0.0), 3)
+
+
+def _pattern_stats(sums):
+    count, correct, response_time = sums
+    played = np.flatnonzero(count)
+    return {
+        "grid_size": played.tolist(),
+        "rounds": count[played].astype(int).tolist(),
+        "accuracy_percent": _percent(correct, count)[played].tolist(),
+        "avg_response_time": _mean(response_time, count)[played].tolist(),
+    }
+
+
+def _stroop_stats(sums):
+    count, correct, response_time = sums
+    accuracy = _percent(correct, count)
+    mean_time = _mean(response_time, count)
+    stats = {
+        kind: {
+            "rounds": int(count[bucket]),
+            "accuracy_percent": float(accuracy[bucket]),
+            "avg_response_time": float(mean_time[bucket]),
+        }
+        for kind, bucket in (("congruent", 1), ("incongruent", 0))
+    }
+    both = bool(count.all())
+    stats["interference_cost_sec"] = (
+        round(float(mean_time[0] - mean_time[1]), 3) if both else None
+    )
+    stats["accuracy_cost_percent"] = (
+        round(float(accuracy[1] - accuracy[0]), 2) if both else None
+    )
+    return stats
+
+
+def _nback_stats(sums):
+    count, n, finished, accuracy = sums
+    played = np.flatnonzero(count)
+    return {
+        "game_number": (played + 1).tolist(),  # the last one means "or later"
+        "games": count[played].astype(int).tolist(),
+        "avg_n": _mean(n, count)[played].tolist(),
+        "finished": finished[played].astype(int).tolist(),
+        "avg_accuracy_percent": _mean(accuracy, finished)[played].tolist(),
+    }
+
+
+# metric -> (chunk reducer, key column for the ranges, stats formatter)
+METRICS = {
+    "pattern_grid": (_pattern_chunk, PatternRound.id, _pattern_stats),
+    "stroop_interference": (_stroop_chunk, GameRound.id, _stroop_stats),
+    "nback_progression": (_nback_chunk, Game.user_id, _nback_stats),
+}
+
+
+def _run_chunk(task):
+    metric, lo, hi = task
+    with SessionLocal() as db:
+        return metric, METRICS[metric][0](db, lo, hi)
+
+
+def _cohort_map(db: Session):
+    """(cohort labels, cohort index by user id, users per cohort)."""
+    rows = (
+        db.query(Game.user_id, func.min(Game.start_time))
+        .filter(Game.user_id != None, Game.start_time != None)
+        .group_by(Game.user_id)
+        .all()
+    )
+    months = {user_id: started.strftime("%Y-%m") for user_id, started in rows}
+    labels = sorted(set(months.values()))
+    index = {label: i for i, label in enumerate(labels)}
+    cohort_of = np.full(max(months, default=0) + 1, -1, dtype=np.int64)
+    for user_id, month in months.items():
+        cohort_of[user_id] = index[month]
+    sizes = np.bincount(cohort_of[cohort_of >= 0], minlength=len(labels))
+    return labels, cohort_of, sizes
+
+
+def _ranges(db: Session, metric: str, chunk_rows: int):
+    """Key ranges [lo, hi) of about `chunk_rows` rows each."""
+    key = METRICS[metric][1]
+    query = db.query(func.min(key), func.max(key), func.count())
+    if metric == "nback_progression":
+        query = query.filter(Game.game_type == "dual_nback")
+    low, high, rows = query.one()
+    if not rows:
+        return []
+    # Keys are dense for ids; for user ids, aim at chunk_rows games
+    step = max(1, chunk_rows * (high - low + 1) // rows)
+    return [(lo, min(lo + step, high + 1)) for lo in range(low, high + 1, step)]
+
+
+def run(db: Session, workers: int = 0, chunk_rows: int = 50000):
+    """Recompute every metric for every cohort; returns the rows written."""
+    labels, cohort_of, sizes = _cohort_map(db)
+    tasks = [
+        (metric, lo, hi)
+        for metric in METRICS
+        for lo, hi in _ranges(db, metric, chunk_rows)
+    ]
+    db.rollback()  # no transaction held open while the workers run
+    workers = workers or os.cpu_count() or 1
+    logger.info(
+        "%d cohorts, %d chunks, %d workers", len(labels), len(tasks), workers
+    )
+
+    if workers == 1:
+        _set_cohorts(cohort_of, len(labels))
+        totals = _add_up(map(_run_chunk, tasks))
+    else:
+        with ProcessPoolExecutor(
+            workers, initializer=_init_worker, initargs=(cohort_of, len(labels))
+        ) as pool:
+            totals = _add_up(pool.map(_run_chunk, tasks))
+
+    computed_at = datetime.utcnow()
+    db.query(CohortStat).filter(CohortStat.metric.in_(METRICS)).delete(
+        synchronize_session=False
+    )
+    written = 0
+    for metric, (_, _, stats_of) in METRICS.items():
+        sums = totals.get(metric)
+        if sums is None:  # nothing played yet
+            continue
+        cohorts = [("all", int(sizes.sum()), sums.sum(axis=1))] + [
+            (label, int(sizes[i]), sums[:, i]) for i, label in enumerate(labels)
+        ]
+        for cohort, users, cohort_sums in cohorts:
+            db.add(
+                CohortStat(
+                    metric=metric,
+                    cohort=cohort,
+                    users=users,
+                    stats=stats_of(cohort_sums),
+                    computed_at=computed_at,
+                )
+            )
+            written += 1
+    db.commit()
+    return written
+
+
+def _add_up(results):
+    totals = {}
+    for metric, sums in results:
+        totals[metric] = sums if metric not in totals else totals[metric] + sums
+    return totals
+
+
+def main():
+    from models import user  # noqa: F401  (relationships resolve)
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_parser = commands.add_parser("run", help="recompute every cohort metric")
+    run_parser.add_argument("--workers", type=int, default=settings.COHORT_WORKERS)
+    run_parser.add_argument(
+        "--chunk-rows", type=int, default=settings.COHORT_CHUNK_ROWS
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    start = time.perf_counter()
+    with SessionLocal() as db:
+        written = run(db, args.workers, args.chunk_rows)
+    print(f"wrote {written} cohort rows in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+from sqlalchemy.orm import Session
+
+import archival
+from game_cache import ActiveGame
+from models.game_round import GameRound
+
+
+def append_round(game: ActiveGame, round_number: int, entry: dict):
+    """Queue a game_rounds row; it is written when the game is saved."""
+    game.add(GameRound(game_id=game.id, round_number=round_number, entry=entry))
+
+
+def take_legacy_log(game: ActiveGame, state: dict):
+    """Move a pre-round-table ``state["log"]`` into game_rounds.
+
+    Returns the moved entries so callers can rebuild any running totals the
+    state header doesn't have yet.
+    """
+    log = state.pop("log", None) or []
+    for i, entry in enumerate(log):
+        append_round(game, entry.get("round", i + 1), entry)
+    return log
+
+
+def get_round_log(db: Session, game_id: int, state: dict | None = None):
+    """All round entries for a game, oldest first."""
+    if (state or {}).get("archived"):
+        archive = archival.load_archives(db, [game_id]).get(game_id)
+        return archive["rounds"] if archive else []
+    rows = (
+        db.query(GameRound.entry)
+        .filter(GameRound.game_id == game_id)
+        .order_by(GameRound.id)
+        .all()
+    )
+    return list((state or {}).get("log", [])) + [row.entry for row in rows]
+
+
+def get_round_logs(db: Session, games):
+    """Round entries for several games in one query, keyed by game id."""
+    logs, archived = {}, set()
+    for game in games:
+        state = game.state or {}
+        if state.get("archived"):
+            archived.add(game.id)
+        logs[game.id] = list(state.get("log", []))
+    if archived:
+        for game_id, archive in archival.load_archives(db, archived).items():
+            logs[game_id] = archive["rounds"]
+    live = [game_id for game_id in logs if game_id not in archived]
+    if not live:
+        return logs
+    rows = (
+        db.query(GameRound.game_id, GameRound.entry)
+        .filter(GameRound.game_id.in_(live))
+        .order_by(GameRound.game_id, GameRound.id)
+        .all()
+    )
+    for row in rows:
+        logs[row.game_id].append(row.entry)
+    return logs
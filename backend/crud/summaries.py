@@ -0,0 +1,44 @@
+from sqlalchemy.orm import Session
+
+from game_cache import ActiveGame
+from leaderboards import leaderboards
+from models.game_summary import GameSummary
+from percentiles import percentiles
+
+
+def record_summary(db: Session, game: ActiveGame, stats: dict, winner=None):
+    """Store a finished game's stats; they can't change after this."""
+    avg_response_time = stats.get(
+        "average_response_time_sec", stats.get("avg_response_time_sec")
+    )
+    duration = (
+        (game.end_time - game.start_time).total_seconds()
+        if game.end_time and game.start_time
+        else None
+    )
+    db.merge(
+        GameSummary(
+            game_id=game.id,
+            user_id=game.user_id,
+            game_type=game.game_type,
+            score=game.score,
+            rounds=stats.get("total_rounds", 0),
+            accuracy_percent=stats.get("accuracy_percent"),
+            avg_response_time=avg_response_time,
+            winner=winner,
+            duration_sec=duration,
+            completed_at=game.end_time,
+            stats=stats,
+        )
+    )
+    improved = leaderboards.record(db, game)
+    db.commit()
+    leaderboards.offer(improved)
+    percentiles.observe(
+        game.game_type, score=game.score, response_time=avg_response_time
+    )
+
+
+def get_summary(db: Session, game_id: int):
+    """The finished game's summary row, or None while it is still running."""
+    return db.get(GameSummary, game_id)
@@ -0,0 +1,17 @@
+from sqlalchemy.orm import Session
+
+from models import user as user_model
+
+
+def get_user_by_email(db: Session, email: str):
+    return db.query(user_model.User).filter(user_model.User.email == email).first()
+
+
+def create_user(db: Session, username: str, email: str, hashed_password: str):
+    new_user = user_model.User(
+        username=username, email=email, hashed_password=hashed_password
+    )
+    db.add(new_user)
+    db.commit()
+    db.refresh(new_user)
+    return new_user
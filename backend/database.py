@@ -1,14 +1,266 @@
-from sqlalchemy import create_engine
+import ast
+import logging
+import os
+import threading
+import time
+
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
+from starlette.concurrency import run_in_threadpool
 from config import settings
+from monitoring.pool import instrumented_pool_class
 
 DATABASE_URL = settings.DATABASE_URL    
 
-engine = create_engine(DATABASE_URL)
+logger = logging.getLogger(__name__)
+
+
+def engine_options(name: str, url: str, is_async: bool = False):
+    """Pool configuration shared by every engine the app creates."""
+    parsed = make_url(url)
+    # In-memory SQLite needs its single shared connection, not a queue pool
+    in_memory = parsed.database in (None, "", ":memory:")
+    if parsed.get_backend_name() == "sqlite" and in_memory:
+        return {}
+    return {
+        "poolclass": instrumented_pool_class(name, is_async=is_async),
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+    }
+
+
+engine = create_engine(DATABASE_URL, **engine_options("primary", DATABASE_URL))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def to_async_url(url: str):
+    scheme, sep, rest = url.partition("://")
+    return f"{ASYNC_DRIVERS.get(scheme, scheme)}{sep}{rest}"
+
+
+def get_async_database_url():
+    if settings.ASYNC_DATABASE_URL:
+        return settings.ASYNC_DATABASE_URL
+    return to_async_url(DATABASE_URL)
+
+
+# The async engine is only built when enabled so the async driver stays an
+# optional dependency for deployments that run the sync routes.
+async_engine = None
+AsyncSessionLocal = None
+if settings.USE_ASYNC_DB:
+    ASYNC_DATABASE_URL = get_async_database_url()
+    async_engine = create_async_engine(
+        ASYNC_DATABASE_URL,
+        **engine_options("async", ASYNC_DATABASE_URL, is_async=True),
+    )
+    AsyncSessionLocal = async_sessionmaker(
+        bind=async_engine, class_=AsyncSession, autoflush=False
+    )
+
+# Optional read replica for analytics GETs. It gets its own pool, so long
+# profile/stats scans don't hold connections that game submits are waiting for.
+read_engine = None
+ReadSessionLocal = None
+async_read_engine = None
+AsyncReadSessionLocal = None
+if settings.READ_DATABASE_URL:
+    read_engine = create_engine(
+        settings.READ_DATABASE_URL,
+        **engine_options("replica", settings.READ_DATABASE_URL),
+    )
+    ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+    if settings.USE_ASYNC_DB:
+        ASYNC_READ_DATABASE_URL = to_async_url(settings.READ_DATABASE_URL)
+        async_read_engine = create_async_engine(
+            ASYNC_READ_DATABASE_URL,
+            **engine_options("async_replica", ASYNC_READ_DATABASE_URL, is_async=True),
+        )
+        AsyncReadSessionLocal = async_sessionmaker(
+            bind=async_read_engine, class_=AsyncSession, autoflush=False
+        )
+
+# Seconds the replica is behind the primary; 0 when it has replayed
+# everything it has received (an idle primary otherwise looks "behind").
+PG_REPLICA_LAG_SQL = """
+SELECT CASE
+    WHEN NOT pg_is_in_recovery() THEN 0
+    WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+    ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+END
+"""
+
+_replica_health = {"checked_at": 0.0, "healthy": False, "lag": None, "error": None}
+_replica_health_lock = threading.Lock()
+
+
+def check_replica():
+    """Probe the replica and record whether reads may be routed to it."""
+    try:
+        with read_engine.connect() as conn:
+            if read_engine.dialect.name == "postgresql":
+                lag = float(conn.execute(text(PG_REPLICA_LAG_SQL)).scalar() or 0)
+            else:
+                conn.execute(text("SELECT 1"))
+                lag = 0.0
+        healthy, error = lag <= settings.READ_REPLICA_MAX_LAG_SECONDS, None
+    except Exception as exc:
+        healthy, lag, error = False, None, repr(exc)
+        logger.warning("Read replica unavailable, using primary: %s", error)
+    _replica_health.update(
+        checked_at=time.monotonic(), healthy=healthy, lag=lag, error=error
+    )
+    return healthy
+
+
+def replica_available():
+    """Cached replica health; re-probed at most every check interval."""
+    if read_engine is None:
+        return False
+    age = time.monotonic() - _replica_health["checked_at"]
+    if age < settings.READ_REPLICA_CHECK_INTERVAL:
+        return _replica_health["healthy"]
+    # One request re-probes; the rest use the previous result meanwhile
+    if not _replica_health_lock.acquire(blocking=False):
+        return _replica_health["healthy"]
+    try:
+        return check_replica()
+    finally:
+        _replica_health_lock.release()
+
+
+def replica_status():
+    if read_engine is None:
+        return {"configured": False}
+    return {"configured": True, **_replica_health}
+
+
+def get_db():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def dialect_insert(db, model):
+    """INSERT for `model` with the dialect's ON CONFLICT support."""
+    if db.get_bind().dialect.name == "postgresql":
+        return postgresql.insert(model)
+    return sqlite.insert(model)
+
+
+def read_session():
+    """Session for read-only analytics: the replica when healthy, else primary."""
+    return ReadSessionLocal() if replica_available() else SessionLocal()
+
+
+def get_read_db():
+    db = read_session()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def async_read_session():
+    """Async counterpart of read_session."""
+    use_replica = AsyncReadSessionLocal is not None and await run_in_threadpool(
+        replica_available
+    )
+    return (AsyncReadSessionLocal if use_replica else AsyncSessionLocal)()
+
+
+async def get_async_read_db():
+    async with await async_read_session() as db:
+        yield db
+
+
+def pool_status():
+    """Checkout counters and current occupancy for each engine's pool."""
+    engines = {
+        "primary": engine,
+        "async": async_engine and async_engine.sync_engine,
+        "replica": read_engine,
+        "async_replica": async_read_engine and async_read_engine.sync_engine,
+    }
+    status = {}
+    for name, eng in engines.items():
+        if eng is None:
+            continue
+        stats = getattr(eng.pool, "stats", None)
+        status[name] = stats.snapshot(eng.pool) if stats else {"instrumented": False}
+    return status
+
+
+MIGRATIONS_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "alembic", "versions"
+)
+
+
+def alembic_heads():
+    """Head revision ids of the migration scripts.
+
+    Read straight from the version files: importing alembic costs more than
+    the create_all this check is meant to save.
+    """
+    revisions, parents = set(), set()
+    for filename in os.listdir(MIGRATIONS_DIR):
+        if not filename.endswith(".py"):
+            continue
+        with open(os.path.join(MIGRATIONS_DIR, filename), encoding="utf-8") as f:
+            tree = ast.parse(f.read())
+        for node in tree.body:
+            if isinstance(node, ast.AnnAssign):
+                target, value = node.target, node.value
+            elif isinstance(node, ast.Assign) and len(node.targets) == 1:
+                target, value = node.targets[0], node.value
+            else:
+                continue
+            if not isinstance(target, ast.Name) or value is None:
+                continue
+            if target.id == "revision":
+                revisions.add(ast.literal_eval(value))
+            elif target.id == "down_revision":
+                down = ast.literal_eval(value)
+                parents.update(down if isinstance(down, (list, tuple)) else [down])
+    return revisions - parents
+
+
+def schema_is_current():
+    """True when the database is stamped at the latest Alembic revision."""
+    heads = alembic_heads()
+    if not heads or "alembic_version" not in inspect(engine).get_table_names():
+        return False
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT version_num FROM alembic_version"))
+        current = {row[0] for row in rows}
+    return current == heads
+
+
 def create_db_and_tables():
+    # A migrated database already has every table, so skip the per-table
+    # inspection create_all would otherwise run on each worker boot.
+    if schema_is_current():
+        return
     from models import user, game
     Base.metadata.create_all(bind=engine)
@@ -0,0 +1,405 @@
+"""In-process cache of games that are being played round by round.
+
+The pattern, dual n-back, stroop and chunk submit routes load a game's
+header (score, state, end time) through ``game_cache.load`` and persist it
+with ``game_cache.save``. Depending on ``ACTIVE_GAME_CACHE``:
+
+  off            every submit SELECTs the games row and writes it back
+  write_through  state is served from memory, every round is still written
+  write_behind   writes are batched too: a game is flushed every
+                 ACTIVE_GAME_FLUSH_EVERY rounds, when it ends, when it is
+                 evicted (LRU or idle) and at shutdown
+
+The cache lives in one process, so with several workers a game's submits
+must be routed to the same worker (sticky sessions) for it to be correct.
+Anything that reads a cached game's rows from the database (stats, profiles,
+progress, export) flushes it first; see get_game_read_db/get_user_read_db.
+
+A write that fails drops the game from the cache together with its unsaved
+rounds, and the error reaches the request. The game then resumes from what
+the database holds, so a retried submit is scored as the same round; under
+write_behind that can be a few acknowledged rounds back, as after a crash.
+"""
+import asyncio
+import copy
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from fastapi import Depends, Query
+from sqlalchemy import update
+from sqlalchemy.util.concurrency import await_only, in_greenlet
+
+from config import settings
+from database import AsyncSessionLocal, SessionLocal, async_read_session, get_read_db
+from models.game import Game
+from models.user import User
+from round_writer import commit_with_rows
+from routes.auth import get_current_user
+
+logger = logging.getLogger(__name__)
+
+MODES = ("off", "write_through", "write_behind")
+
+
+class ActiveGame:
+    """Header fields of a games row plus rows queued by the current request."""
+
+    __slots__ = (
+        "id",
+        "user_id",
+        "game_type",
+        "score",
+        "state",
+        "start_time",
+        "end_time",
+        "new_rows",
+    )
+
+    def __init__(self, id, user_id, game_type, score, state, start_time, end_time):
+        self.id = id
+        self.user_id = user_id
+        self.game_type = game_type
+        self.score = score
+        self.state = state
+        self.start_time = start_time
+        self.end_time = end_time
+        self.new_rows = []
+
+    def add(self, row):
+        """Queue an ORM row (round log, PatternRound, ...) to write with the game.
+
+        A callable is queued the same way and called with the session that
+        writes the game, in the same transaction.
+        """
+        self.new_rows.append(row)
+
+    def copy(self):
+        # The state dict is mutated in place by the submit routes
+        return ActiveGame(
+            self.id,
+            self.user_id,
+            self.game_type,
+            self.score,
+            copy.deepcopy(self.state),
+            self.start_time,
+            self.end_time,
+        )
+
+
+class _Entry:
+    __slots__ = (
+        "game",
+        "pending",
+        "rounds",
+        "last_used",
+        "flushing",
+        "idle",
+        "closed",
+        "failed",
+    )
+
+    def __init__(self, game: ActiveGame):
+        self.game = game
+        self.pending = []
+        self.rounds = 0  # rounds saved since the last flush
+        self.last_used = time.monotonic()
+        self.flushing = False
+        self.idle = threading.Event()  # set while no request is flushing it
+        self.idle.set()
+        self.closed = False  # finished or evicted: must be drained
+        self.failed = False  # a write failed and its rounds were dropped
+
+    def take(self):
+        """Hand over the unflushed header and rows, leaving the entry clean."""
+        taken = (self.game.copy(), self.pending)
+        self.pending = []
+        self.rounds = 0
+        return taken
+
+
+class ActiveGameCache:
+    def __init__(self, mode: str, max_size: int, idle_seconds: float, flush_every: int):
+        if mode not in MODES:
+            raise ValueError(f"ACTIVE_GAME_CACHE must be one of {', '.join(MODES)}")
+        self.mode = mode
+        self.max_size = max_size
+        self.idle_seconds = idle_seconds
+        self.flush_every = max(1, flush_every)
+        self.hits = 0
+        self.misses = 0
+        self.flushes = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def load(self, db, game_id: int):
+        """The game's current header, from memory when cached."""
+        if self.mode != "off":
+            with self._lock:
+                entry = self._entries.get(game_id)
+                if entry is not None:
+                    self.hits += 1
+                    entry.last_used = time.monotonic()
+                    self._entries.move_to_end(game_id)
+                    return entry.game.copy()
+                self.misses += 1
+
+        row = (
+            db.query(
+                Game.id,
+                Game.user_id,
+                Game.game_type,
+                Game.score,
+                Game.state,
+                Game.start_time,
+                Game.end_time,
+            )
+            .filter(Game.id == game_id)
+            .first()
+        )
+        return ActiveGame(*row) if row else None
+
+    def save(self, db, game: ActiveGame):
+        """Record one submitted round; writes to the database when due.
+
+        Once a game has ended, every round of it is in the database when this
+        returns, so its summary can be built from there.
+        """
+        rows, game.new_rows = game.new_rows, []
+        if self.mode == "off":
+            self._write(db, game, rows)
+            return
+
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(game.id)
+            if entry is None:
+                entry = self._entries[game.id] = _Entry(game.copy())
+            else:
+                entry.game = game.copy()
+            entry.pending.extend(rows)
+            entry.rounds += 1
+            entry.last_used = now
+            self._entries.move_to_end(game.id)
+            if game.end_time is not None:
+                # No more rounds are coming, so don't hold it in memory
+                entry.closed = True
+                del self._entries[game.id]
+            evicted = self._evict_locked(now)
+            due = self._due(entry)
+
+        if due:
+            self._flush(db, entry)
+        if game.end_time is not None:
+            self._drain(db, entry)
+        for other in evicted:
+            # This request's round is saved; another game's failure is not its
+            try:
+                self._flush(db, other)
+            except Exception:
+                logger.exception("Failed to flush evicted game %s", other.game.id)
+
+    def dirty(self, game_id: int):
+        """Whether the game has rounds that are not in the database yet."""
+        with self._lock:
+            entry = self._entries.get(game_id)
+            return entry is not None and _unsaved(entry)
+
+    def dirty_user(self, user_id: int):
+        with self._lock:
+            return any(
+                entry.game.user_id == user_id and _unsaved(entry)
+                for entry in self._entries.values()
+            )
+
+    def flush_game(self, db, game_id: int):
+        """Persist a game's buffered rounds, e.g. before reading it from the DB."""
+        with self._lock:
+            entry = self._entries.get(game_id)
+        if entry is not None:
+            self._drain(db, entry)
+
+    def flush_user(self, db, user_id: int):
+        """flush_game for every cached game of the user."""
+        with self._lock:
+            entries = [
+                entry
+                for entry in self._entries.values()
+                if entry.game.user_id == user_id
+            ]
+        for entry in entries:
+            self._drain(db, entry)
+
+    def flush_all(self):
+        """Persist every buffered game (called at shutdown)."""
+        with self._lock:
+            dirty = [entry for entry in self._entries.values() if entry.rounds]
+        if not dirty:
+            return
+        with SessionLocal() as db:
+            for entry in dirty:
+                try:
+                    self._flush(db, entry)
+                except Exception:
+                    logger.exception("Failed to flush game %s", entry.game.id)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "mode": self.mode,
+                "size": len(self._entries),
+                "dirty": sum(1 for entry in self._entries.values() if entry.rounds),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "flushes": self.flushes,
+                "evictions": self.evictions,
+            }
+
+    def _due(self, entry: _Entry):
+        return bool(entry.rounds) and (
+            entry.closed
+            or self.mode == "write_through"
+            or entry.rounds >= self.flush_every
+        )
+
+    def _evict_locked(self, now: float):
+        evicted = []
+        while self._entries:
+            game_id, entry = next(iter(self._entries.items()))
+            idle = now - entry.last_used >= self.idle_seconds
+            if len(self._entries) <= self.max_size and not idle:
+                break
+            del self._entries[game_id]
+            entry.closed = True
+            self.evictions += 1
+            if entry.rounds:
+                evicted.append(entry)
+        return evicted
+
+    def _flush(self, db, entry: _Entry):
+        # One request writes a given game at a time so its flushes reach the
+        # database in order; rounds saved meanwhile are drained by that
+        # request instead of waiting (blocking here could stall the event
+        # loop when the async routes are enabled). Only a game's last round
+        # waits for it, in _drain.
+        while True:
+            with self._lock:
+                if entry.flushing or not entry.rounds:
+                    return
+                entry.flushing = True
+                entry.idle.clear()
+                header, rows = entry.take()
+            try:
+                self._write(db, header, rows)
+            except Exception:
+                with self._lock:
+                    # Forget the game rather than retry its rows: the next
+                    # request reloads it from the database as it was
+                    entry.flushing = False
+                    entry.failed = True
+                    entry.pending = []
+                    entry.rounds = 0
+                    entry.idle.set()
+                    if self._entries.get(header.id) is entry:
+                        del self._entries[header.id]
+                raise
+            with self._lock:
+                entry.flushing = False
+                entry.idle.set()
+                if not self._due(entry):
+                    return
+
+    def _drain(self, db, entry: _Entry):
+        """Return once the entry has nothing unwritten, in flight or not."""
+        while True:
+            with self._lock:
+                if entry.failed:
+                    raise RuntimeError(f"Game {entry.game.id} could not be saved")
+                if not entry.flushing and not entry.rounds:
+                    return
+                flushing = entry.flushing
+            if not flushing:
+                self._flush(db, entry)
+            elif in_greenlet():
+                # Inside AsyncSession.run_sync the flushing request may be
+                # another coroutine on this loop: wait without blocking it
+                await_only(asyncio.to_thread(entry.idle.wait))
+            else:
+                entry.idle.wait()
+
+    def _write(self, db, header: ActiveGame, rows):
+        try:
+            commit_with_rows(
+                db,
+                rows,
+                update(Game)
+                .where(Game.id == header.id)
+                .values(
+                    score=header.score, state=header.state, end_time=header.end_time
+                ),
+            )
+        except Exception:
+            db.rollback()
+            raise
+        self.flushes += 1
+
+
+def _unsaved(entry: _Entry):
+    return bool(entry.rounds) or entry.flushing
+
+
+def get_game_read_db(game_id: int = Query(...)):
+    """get_read_db for one game's stats, or the primary while it has unsaved rounds.
+
+    Those rounds are flushed to the primary and read back from it: a replica
+    may not have replayed them yet.
+    """
+    if not game_cache.dirty(game_id):
+        yield from get_read_db()
+        return
+    db = SessionLocal()
+    try:
+        game_cache.flush_game(db, game_id)
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_game_read_db(game_id: int = Query(...)):
+    if not game_cache.dirty(game_id):
+        async with await async_read_session() as db:
+            yield db
+        return
+    async with AsyncSessionLocal() as db:
+        await db.run_sync(game_cache.flush_game, game_id)
+        yield db
+
+
+def get_user_read_db(current_user: User = Depends(get_current_user)):
+    """get_read_db for a user's analytics; see get_game_read_db."""
+    if not game_cache.dirty_user(current_user.id):
+        yield from get_read_db()
+        return
+    db = SessionLocal()
+    try:
+        game_cache.flush_user(db, current_user.id)
+        yield db
+    finally:
+        db.close()
+
+
+game_cache = ActiveGameCache(
+    mode=settings.ACTIVE_GAME_CACHE,
+    max_size=settings.ACTIVE_GAME_CACHE_MAX_SIZE,
+    idle_seconds=settings.ACTIVE_GAME_IDLE_SECONDS,
+    flush_every=settings.ACTIVE_GAME_FLUSH_EVERY,
+)
@@ -0,0 +1,297 @@
+"""Global, daily and weekly leaderboards of finished games.
+
+Every finished game (pattern, dual n-back) updates its player's entry on
+three boards, the all-time one, its UTC day's and its week's (weeks start
+on Monday), in the same transaction as its game_summaries row. An entry
+holds the player's best score on that board, so a board has one row per
+player and a player's rank is a count over the board's score index rather
+than a scan of the games.
+
+Each worker keeps the top LEADERBOARD_TOP_K entries of the boards it
+serves in memory, updates them as its own games end and re-reads them
+every LEADERBOARD_REFRESH_SECONDS to pick up the other workers' games.
+Pages past the top K are read from the table.
+
+Boards are filled from the games finished before they existed with:
+
+  python leaderboards.py rebuild
+
+and past daily/weekly boards can be dropped with:
+
+  python leaderboards.py prune --keep-days 35
+"""
+import argparse
+import bisect
+import logging
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from config import settings
+from database import SessionLocal, dialect_insert
+from models.game_summary import GameSummary
+from models.leaderboard_entry import LeaderboardEntry
+
+logger = logging.getLogger(__name__)
+
+PERIODS = ("all", "daily", "weekly")
+ALL_TIME = date(1970, 1, 1)
+
+
+def period_start(period: str, when: datetime) -> date:
+    if period == "daily":
+        return when.date()
+    if period == "weekly":
+        return when.date() - timedelta(days=when.weekday())
+    return ALL_TIME
+
+
+def _boards(game_type: str, when: datetime):
+    return [(game_type, period, period_start(period, when)) for period in PERIODS]
+
+
+def _board_filter(board):
+    game_type, period, start = board
+    return (
+        LeaderboardEntry.game_type == game_type,
+        LeaderboardEntry.period == period,
+        LeaderboardEntry.period_start == start,
+    )
+
+
+def _sort_key(entry: LeaderboardEntry):
+    # Best score first; on a tie whoever got there first
+    return (-entry.score, entry.achieved_at, entry.user_id)
+
+
+def _detached(entry: LeaderboardEntry):
+    return LeaderboardEntry(
+        game_type=entry.game_type,
+        period=entry.period,
+        period_start=entry.period_start,
+        user_id=entry.user_id,
+        score=entry.score,
+        game_id=entry.game_id,
+        achieved_at=entry.achieved_at,
+    )
+
+
+class Leaderboards:
+    def __init__(self, top_k: int, refresh_seconds: float):
+        self.top_k = max(1, top_k)
+        self.refresh_seconds = refresh_seconds
+        self._tops = {}  # board -> (loaded_at, entries sorted by _sort_key)
+        self._lock = threading.Lock()
+
+    def record(self, db: Session, game):
+        """Offer a finished game to its boards; committed by the caller.
+
+        Returns the entries it improved, for ``offer`` once the transaction
+        has committed.
+        """
+        if game.score is None or game.end_time is None:
+            return []
+        improved = []
+        for game_type, period, start in _boards(game.game_type, game.end_time):
+            # One statement, so two games of a player finishing at once can't
+            # both insert; the update only applies to a better score
+            values = {
+                "game_type": game_type,
+                "period": period,
+                "period_start": start,
+                "user_id": game.user_id,
+                "score": game.score,
+                "game_id": game.id,
+                "achieved_at": game.end_time,
+            }
+            insert = dialect_insert(db, LeaderboardEntry).values(**values)
+            upsert = insert.on_conflict_do_update(
+                index_elements=["game_type", "period", "period_start", "user_id"],
+                set_={
+                    "score": insert.excluded.score,
+                    "game_id": insert.excluded.game_id,
+                    "achieved_at": insert.excluded.achieved_at,
+                },
+                where=LeaderboardEntry.score < insert.excluded.score,
+            ).returning(LeaderboardEntry.user_id)
+            if db.execute(upsert).first() is not None:
+                improved.append(LeaderboardEntry(**values))
+        return improved
+
+    def offer(self, entries):
+        """Fold committed improvements into the loaded tops."""
+        with self._lock:
+            for entry in entries:
+                board = (entry.game_type, entry.period, entry.period_start)
+                if board not in self._tops:
+                    continue
+                loaded_at, top = self._tops[board]
+                top = [other for other in top if other.user_id != entry.user_id]
+                bisect.insort(top, entry, key=_sort_key)
+                self._tops[board] = (loaded_at, top[: self.top_k])
+
+    def page(self, db: Session, board, offset: int, limit: int):
+        """Entries `offset` .. `offset + limit` of a board, best first."""
+        if offset + limit <= self.top_k:
+            return self._top(db, board)[offset : offset + limit]
+        return (
+            db.query(LeaderboardEntry)
+            .filter(*_board_filter(board))
+            .order_by(*self._order())
+            .offset(offset)
+            .limit(limit)
+            .all()
+        )
+
+    def rank(self, db: Session, board, score: int) -> int:
+        """1 + entries with a better score (ties share a rank)."""
+        top = self._top(db, board)
+        # Everyone better than the K-th entry's score is in the top
+        if len(top) < self.top_k or top[-1].score <= score:
+            return 1 + sum(1 for entry in top if entry.score > score)
+        better = (
+            db.query(func.count())
+            .select_from(LeaderboardEntry)
+            .filter(*_board_filter(board), LeaderboardEntry.score > score)
+            .scalar()
+        )
+        return 1 + better
+
+    def players(self, db: Session, board) -> int:
+        top = self._top(db, board)
+        if len(top) < self.top_k:
+            return len(top)
+        return (
+            db.query(func.count())
+            .select_from(LeaderboardEntry)
+            .filter(*_board_filter(board))
+            .scalar()
+        )
+
+    def clear(self):
+        with self._lock:
+            self._tops = {}
+
+    def stats(self):
+        with self._lock:
+            return {
+                "boards": len(self._tops),
+                "entries": sum(len(top) for _, top in self._tops.values()),
+            }
+
+    def _top(self, db: Session, board):
+        with self._lock:
+            cached = self._tops.get(board)
+        if cached and time.monotonic() - cached[0] < self.refresh_seconds:
+            return cached[1]
+        top = [
+            _detached(entry)
+            for entry in db.query(LeaderboardEntry)
+            .filter(*_board_filter(board))
+            .order_by(*self._order())
+            .limit(self.top_k)
+        ]
+        with self._lock:
+            self._tops[board] = (time.monotonic(), top)
+        return top
+
+    @staticmethod
+    def _order():
+        return (
+            LeaderboardEntry.score.desc(),
+            LeaderboardEntry.achieved_at,
+            LeaderboardEntry.user_id,
+        )
+
+
+def rebuild(db: Session, batch_size: int = 5000):
+    """Recompute every board from game_summaries; returns entries written."""
+    best = {}  # (board, user_id) -> (-score, achieved_at, game_id)
+    rows = (
+        db.query(
+            GameSummary.game_id,
+            GameSummary.user_id,
+            GameSummary.game_type,
+            GameSummary.score,
+            GameSummary.completed_at,
+        )
+        .filter(GameSummary.score != None, GameSummary.completed_at != None)
+        .yield_per(batch_size)
+    )
+    for row in rows:
+        for board in _boards(row.game_type, row.completed_at):
+            key = (board, row.user_id)
+            candidate = (-row.score, row.completed_at, row.game_id)
+            if key not in best or candidate < best[key]:
+                best[key] = candidate
+
+    db.query(LeaderboardEntry).delete(synchronize_session=False)
+    db.bulk_insert_mappings(
+        LeaderboardEntry,
+        [
+            {
+                "game_type": game_type,
+                "period": period,
+                "period_start": start,
+                "user_id": user_id,
+                "score": -negated_score,
+                "achieved_at": achieved_at,
+                "game_id": game_id,
+            }
+            for ((game_type, period, start), user_id), (
+                negated_score,
+                achieved_at,
+                game_id,
+            ) in best.items()
+        ],
+    )
+    db.commit()
+    return len(best)
+
+
+def prune(db: Session, keep_days: int):
+    """Drop daily/weekly boards that ended more than `keep_days` ago."""
+    cutoff = datetime.utcnow().date() - timedelta(days=keep_days)
+    removed = 0
+    for period, length in (("daily", 1), ("weekly", 7)):
+        removed += (
+            db.query(LeaderboardEntry)
+            .filter(
+                LeaderboardEntry.period == period,
+                LeaderboardEntry.period_start <= cutoff - timedelta(days=length),
+            )
+            .delete(synchronize_session=False)
+        )
+    db.commit()
+    return removed
+
+
+leaderboards = Leaderboards(
+    top_k=settings.LEADERBOARD_TOP_K,
+    refresh_seconds=settings.LEADERBOARD_REFRESH_SECONDS,
+)
+
+
+def main():
+    from models import game, user  # noqa: F401  (relationships resolve)
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("rebuild", help="recompute every board from game_summaries")
+    prune_parser = commands.add_parser("prune", help="drop past daily/weekly boards")
+    prune_parser.add_argument("--keep-days", type=int, default=35)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    with SessionLocal() as db:
+        if args.command == "rebuild":
+            print(f"wrote {rebuild(db)} leaderboard entries")
+        else:
+            print(f"removed {prune(db, args.keep_days)} leaderboard entries")
+
+
+if __name__ == "__main__":
+    main()
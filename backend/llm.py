@@ -0,0 +1,14 @@
+from functools import lru_cache
+import os
+
+
+@lru_cache(maxsize=None)
+def get_openai_client():
+    """Shared OpenAI client, built on first use.
+
+    The SDK is imported here rather than at module level so that booting a
+    worker doesn't pay for it until a feedback/profile route actually runs.
+    """
+    from openai import OpenAI
+
+    return OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
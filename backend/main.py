@@ -1,8 +1,22 @@
 from fastapi import FastAPI
 from contextlib import asynccontextmanager
 from fastapi.openapi.utils import get_openapi
-from routes import auth, game, pattern, binary, chunk, stroop, dual, pattern_analysis
-from database import create_db_and_tables
+from fastapi.responses import PlainTextResponse
+from routes import admin, auth, game, pattern, binary, chunk, stroop, dual, pattern_analysis, progress, rank, leaderboard, export, cohorts
+from config import settings
+from database import (
+    async_engine,
+    async_read_engine,
+    create_db_and_tables,
+    engine,
+    read_engine,
+)
+from auth.hash import shutdown_executor
+from game_cache import game_cache
+from percentiles import percentiles
+from round_writer import round_writer
+from monitoring import metrics, queries
+from monitoring.middleware import observe_request
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -10,6 +24,10 @@ load_dotenv()
 async def lifespan(app: FastAPI):
     create_db_and_tables()
     yield
+    game_cache.flush_all()
+    percentiles.close()
+    round_writer.close()
+    shutdown_executor()
 
 load_dotenv()
 app = FastAPI(
@@ -19,6 +37,16 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Request instrumentation: Prometheus metrics and/or per-request SQL stats
+if settings.METRICS_ENABLED or settings.SQL_QUERY_STATS:
+    for eng in (engine, read_engine):
+        if eng is not None:
+            queries.install(eng)
+    for eng in (async_engine, async_read_engine):
+        if eng is not None:
+            queries.install(eng.sync_engine)
+    app.middleware("http")(observe_request)
+
 # Include routes
 app.include_router(auth.router, prefix="/auth", tags=["Auth"])
 app.include_router(game.router, prefix="/game", tags=["Game"])
@@ -28,12 +56,27 @@ app.include_router(chunk.router)
 app.include_router(stroop.router)
 app.include_router(dual.router, prefix="/dual", tags=["Dual N-Back"])
 app.include_router(pattern_analysis.router)
+app.include_router(progress.router)
+app.include_router(rank.router)
+app.include_router(leaderboard.router)
+app.include_router(export.router)
+app.include_router(cohorts.router)
+app.include_router(admin.router, prefix="/admin", tags=["Admin"])
 
 # Root route
 @app.get("/")
 def root():
     return {"message": "BrainBrew backend is running"}
 
+# Prometheus scrape endpoint
+if settings.METRICS_ENABLED:
+
+    @app.get("/metrics", include_in_schema=False)
+    def prometheus_metrics():
+        return PlainTextResponse(
+            metrics.registry.render(), media_type="text/plain; version=0.0.4"
+        )
+
 def custom_openapi():
     if app.openapi_schema:
         return app.openapi_schema
@@ -2,3 +2,10 @@ from .binary import *
 from .chunk import *
 from .stroop import *
 from .dual import *
+from .game_round import *
+from .game_archive import *
+from .game_summary import *
+from .user_game_aggregate import *
+from .percentile_sketch import *
+from .leaderboard_entry import *
+from .cohort_stat import *
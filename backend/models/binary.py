@@ -1,6 +1,6 @@
 # models/binary.py
 
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from database import Base
 from datetime import datetime
@@ -25,6 +25,7 @@ class BinaryRound(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     game_id = Column(Integer, ForeignKey("binary_games.id"))
+    user_id = Column(Integer, nullable=False)  # game's owner; partition key
     turn = Column(Integer)  # 1, 2, 3, ...
     guesser = Column(String)  # "user" or "ai"
     guess = Column(Integer)
@@ -33,3 +34,13 @@ class BinaryRound(Base):
     timestamp = Column(DateTime, default=datetime.utcnow)
 
     game = relationship("BinaryGame", back_populates="rounds")
+
+    __table_args__ = (
+        # make_guess replays the turns to narrow the AI's range on every guess
+        Index(
+            "ix_binary_rounds_game_id_turn",
+            "game_id",
+            "turn",
+            postgresql_include=["guesser", "guess", "feedback"],
+        ),
+    )
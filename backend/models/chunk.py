@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from database import Base
 from datetime import datetime
@@ -22,6 +22,7 @@ class ChunkRound(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     game_id = Column(Integer, ForeignKey("chunk_games.id"))
+    user_id = Column(Integer, nullable=False)  # game's owner; partition key
     round_number = Column(Integer)
     original_sequence = Column(String)  # e.g. "4 8 9 2"
     user_response = Column(String)      # e.g. "4 9 8 2"
@@ -30,3 +31,7 @@ class ChunkRound(Base):
     timestamp = Column(DateTime, default=datetime.utcnow)
 
     game = relationship("ChunkGame", back_populates="rounds")
+
+    __table_args__ = (
+        Index("ix_chunk_rounds_game_id_round_number", "game_id", "round_number"),
+    )
@@ -0,0 +1,16 @@
+from datetime import datetime
+
+from sqlalchemy import Column, Integer, String, DateTime, JSON
+from database import Base
+
+
+class CohortStat(Base):
+    """One metric for one cohort of players, written by cohorts.py."""
+
+    __tablename__ = "cohort_stats"
+
+    metric = Column(String, primary_key=True)  # see cohorts.METRICS
+    cohort = Column(String, primary_key=True)  # first-game month "YYYY-MM" or "all"
+    users = Column(Integer, nullable=False)
+    stats = Column(JSON, nullable=False)
+    computed_at = Column(DateTime, default=datetime.utcnow)
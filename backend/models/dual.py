@@ -1,6 +1,7 @@
-from sqlalchemy import Column, Integer, ForeignKey, Boolean, Float, String
+from sqlalchemy import Column, Integer, ForeignKey, Boolean, Float, String, Index, DateTime
 from sqlalchemy.orm import relationship
 from database import Base
+from datetime import datetime
 
 
 class DualGame(Base):
@@ -22,6 +23,7 @@ class DualRound(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     game_id = Column(Integer, ForeignKey("dual_games.id"))
+    user_id = Column(Integer, nullable=False)  # game's owner; partition key
     round_number = Column(Integer)
     visual_stimulus = Column(String)
     audio_stimulus = Column(String)
@@ -30,5 +32,10 @@ class DualRound(Base):
     correct_visual = Column(Boolean)
     correct_audio = Column(Boolean)
     response_time = Column(Float)
+    timestamp = Column(DateTime, default=datetime.utcnow)
 
     game = relationship("DualGame", back_populates="rounds")
+
+    __table_args__ = (
+        Index("ix_dual_rounds_game_id_round_number", "game_id", "round_number"),
+    )
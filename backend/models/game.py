@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, JSON, Boolean, Float
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, JSON, Boolean, Float, Index, text
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from database import Base
@@ -14,9 +15,25 @@ class Game(Base):
     start_time = Column(DateTime, default=datetime.utcnow)
     end_time = Column(DateTime, nullable=True)
     game_type = Column(String, default="memory")  # e.g., "reflex", "logic", "memory"
-    state = Column(JSON, nullable=True)  
+    # A JSON object (JSONB on Postgres), so SQL can read fields like winner
+    state = Column(JSON().with_variant(JSONB(), "postgresql"), nullable=True)
     pattern_rounds = relationship("PatternRound", back_populates="game", cascade="all, delete-orphan")
     user = relationship("User", back_populates="games")
+
+    __table_args__ = (
+        # progress / brain_profile: a user's finished games of one type by end time
+        Index(
+            "ix_games_user_id_game_type_end_time", "user_id", "game_type", "end_time"
+        ),
+        # games still in progress (a small slice of the table) by age, for
+        # finding abandoned ones; per-user lookups use the index above
+        Index(
+            "ix_games_unfinished",
+            "start_time",
+            postgresql_where=text("end_time IS NULL"),
+            sqlite_where=text("end_time IS NULL"),
+        ),
+    )
     
 # class PatternRound(Base):
 #     __tablename__ = "pattern_rounds"
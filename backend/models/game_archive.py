@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, LargeBinary
+from database import Base
+from datetime import datetime
+
+
+class GameArchive(Base):
+    """Compressed state and round log of a finished game (see archival.py)."""
+
+    __tablename__ = "game_archives"
+
+    game_id = Column(
+        Integer, ForeignKey("games.id", ondelete="CASCADE"), primary_key=True
+    )
+    codec = Column(String, nullable=False)  # "zstd" or "zlib"
+    payload = Column(LargeBinary, nullable=False)
+    raw_size = Column(Integer, nullable=False)  # bytes before compression
+    archived_at = Column(DateTime, default=datetime.utcnow)
@@ -0,0 +1,28 @@
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, JSON, Index, text
+from database import Base
+from datetime import datetime
+
+
+class GameRound(Base):
+    """One submitted round of a game. Rows are appended, never rewritten."""
+
+    __tablename__ = "game_rounds"
+
+    id = Column(Integer, primary_key=True)
+    game_id = Column(
+        Integer, ForeignKey("games.id", ondelete="CASCADE"), nullable=False
+    )
+    round_number = Column(Integer, nullable=False)
+    entry = Column(JSON, nullable=False)  # the round_log dict returned to the client
+    created_at = Column(DateTime, default=datetime.utcnow)  # month partition key
+
+    __table_args__ = (
+        Index("ix_game_rounds_game_id_id", "game_id", "id"),
+        # /progress counts a game's correct rounds from this index alone
+        Index(
+            "ix_game_rounds_correct",
+            "game_id",
+            postgresql_where=text("CAST(entry ->> 'correct' AS BOOLEAN)"),
+            sqlite_where=text("JSON_EXTRACT(entry, '$.\"correct\"')"),
+        ),
+    )
@@ -0,0 +1,31 @@
+from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey, JSON, Index
+from database import Base
+
+
+class GameSummary(Base):
+    """Stats of a finished game, written once when it ends."""
+
+    __tablename__ = "game_summaries"
+
+    game_id = Column(
+        Integer, ForeignKey("games.id", ondelete="CASCADE"), primary_key=True
+    )
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    game_type = Column(String, nullable=False)
+    score = Column(Integer)
+    rounds = Column(Integer)
+    accuracy_percent = Column(Float)
+    avg_response_time = Column(Float)
+    winner = Column(String, nullable=True)
+    duration_sec = Column(Float, nullable=True)
+    completed_at = Column(DateTime)
+    stats = Column(JSON, nullable=False)  # the game's /stats response
+
+    __table_args__ = (
+        Index(
+            "ix_game_summaries_user_id_game_type_completed_at",
+            "user_id",
+            "game_type",
+            "completed_at",
+        ),
+    )
@@ -0,0 +1,34 @@
+from sqlalchemy import Column, Integer, String, DateTime, Date, ForeignKey, Index
+from database import Base
+
+
+class LeaderboardEntry(Base):
+    """A player's best finished game on one leaderboard.
+
+    A leaderboard is (game_type, period, period_start): period is "all",
+    "daily" or "weekly", period_start the UTC day or Monday it covers
+    (1970-01-01 for "all"). See leaderboards.py.
+    """
+
+    __tablename__ = "leaderboard_entries"
+
+    game_type = Column(String, primary_key=True)
+    period = Column(String, primary_key=True)
+    period_start = Column(Date, primary_key=True)
+    user_id = Column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    score = Column(Integer, nullable=False)
+    game_id = Column(Integer, nullable=False)
+    achieved_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        # Pages walk it in order; a rank is a range count on it
+        Index(
+            "ix_leaderboard_entries_board_score",
+            "game_type",
+            "period",
+            "period_start",
+            "score",
+        ),
+    )
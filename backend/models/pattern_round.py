@@ -1,14 +1,16 @@
 # models/pattern_round.py
 
-from sqlalchemy import Column, Integer, Float, Boolean, String, ForeignKey
+from sqlalchemy import Column, Integer, Float, Boolean, String, ForeignKey, Index, DateTime
 from sqlalchemy.orm import relationship
 from database import Base
+from datetime import datetime
 
 class PatternRound(Base):
     __tablename__ = "pattern_rounds"
 
     id = Column(Integer, primary_key=True, index=True)
     game_id = Column(Integer, ForeignKey("games.id"), nullable=False)
+    user_id = Column(Integer, nullable=False)  # game's owner; partition key
     round_number = Column(Integer, nullable=False)
     correct = Column(Boolean, default=False)
     mistake_type = Column(String)
@@ -19,5 +21,10 @@ class PatternRound(Base):
     correct_streak_at_time = Column(Integer)
     max_streak_so_far = Column(Integer)
     projected_final_score = Column(Integer)
+    timestamp = Column(DateTime, default=datetime.utcnow)
 
     game = relationship("Game", back_populates="pattern_rounds")
+
+    __table_args__ = (
+        Index("ix_pattern_rounds_game_id_round_number", "game_id", "round_number"),
+    )
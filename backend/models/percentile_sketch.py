@@ -0,0 +1,16 @@
+from datetime import datetime
+
+from sqlalchemy import Column, String, DateTime, Float, JSON
+from database import Base
+
+
+class PercentileSketch(Base):
+    """Merged t-digest of one metric across every finished game of a type."""
+
+    __tablename__ = "percentile_sketches"
+
+    game_type = Column(String, primary_key=True)
+    metric = Column(String, primary_key=True)  # "score" or "response_time"
+    digest = Column(JSON, nullable=False)  # sketches.TDigest.to_dict()
+    count = Column(Float, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from database import Base
 from datetime import datetime
@@ -22,6 +22,7 @@ class StroopRound(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     game_id = Column(Integer, ForeignKey("stroop_games.id"))
+    user_id = Column(Integer, nullable=False)  # game's owner; partition key
     round_number = Column(Integer)
     word_shown = Column(String)        # e.g. "RED"
     font_color = Column(String)        # e.g. "green"
@@ -32,3 +33,7 @@ class StroopRound(Base):
     timestamp = Column(DateTime, default=datetime.utcnow)
 
     game = relationship("StroopGame", back_populates="rounds")
+
+    __table_args__ = (
+        Index("ix_stroop_rounds_game_id_round_number", "game_id", "round_number"),
+    )
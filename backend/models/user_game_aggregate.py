@@ -0,0 +1,31 @@
+from datetime import datetime
+
+from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey, JSON
+from database import Base
+
+
+class UserGameAggregate(Base):
+    """Running totals of one user's rounds of one game type.
+
+    Updated in place on every submitted round (see aggregates.py), so the
+    brain_profile endpoints read one row instead of the user's history.
+    """
+
+    __tablename__ = "user_game_aggregates"
+
+    user_id = Column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    game_type = Column(String, primary_key=True)
+    games = Column(Integer, nullable=False, default=0)
+    rounds = Column(Integer, nullable=False, default=0)
+    correct = Column(Float, nullable=False, default=0)  # 0..1 per round
+    # Welford: running mean of response time and sum of squared deviations
+    rt_mean = Column(Float, nullable=False, default=0)
+    rt_m2 = Column(Float, nullable=False, default=0)
+    # Per-round correctness of the first / latest AGGREGATE_WINDOW_ROUNDS rounds
+    early = Column(JSON, nullable=False, default=list)
+    late = Column(JSON, nullable=False, default=list)
+    # Game-specific sums and [min, max] spans, e.g. grid_size, conflict, n
+    extras = Column(JSON, nullable=False, default=dict)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
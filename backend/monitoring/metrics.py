@@ -0,0 +1,171 @@
+"""Minimal in-process metrics registry rendered in Prometheus text format."""
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Route template of the request being handled, used to label sub-timings
+current_route: ContextVar[str] = ContextVar("metrics_route", default="unmatched")
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    body = ",".join(
+        '{}="{}"'.format(k, str(v).replace("\\", "\\\\").replace('"', '\\"'))
+        for k, v in pairs
+    )
+    return "{" + body + "}"
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _header(self):
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = self._header()
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                label_text = _format_labels(self.labelnames, labels)
+                lines.append(f"{self.name}{label_text} {_format_value(value)}")
+        return lines
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels, amount=1):
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, *labels):
+        with self._lock:
+            series = self._values.get(labels)
+            if series is None:
+                # [per-bucket counts, sum, count]
+                series = self._values[labels] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = self._header()
+        with self._lock:
+            for labels, (counts, total, count) in sorted(self._values.items()):
+                for bound, bucket_count in zip(self.buckets, counts):
+                    le = _format_labels(self.labelnames, labels, [("le", bound)])
+                    lines.append(f"{self.name}_bucket{le} {bucket_count}")
+                inf = _format_labels(self.labelnames, labels, [("le", "+Inf")])
+                lines.append(f"{self.name}_bucket{inf} {count}")
+                plain = _format_labels(self.labelnames, labels)
+                lines.append(f"{self.name}_sum{plain} {_format_value(total)}")
+                lines.append(f"{self.name}_count{plain} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_requests_total = registry.register(
+    Counter(
+        "brainbrew_http_requests_total",
+        "HTTP requests by route template and status code.",
+        ("method", "route", "status"),
+    )
+)
+http_request_duration = registry.register(
+    Histogram(
+        "brainbrew_http_request_duration_seconds",
+        "HTTP request latency by route template.",
+        ("method", "route"),
+    )
+)
+http_requests_in_flight = registry.register(
+    Gauge(
+        "brainbrew_http_requests_in_flight",
+        "HTTP requests currently being handled.",
+        ("method", "route"),
+    )
+)
+db_time_per_request = registry.register(
+    Histogram(
+        "brainbrew_db_time_seconds",
+        "Total time spent in SQL statements per request.",
+        ("route",),
+    )
+)
+db_queries_per_request = registry.register(
+    Histogram(
+        "brainbrew_db_queries_per_request",
+        "SQL statements executed per request.",
+        ("route",),
+        buckets=(1, 2, 3, 5, 8, 13, 21, 34, 55, 100),
+    )
+)
+llm_request_duration = registry.register(
+    Histogram(
+        "brainbrew_llm_request_duration_seconds",
+        "Latency of LLM completion calls by calling route.",
+        ("route",),
+        buckets=(0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 40.0),
+    )
+)
+
+
+@contextmanager
+def llm_timer():
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        llm_request_duration.observe(time.perf_counter() - start, current_route.get())
@@ -0,0 +1,53 @@
+import logging
+import time
+
+from fastapi import Request
+from starlette.routing import Match
+
+from config import settings
+from monitoring import metrics, queries
+
+logger = logging.getLogger(__name__)
+
+
+def route_template(request: Request) -> str:
+    """Path template of the matching route, e.g. /progress/{game_type}."""
+    for route in request.app.router.routes:
+        match, _ = route.matches(request.scope)
+        if match == Match.FULL:
+            return route.path
+    # Unknown paths share one label so 404 scans can't blow up cardinality
+    return "unmatched"
+
+
+async def observe_request(request: Request, call_next):
+    method = request.method
+    route = route_template(request)
+    route_token = metrics.current_route.set(route)
+    stats, stats_token = queries.start_request()
+    metrics.http_requests_in_flight.inc(method, route)
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+    finally:
+        elapsed = time.perf_counter() - start
+        metrics.http_requests_in_flight.dec(method, route)
+        queries.end_request(stats_token)
+        metrics.current_route.reset(route_token)
+        if settings.METRICS_ENABLED:
+            metrics.http_requests_total.inc(method, route, str(status))
+            metrics.http_request_duration.observe(elapsed, method, route)
+            if stats.count:
+                metrics.db_time_per_request.observe(stats.total_time, route)
+                metrics.db_queries_per_request.observe(stats.count, route)
+
+    if settings.SQL_QUERY_STATS:
+        response.headers["X-DB-Query-Count"] = str(stats.count)
+        response.headers["X-DB-Time-Ms"] = f"{stats.total_time * 1000:.2f}"
+        for shape, count in stats.repeated(settings.SQL_REPEAT_THRESHOLD).items():
+            logger.warning(
+                "Possible N+1 in %s %s: %d x %s", method, route, count, shape
+            )
+    return response
@@ -0,0 +1,64 @@
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from sqlalchemy import event
+
+_current_stats: ContextVar["QueryStats | None"] = ContextVar(
+    "sql_query_stats", default=None
+)
+
+_literal = re.compile(r"\b\d+\b|'[^']*'")
+_whitespace = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """Collapse literals and whitespace so repeats of one query compare equal."""
+    return _whitespace.sub(" ", _literal.sub("?", statement)).strip()
+
+
+class QueryStats:
+    """SQL statements executed while handling one request."""
+
+    def __init__(self):
+        self.count = 0
+        self.total_time = 0.0
+        self.shapes = Counter()
+
+    def record(self, statement: str, elapsed: float):
+        self.count += 1
+        self.total_time += elapsed
+        self.shapes[statement_shape(statement)] += 1
+
+    def repeated(self, threshold: int):
+        """Statement shapes executed at least `threshold` times (likely N+1)."""
+        return {shape: n for shape, n in self.shapes.items() if n >= threshold}
+
+
+def start_request():
+    stats = QueryStats()
+    return stats, _current_stats.set(stats)
+
+
+def end_request(token):
+    _current_stats.reset(token)
+
+
+def current_stats():
+    return _current_stats.get()
+
+
+def install(engine):
+    """Attach timing hooks to a (sync) engine; no-op outside a request."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        start = conn.info["query_start"].pop()
+        stats = _current_stats.get()
+        if stats is not None:
+            stats.record(statement, time.perf_counter() - start)
@@ -0,0 +1,300 @@
+"""Declarative partitioning of the round tables (Postgres only).
+
+pattern_rounds, binary_rounds, stroop_rounds, chunk_rounds and dual_rounds
+only ever grow, and so does game_rounds, where every submit route now logs
+its rounds. The partitioning migrations can rebuild them as partitioned
+tables, picked with ``alembic -x partitioning=<strategy> upgrade head``:
+
+  user_hash  PARTITION BY HASH (user_id) into ``-x partitions=N`` tables
+             (16). The round reads in routes/ filter on user_id, so each one
+             is pruned to a single partition.
+  month      PARTITION BY RANGE (timestamp): one table per calendar month
+             plus a DEFAULT partition. Expired months are detached and
+             dropped whole instead of being deleted row by row.
+
+game_rounds has no user_id, so with either strategy it is partitioned by
+month on created_at. Its expired months are only dropped once none of their
+rows belong to a finished game that archival.py has not moved out yet
+(``rotate`` reports those as kept); rounds of games that were never finished
+go with their month.
+
+Partition maintenance runs as a script:
+
+  python partitioning.py status
+  python partitioning.py rotate [--months-ahead N] [--retention-months N]
+                                [--detach-only]
+
+Run ``rotate`` from cron (daily is harmless) so upcoming months exist
+before rows arrive for them; rows outside every month land in DEFAULT.
+"""
+import argparse
+import re
+from datetime import date
+
+from sqlalchemy import text
+
+# round table -> the games table its game_id points at
+ROUND_TABLES = {
+    "pattern_rounds": "games",
+    "binary_rounds": "binary_games",
+    "stroop_rounds": "stroop_games",
+    "chunk_rounds": "chunk_games",
+    "dual_rounds": "dual_games",
+}
+GAME_ROUNDS = "game_rounds"
+PARTITIONED_TABLES = [*ROUND_TABLES, GAME_ROUNDS]
+STRATEGIES = ("off", "user_hash", "month")
+PARTITION_KEYS = {"user_hash": "user_id", "month": "timestamp"}
+
+FOREIGN_KEYS = {
+    **{table: f"REFERENCES {games} (id)" for table, games in ROUND_TABLES.items()},
+    GAME_ROUNDS: "REFERENCES games (id) ON DELETE CASCADE",
+}
+
+# (name, columns, INCLUDE columns), recreated on the partitioned parent
+ROUND_INDEXES = {
+    table: [
+        (f"ix_{table}_id", ["id"], []),
+        (f"ix_{table}_game_id_round_number", ["game_id", "round_number"], []),
+    ]
+    for table in ROUND_TABLES
+}
+ROUND_INDEXES["binary_rounds"][1] = (
+    "ix_binary_rounds_game_id_turn",
+    ["game_id", "turn"],
+    ["guesser", "guess", "feedback"],
+)
+ROUND_INDEXES[GAME_ROUNDS] = [
+    ("ix_game_rounds_game_id_id", ["game_id", "id"], []),
+    ("ix_game_rounds_correct", ["game_id"], []),
+]
+# index name -> WHERE clause of partial indexes
+PARTIAL_INDEXES = {"ix_game_rounds_correct": "CAST(entry ->> 'correct' AS BOOLEAN)"}
+
+_MONTH_SUFFIX = re.compile(r"_p(\d{4})_(\d{2})$")
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_key(table: str, strategy: str) -> str:
+    if table == GAME_ROUNDS:
+        return "created_at"
+    return PARTITION_KEYS[strategy]
+
+
+def month_partition_name(table: str, month: date) -> str:
+    return f"{table}_p{month:%Y_%m}"
+
+
+def month_partition_sql(table: str, month: date) -> str:
+    month = month.replace(day=1)
+    return (
+        f"CREATE TABLE IF NOT EXISTS {month_partition_name(table, month)} "
+        f"PARTITION OF {table} FOR VALUES FROM ('{month.isoformat()}') "
+        f"TO ('{add_months(month, 1).isoformat()}')"
+    )
+
+
+def _index_sql(table):
+    statements = []
+    for name, columns, include in ROUND_INDEXES[table]:
+        sql = f"CREATE INDEX {name} ON {table} ({', '.join(columns)})"
+        if include:
+            sql += f" INCLUDE ({', '.join(include)})"
+        if name in PARTIAL_INDEXES:
+            sql += f" WHERE {PARTIAL_INDEXES[name]}"
+        statements.append(sql)
+    return statements
+
+
+def _rebuild_sql(table, create_sql, primary_key, children):
+    """Copy `table` into a new table built by `create_sql`, then swap them."""
+    old = f"{table}_old"
+    return [
+        f"ALTER TABLE {table} RENAME TO {old}",
+        create_sql.format(table=table, old=old),
+        *children,
+        f"INSERT INTO {table} SELECT * FROM {old}",
+        # the id sequence belongs to the old table and would be dropped with it
+        f"ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id",
+        f"DROP TABLE {old}",
+        # constraint and index names are free again once the old table is gone
+        f"ALTER TABLE {table} ADD PRIMARY KEY ({primary_key})",
+        f"ALTER TABLE {table} ADD FOREIGN KEY (game_id) {FOREIGN_KEYS[table]}",
+        *_index_sql(table),
+    ]
+
+
+def partition_table_sql(table, strategy, partitions=16, months=()):
+    """Statements that rebuild `table` partitioned by `strategy`, keeping rows.
+
+    Rows without a partition key (a round whose game is gone) are given
+    user_id 0 or the current time, since the key can't be NULL. game_rounds
+    is partitioned by month whatever `strategy` says.
+    """
+    if table == GAME_ROUNDS:
+        strategy = "month"
+    key = partition_key(table, strategy)
+    if strategy == "user_hash":
+        clause = "HASH (user_id)"
+        children = [
+            f"CREATE TABLE {table}_h{i} PARTITION OF {table} "
+            f"FOR VALUES WITH (MODULUS {partitions}, REMAINDER {i})"
+            for i in range(partitions)
+        ]
+        fill = "0"
+    else:
+        clause = f'RANGE ("{key}")'
+        children = [month_partition_sql(table, month) for month in months]
+        children.append(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT")
+        fill = "CURRENT_TIMESTAMP"
+    return [
+        f'UPDATE {table} SET "{key}" = {fill} WHERE "{key}" IS NULL',
+        f'ALTER TABLE {table} ALTER COLUMN "{key}" SET NOT NULL',
+        *_rebuild_sql(
+            table,
+            "CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS) "
+            f"PARTITION BY {clause}",
+            f'id, "{key}"',
+            children,
+        ),
+    ]
+
+
+def unpartition_table_sql(table):
+    """Statements that turn a partitioned `table` back into a single table."""
+    return _rebuild_sql(
+        table, "CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS)", "id", []
+    )
+
+
+def partitioned_tables(conn):
+    """{table: "user_hash" | "month"} for the round tables that are partitioned."""
+    rows = conn.execute(
+        text(
+            "SELECT c.relname, p.partstrat FROM pg_partitioned_table p "
+            "JOIN pg_class c ON c.oid = p.partrelid "
+            "WHERE c.relname = ANY(:tables)"
+        ),
+        {"tables": PARTITIONED_TABLES},
+    )
+    return {
+        name: {"h": "user_hash", "r": "month"}.get(kind, kind)
+        for name, kind in rows
+    }
+
+
+def partitions(conn, table):
+    """[(partition name, estimated rows)] of `table`."""
+    rows = conn.execute(
+        text(
+            "SELECT c.relname, c.reltuples FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = :table ORDER BY c.relname"
+        ),
+        {"table": table},
+    )
+    return [(name, max(0, int(estimate))) for name, estimate in rows]
+
+
+def _awaiting_archival(conn, partition):
+    """Whether a game_rounds month still holds rounds of a finished game."""
+    return conn.execute(
+        text(
+            f"SELECT 1 FROM {partition} r JOIN games g ON g.id = r.game_id "
+            "WHERE g.end_time IS NOT NULL LIMIT 1"
+        )
+    ).first() is not None
+
+
+def rotate(conn, today=None, months_ahead=3, retention_months=0, detach_only=False):
+    """Create upcoming months and retire expired ones on month-partitioned tables.
+
+    Returns {"created": [...], "detached": [...], "dropped": [...], "kept":
+    [...]}; "kept" lists expired game_rounds months still awaiting archival.
+    """
+    this_month = (today or date.today()).replace(day=1)
+    cutoff = add_months(this_month, -retention_months) if retention_months else None
+    result = {"created": [], "detached": [], "dropped": [], "kept": []}
+    for table, strategy in partitioned_tables(conn).items():
+        if strategy != "month":
+            continue
+        existing = {name for name, _ in partitions(conn, table)}
+        for ahead in range(months_ahead + 1):
+            month = add_months(this_month, ahead)
+            if month_partition_name(table, month) not in existing:
+                conn.execute(text(month_partition_sql(table, month)))
+                result["created"].append(month_partition_name(table, month))
+        if cutoff is None:
+            continue
+        for name in sorted(existing):
+            match = _MONTH_SUFFIX.search(name)
+            if not match or date(int(match[1]), int(match[2]), 1) >= cutoff:
+                continue
+            if table == GAME_ROUNDS and _awaiting_archival(conn, name):
+                result["kept"].append(name)
+                continue
+            conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+            result["detached"].append(name)
+            if not detach_only:
+                conn.execute(text(f"DROP TABLE {name}"))
+                result["dropped"].append(name)
+    return result
+
+
+def main():
+    from config import settings
+    from database import engine
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("status", help="list partitions and estimated row counts")
+    rotate_parser = commands.add_parser(
+        "rotate", help="create upcoming months, retire expired ones"
+    )
+    rotate_parser.add_argument(
+        "--months-ahead", type=int, default=settings.ROUND_PARTITION_MONTHS_AHEAD
+    )
+    rotate_parser.add_argument(
+        "--retention-months",
+        type=int,
+        default=settings.ROUND_PARTITION_RETENTION_MONTHS,
+        help="drop months older than this many months (0 keeps everything)",
+    )
+    rotate_parser.add_argument(
+        "--detach-only",
+        action="store_true",
+        help="detach expired months but keep them as standalone tables",
+    )
+    args = parser.parse_args()
+
+    if engine.dialect.name != "postgresql":
+        parser.error("partitioning needs PostgreSQL")
+
+    if args.command == "status":
+        with engine.connect() as conn:
+            strategies = partitioned_tables(conn)
+            for table in PARTITIONED_TABLES:
+                print(f"{table}: {strategies.get(table, 'not partitioned')}")
+                for name, estimate in partitions(conn, table):
+                    print(f"  {name:<40} ~{estimate} rows")
+        return
+
+    with engine.begin() as conn:
+        result = rotate(
+            conn,
+            months_ahead=args.months_ahead,
+            retention_months=args.retention_months,
+            detach_only=args.detach_only,
+        )
+    for action, names in result.items():
+        for name in names:
+            print(f"{action} {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+"""Cross-user percentiles of finished games, for /rank/{game_type}.
+
+Every finished game (pattern, dual n-back) adds its score and average
+response time to t-digest sketches (sketches.py), one per game type and
+metric. Each worker sketches the games that finish on it in memory; a
+background thread merges them into the shared percentile_sketches rows on
+the primary every PERCENTILE_FLUSH_EVERY games, at least every
+PERCENTILE_REFRESH_SECONDS and at shutdown, so a submit never waits for it.
+The merged rows are re-read through the read session every
+PERCENTILE_REFRESH_SECONDS. A rank is then a lookup in a few dozen
+centroids, however many games have been played, and a restart only reads
+those rows back.
+
+Games that finished before the sketches existed are folded in once with:
+
+  python percentiles.py rebuild
+"""
+import argparse
+import logging
+import threading
+import time
+from datetime import datetime
+
+from config import settings
+from database import SessionLocal, read_session
+from models.game_summary import GameSummary
+from models.percentile_sketch import PercentileSketch
+from sketches import TDigest
+
+logger = logging.getLogger(__name__)
+
+class PercentileService:
+    def __init__(self, compression: float, flush_every: int, refresh_seconds: float):
+        self.compression = compression
+        self.flush_every = max(1, flush_every)
+        self.refresh_seconds = refresh_seconds
+        self._snapshots = {}  # (game_type, metric) -> merged TDigest
+        self._pending = {}  # (game_type, metric) -> TDigest not yet merged
+        self._merging = {}  # taken by a flush that hasn't committed yet
+        self._pending_games = 0
+        self._loaded_at = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def observe(self, game_type: str, **values):
+        """Add a finished game's metrics, e.g. observe("pattern", score=120).
+
+        Only touches memory; the background thread writes them out.
+        """
+        with self._lock:
+            for metric, value in values.items():
+                if value is None:
+                    continue
+                key = (game_type, metric)
+                if key not in self._pending:
+                    self._pending[key] = TDigest(self.compression)
+                self._pending[key].add(float(value))
+            self._pending_games += 1
+            due = self._pending_games >= self.flush_every
+        self._ensure_started()
+        if due:
+            self._wake.set()
+
+    def rank(self, game_type: str, metric: str, value: float):
+        """(fraction of games below `value`, games sketched); (None, 0) if none."""
+        digest = self._digest(game_type, metric)
+        if digest is None or not digest.count:
+            return None, 0
+        return digest.cdf(float(value)), int(digest.count)
+
+    def flush(self):
+        """Merge this worker's observations into the shared sketches."""
+        with self._flush_lock:
+            self._flush()
+
+    def close(self):
+        """Stop the background thread and flush what is left (at shutdown)."""
+        with self._start_lock:
+            thread, self._thread = self._thread, None
+            self._stopping = True
+        if thread is not None:
+            self._wake.set()
+            thread.join()
+        self.flush()
+        self._stopping = False
+
+    def _flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._merging = pending
+            self._pending_games = 0
+        if not pending:
+            return
+        merged_rows = {}
+        try:
+            with SessionLocal() as db:
+                for (game_type, metric), digest in pending.items():
+                    row = (
+                        db.query(PercentileSketch)
+                        .filter(
+                            PercentileSketch.game_type == game_type,
+                            PercentileSketch.metric == metric,
+                        )
+                        .with_for_update()
+                        .first()
+                    )
+                    if row is None:
+                        row = PercentileSketch(game_type=game_type, metric=metric)
+                        db.add(row)
+                        merged = TDigest(self.compression)
+                    else:
+                        merged = TDigest.from_dict(row.digest)
+                    merged.merge(digest)
+                    row.digest = merged.to_dict()
+                    row.count = merged.count
+                    row.updated_at = datetime.utcnow()
+                    merged_rows[(game_type, metric)] = merged
+                db.commit()
+        except Exception:
+            # Keep them for the next flush
+            logger.exception("percentile flush failed; retrying with the next")
+            with self._lock:
+                self._merging = {}
+                for key, digest in pending.items():
+                    if key in self._pending:
+                        digest.merge(self._pending[key])
+                    self._pending[key] = digest
+            return
+        # The merged rows are already at hand, and a replica may lag behind
+        with self._lock:
+            self._snapshots.update(merged_rows)
+            self._merging = {}
+
+    def load(self):
+        """Re-read the merged sketches."""
+        with read_session() as db:
+            rows = db.query(PercentileSketch).all()
+            snapshots = {
+                (row.game_type, row.metric): TDigest.from_dict(row.digest)
+                for row in rows
+            }
+        with self._lock:
+            self._snapshots = snapshots
+            self._loaded_at = time.monotonic()
+
+    def clear(self):
+        with self._lock:
+            self._snapshots = {}
+            self._pending = {}
+            self._merging = {}
+            self._pending_games = 0
+            self._loaded_at = None
+
+    def stats(self):
+        with self._lock:
+            return {
+                "sketches": len(self._snapshots),
+                "pending_games": self._pending_games,
+                "games": {
+                    f"{game_type}.{metric}": int(digest.count)
+                    for (game_type, metric), digest in self._snapshots.items()
+                },
+            }
+
+    def _digest(self, game_type, metric):
+        """The merged sketch plus this worker's unflushed games."""
+        loaded_at = self._loaded_at
+        if loaded_at is None or time.monotonic() - loaded_at >= self.refresh_seconds:
+            self.load()
+        with self._lock:
+            key = (game_type, metric)
+            snapshot = self._snapshots.get(key)
+            unmerged = [
+                digest
+                for digest in (self._merging.get(key), self._pending.get(key))
+                if digest is not None
+            ]
+            if not unmerged:
+                return snapshot
+            digest = TDigest(self.compression)
+            for part in ([snapshot] if snapshot is not None else []) + unmerged:
+                digest.merge(part)
+            return digest
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None and not self._stopping:
+                self._thread = threading.Thread(
+                    target=self._run, name="percentile-flush", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        while not self._stopping:
+            self._wake.wait(self.refresh_seconds)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("percentile flush failed")
+
+
+def rebuild(db, batch_size: int = 5000):
+    """Recompute the sketches from game_summaries; returns games folded in."""
+    digests = {}
+    games = 0
+    rows = (
+        db.query(
+            GameSummary.game_type, GameSummary.score, GameSummary.avg_response_time
+        )
+        .order_by(GameSummary.game_id)
+        .yield_per(batch_size)
+    )
+    for row in rows:
+        for metric, value in (
+            ("score", row.score),
+            ("response_time", row.avg_response_time),
+        ):
+            if value is None:
+                continue
+            key = (row.game_type, metric)
+            if key not in digests:
+                digests[key] = TDigest(settings.PERCENTILE_COMPRESSION)
+            digests[key].add(float(value))
+        games += 1
+
+    db.query(PercentileSketch).delete(synchronize_session=False)
+    for (game_type, metric), digest in digests.items():
+        db.add(
+            PercentileSketch(
+                game_type=game_type,
+                metric=metric,
+                digest=digest.to_dict(),
+                count=digest.count,
+                updated_at=datetime.utcnow(),
+            )
+        )
+    db.commit()
+    return games
+
+
+percentiles = PercentileService(
+    compression=settings.PERCENTILE_COMPRESSION,
+    flush_every=settings.PERCENTILE_FLUSH_EVERY,
+    refresh_seconds=settings.PERCENTILE_REFRESH_SECONDS,
+)
+
+
+def main():
+    from models import game, user  # noqa: F401  (relationships resolve)
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("rebuild", help="recompute the sketches from game_summaries")
+    commands.add_parser("status", help="show games per sketch and their quartiles")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    with SessionLocal() as db:
+        if args.command == "rebuild":
+            print(f"folded {rebuild(db)} finished games into the sketches")
+            return
+        for row in db.query(PercentileSketch).order_by(
+            PercentileSketch.game_type, PercentileSketch.metric
+        ):
+            digest = TDigest.from_dict(row.digest)
+            quartiles = ", ".join(
+                f"{digest.quantile(q):.2f}" for q in (0.25, 0.5, 0.75)
+            )
+            print(
+                f"{row.game_type}.{row.metric}: {int(row.count)} games, "
+                f"quartiles {quartiles}"
+            )
+
+
+if __name__ == "__main__":
+    main()
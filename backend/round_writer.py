@@ -0,0 +1,193 @@
+"""Group commit for round-log inserts.
+
+With ``ROUND_WRITER_ENABLED`` the round rows produced by concurrent submits
+(GameRound, PatternRound, BinaryRound, ...) are handed to one background
+writer, together with the statement that updates their game's header. It
+collects them for up to ``ROUND_WRITER_MAX_DELAY_MS`` or
+``ROUND_WRITER_MAX_BATCH`` rows and runs the headers plus one multi-row
+INSERT per table in a single transaction, so a game's state never moves on
+without its rounds. Each request still waits for that commit, so nothing is
+acknowledged before it is durable; it just shares the commit (and its
+fsync) with everyone else in the window.
+
+The writer commits on the sync engine from its own thread, so it cannot be
+combined with USE_ASYNC_DB (whose routes must not touch the sync pool);
+config rejects that combination.
+"""
+import logging
+import queue
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import Future
+
+from sqlalchemy import insert, inspect
+
+from config import settings
+from database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+def _column_values(row):
+    """Column values of a transient ORM row, leaving unset ones to defaults."""
+    values = {}
+    for attr in inspect(row).mapper.column_attrs:
+        value = getattr(row, attr.key)
+        if value is not None:
+            values[attr.key] = value
+    return values
+
+
+class GroupCommitWriter:
+    def __init__(self, session_factory, max_batch: int, max_delay: float):
+        self.session_factory = session_factory
+        self.max_batch = max(1, max_batch)
+        self.max_delay = max(0.0, max_delay)
+        self.transactions = 0
+        self.rows_written = 0
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def write(self, rows, header=None, timeout: float | None = None):
+        """Insert `rows` (transient ORM instances) and run `header` (an
+        UPDATE or None) in one transaction; returns once committed.
+
+        `rows` may also hold callables, which are called with the session
+        inside that transaction (see commit_with_rows).
+        """
+        if not rows and header is None:
+            return
+        future = Future()
+        self._ensure_started()
+        self._queue.put((rows, header, future))
+        future.result(timeout)
+
+    def close(self):
+        with self._start_lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(_STOP)
+            thread.join()
+
+    def stats(self):
+        return {
+            "transactions": self.transactions,
+            "rows_written": self.rows_written,
+            "rows_per_transaction": (
+                round(self.rows_written / self.transactions, 2)
+                if self.transactions
+                else 0.0
+            ),
+            "queued": self._queue.qsize(),
+        }
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="round-writer", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            batch, count = [item], max(1, len(item[0]))
+            deadline = time.monotonic() + self.max_delay
+            while count < self.max_batch:
+                try:
+                    item = self._queue.get(
+                        timeout=max(0.0, deadline - time.monotonic())
+                    )
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+                count += max(1, len(item[0]))
+            self._commit(batch)
+
+    def _commit(self, batch):
+        try:
+            self._insert(
+                [header for _, header, _ in batch if header is not None],
+                [row for rows, _, _ in batch for row in rows],
+            )
+        except Exception as exc:
+            if len(batch) == 1:
+                batch[0][2].set_exception(exc)
+                return
+            # Retry each request on its own so one bad row only fails its caller
+            logger.warning("Group commit of %d requests failed: %r", len(batch), exc)
+            for rows, header, future in batch:
+                try:
+                    self._insert([] if header is None else [header], rows)
+                except Exception as exc:
+                    future.set_exception(exc)
+                else:
+                    future.set_result(None)
+            return
+        for _, _, future in batch:
+            future.set_result(None)
+
+    def _insert(self, headers, rows):
+        groups, updates = defaultdict(list), []
+        for row in rows:
+            if callable(row):
+                updates.append(row)
+                continue
+            values = _column_values(row)
+            groups[(type(row), tuple(values))].append(values)
+        with self.session_factory() as db:
+            try:
+                for header in headers:
+                    db.execute(header)
+                for update in updates:
+                    update(db)
+                for (model, _), values in groups.items():
+                    db.execute(insert(model), values)
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+        self.transactions += 1
+        self.rows_written += len(rows) - len(updates)
+
+
+round_writer = GroupCommitWriter(
+    SessionLocal,
+    max_batch=settings.ROUND_WRITER_MAX_BATCH,
+    max_delay=settings.ROUND_WRITER_MAX_DELAY_MS / 1000,
+)
+
+
+def commit_with_rows(db, rows, header=None):
+    """Persist `rows` and the game `header` UPDATE in one transaction.
+
+    Callables among `rows` are updates that must commit with them (e.g. the
+    player's aggregates) and are called with the transaction's session.
+    Group-committed when enabled; `db` then only ends its transaction, so
+    the game's changes must be in `header` rather than pending in `db`.
+    """
+    if not settings.ROUND_WRITER_ENABLED:
+        if header is not None:
+            db.execute(header)
+        for row in rows:
+            if callable(row):
+                row(db)
+            else:
+                db.add(row)
+        db.commit()
+        return
+    db.commit()
+    round_writer.write(rows, header)
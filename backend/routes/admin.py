@@ -0,0 +1,44 @@
+import secrets
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+
+from auth.jwt_handler import token_cache
+from auth.user_cache import user_cache
+from config import settings
+from database import pool_status, replica_status
+from game_cache import game_cache
+from round_writer import round_writer
+
+router = APIRouter()
+
+
+# ---------- Dependency ----------
+def require_admin(x_admin_token: str | None = Header(default=None)):
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not found")
+    if not x_admin_token or not secrets.compare_digest(
+        x_admin_token, settings.ADMIN_TOKEN
+    ):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+# ---------- DB Pool Route ----------
+@router.get("/db/pool", tags=["Admin"], dependencies=[Depends(require_admin)])
+def db_pool_stats():
+    return {
+        "pools": pool_status(),
+        "replica": replica_status(),
+        "round_writer": round_writer.stats(),
+    }
+
+
+# ---------- Auth Cache Route ----------
+@router.get("/auth/caches", tags=["Admin"], dependencies=[Depends(require_admin)])
+def auth_cache_stats():
+    return {"token_cache": token_cache.stats(), "user_cache": user_cache.stats()}
+
+
+# ---------- Active Game Cache Route ----------
+@router.get("/games/cache", tags=["Admin"], dependencies=[Depends(require_admin)])
+def active_game_cache_stats():
+    return game_cache.stats()
@@ -1,76 +1,128 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials, OAuth2PasswordRequestForm
 from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
 
-from database import SessionLocal
+from crud import user as user_crud
+from database import get_async_db, get_db
 from models import user as user_model
 from schemas import user as user_schema
 from auth import hash, jwt_handler
+from auth.user_cache import cache_user, get_cached_user
 
 router = APIRouter()
 oauth2_scheme = HTTPBearer()
 
 
-# Dependency to get DB session
-def get_db():
-    db = SessionLocal()
+# Run a DB call and hand the connection back to the pool in the same worker
+# thread, so no connection is held while the request awaits bcrypt
+def _release_after(db: Session, fn, *args):
     try:
-        yield db
+        return fn(db, *args)
     finally:
         db.close()
 
 
+# Hashing runs in a bounded pool; a full queue means back off and retry
+async def _hash_or_503(hash_call):
+    try:
+        return await hash_call
+    except hash.HashingBusy:
+        raise HTTPException(
+            status_code=503,
+            detail="Too many sign-ins in progress, please retry shortly",
+            headers={"Retry-After": "1"},
+        )
+
+
 # Register
 @router.post("/register", response_model=user_schema.UserOut)
-def register(user: user_schema.UserCreate, db: Session = Depends(get_db)):
-    existing = (
-        db.query(user_model.User).filter(user_model.User.email == user.email).first()
+async def register(user: user_schema.UserCreate, db: Session = Depends(get_db)):
+    existing = await run_in_threadpool(
+        _release_after, db, user_crud.get_user_by_email, user.email
     )
     if existing:
         raise HTTPException(status_code=400, detail="Email already registered")
 
-    hashed_pw = hash.hash_password(user.password)
-    new_user = user_model.User(
-        username=user.username, email=user.email, hashed_password=hashed_pw
+    hashed_pw = await _hash_or_503(hash.hash_password_async(user.password))
+    return await run_in_threadpool(
+        _release_after, db, user_crud.create_user, user.username, user.email, hashed_pw
     )
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
-    return new_user
 
 
 # Login
 @router.post("/login")
-def login(
+async def login(
     form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)
 ):
-    user = (
-        db.query(user_model.User)
-        .filter(user_model.User.email == form_data.username)
-        .first()
+    user = await run_in_threadpool(
+        _release_after, db, user_crud.get_user_by_email, form_data.username
     )
-    if not user or not hash.verify_password(form_data.password, user.hashed_password):
+    if not user or not await _hash_or_503(
+        hash.verify_password_async(form_data.password, user.hashed_password)
+    ):
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
-    token = jwt_handler.create_access_token({"user_id": user.id})
+    token = jwt_handler.create_access_token(
+        {"user_id": user.id, "username": user.username}
+    )
     return {"access_token": token, "token_type": "bearer"}
 
 
 # Auth helper
+def _token_user(credentials: HTTPAuthorizationCredentials):
+    """(user id, cached user or None) for a bearer token."""
+    token = credentials.credentials  # Extract token string from Bearer header
+    payload = jwt_handler.decode_token(token)
+    user_id = payload.get("user_id")
+    if not user_id:
+        raise HTTPException(status_code=401, detail="Invalid token")
+
+    # Fast path: tokens carrying the username claim are served from the
+    # user cache without touching the database.
+    if "username" in payload:
+        return user_id, get_cached_user(user_id, payload["username"])
+    return user_id, None
+
+
 def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(oauth2_scheme),
     db: Session = Depends(get_db),
 ):
     try:
-        token = credentials.credentials  # Extract token string from Bearer header
-        payload = jwt_handler.decode_token(token)
-        user_id = payload.get("user_id")
-        if not user_id:
-            raise HTTPException(status_code=401, detail="Invalid token")
+        user_id, user = _token_user(credentials)
+        if user is not None:
+            return user
+
         user = db.query(user_model.User).filter(user_model.User.id == user_id).first()
         if not user:
             raise HTTPException(status_code=401, detail="User not found")
+        # Detach so the cached instance is not expired by this request's commit
+        db.expunge(user)
+        cache_user(user)
+        return user
+    except Exception:
+        raise HTTPException(status_code=401, detail="Invalid token")
+
+
+# Same as get_current_user for the USE_ASYNC_DB routes, so a cache miss is
+# an await on the async pool instead of a threadpool thread and sync connection
+async def get_current_user_async(
+    credentials: HTTPAuthorizationCredentials = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db),
+):
+    try:
+        user_id, user = _token_user(credentials)
+        if user is not None:
+            return user
+
+        user = await db.get(user_model.User, user_id)
+        if not user:
+            raise HTTPException(status_code=401, detail="User not found")
+        db.expunge(user)
+        cache_user(user)
         return user
     except Exception:
         raise HTTPException(status_code=401, detail="Invalid token")
@@ -1,27 +1,20 @@
 from config import *
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import update
 from sqlalchemy.orm import Session
-from database import SessionLocal
+from database import get_async_db, get_async_read_db, get_db, get_read_db
 from models import binary as binary_model, user as user_model
 from schemas import binary as binary_schema
-from routes.auth import get_current_user
+from routes.auth import get_current_user, get_current_user_async
+from monitoring import metrics
+from llm import get_openai_client
+from round_writer import commit_with_rows
 from datetime import datetime
 import random
-from openai import OpenAI
-import os
 from schemas.binary import BinaryStartRequest, BinaryGuessRequest, BinaryStartResponse
 
 router = APIRouter()
-openai_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
-
-# ---------- Dependency ----------
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
 
 
 # ---------- Difficulty Ranges ----------
@@ -29,15 +22,8 @@ DIFFICULTY_RANGES = {"easy": (1, 50), "normal": (1, 100), "hard": (1, 1000)}
 
 
 # ---------- Start Route ----------
-@router.post(
-    "/start",
-    response_model=binary_schema.BinaryStartResponse,
-    tags=["Binary Search Battle"],
-)
-def start_binary_game(
-    payload: BinaryStartRequest,
-    db: Session = Depends(get_db),
-    current_user: user_model.User = Depends(get_current_user),
+def _start_binary_game(
+    db: Session, payload: BinaryStartRequest, current_user: user_model.User
 ):
     if payload.difficulty not in DIFFICULTY_RANGES:
         raise HTTPException(status_code=400, detail="Invalid difficulty")
@@ -65,12 +51,47 @@ def start_binary_game(
     }
 
 
+if settings.USE_ASYNC_DB:
+
+    @router.post(
+        "/start",
+        response_model=binary_schema.BinaryStartResponse,
+        tags=["Binary Search Battle"],
+    )
+    async def start_binary_game(
+        payload: BinaryStartRequest,
+        db: AsyncSession = Depends(get_async_db),
+        current_user: user_model.User = Depends(get_current_user_async),
+    ):
+        return await db.run_sync(_start_binary_game, payload, current_user)
+
+else:
+
+    @router.post(
+        "/start",
+        response_model=binary_schema.BinaryStartResponse,
+        tags=["Binary Search Battle"],
+    )
+    def start_binary_game(
+        payload: BinaryStartRequest,
+        db: Session = Depends(get_db),
+        current_user: user_model.User = Depends(get_current_user),
+    ):
+        return _start_binary_game(db, payload, current_user)
+
+
 # ---------- Guess Route ----------
-@router.post("/guess", tags=["Binary Search Battle"])
-def make_guess(
-    payload: BinaryGuessRequest,
-    db: Session = Depends(get_db),
-    current_user: user_model.User = Depends(get_current_user),
+def _set_winner(game, winner):
+    # Committed with the final round rows (see round_writer.commit_with_rows)
+    return (
+        update(binary_model.BinaryGame)
+        .where(binary_model.BinaryGame.id == game.id)
+        .values(winner=winner)
+    )
+
+
+def _make_guess(
+    db: Session, payload: BinaryGuessRequest, current_user: user_model.User
 ):
     game = (
         db.query(binary_model.BinaryGame)
@@ -87,30 +108,37 @@ def make_guess(
     # Turn counter
     total_turns = (
         db.query(binary_model.BinaryRound)
-        .filter(binary_model.BinaryRound.game_id == game.id)
+        .filter(
+            binary_model.BinaryRound.user_id == game.user_id,
+            binary_model.BinaryRound.game_id == game.id,
+        )
         .count()
     )
 
+    # Round rows are persisted together with the game at the end
+    new_rows = []
+
     # ---------- Player Guess ----------
     if payload.guess == game.target:
-        game.winner = "user"
-        db.add(
+        new_rows.append(
             binary_model.BinaryRound(
                 game_id=game.id,
+                user_id=game.user_id,
                 turn=total_turns + 1,
                 guesser="user",
                 guess=payload.guess,
                 feedback="correct",
             )
         )
-        db.commit()
+        commit_with_rows(db, new_rows, _set_winner(game, "user"))
         return {"result": "correct", "message": "You guessed it!", "winner": "user"}
 
     feedback = "too_low" if payload.guess < game.target else "too_high"
 
-    db.add(
+    new_rows.append(
         binary_model.BinaryRound(
             game_id=game.id,
+            user_id=game.user_id,
             turn=total_turns + 1,
             guesser="user",
             guess=payload.guess,
@@ -122,7 +150,10 @@ def make_guess(
     # Determine AI's current range based on all past rounds
     rounds = (
         db.query(binary_model.BinaryRound)
-        .filter(binary_model.BinaryRound.game_id == game.id)
+        .filter(
+            binary_model.BinaryRound.user_id == game.user_id,
+            binary_model.BinaryRound.game_id == game.id,
+        )
         .order_by(binary_model.BinaryRound.turn)
         .all()
     )
@@ -141,17 +172,17 @@ def make_guess(
     ai_guess = (ai_low + ai_high) // 2
 
     if ai_guess == game.target:
-        game.winner = "ai"
-        db.add(
+        new_rows.append(
             binary_model.BinaryRound(
                 game_id=game.id,
+                user_id=game.user_id,
                 turn=total_turns + 2,
                 guesser="ai",
                 guess=ai_guess,
                 feedback="correct",
             )
         )
-        db.commit()
+        commit_with_rows(db, new_rows, _set_winner(game, "ai"))
         return {
             "result": feedback,
             "ai_guess": ai_guess,
@@ -161,9 +192,10 @@ def make_guess(
 
     ai_feedback = "too_low" if ai_guess < game.target else "too_high"
 
-    db.add(
+    new_rows.append(
         binary_model.BinaryRound(
             game_id=game.id,
+            user_id=game.user_id,
             turn=total_turns + 2,
             guesser="ai",
             guess=ai_guess,
@@ -171,7 +203,7 @@ def make_guess(
         )
     )
 
-    db.commit()
+    commit_with_rows(db, new_rows)
 
     return {
         "result": feedback,
@@ -181,13 +213,29 @@ def make_guess(
     }
 
 
+if settings.USE_ASYNC_DB:
+
+    @router.post("/guess", tags=["Binary Search Battle"])
+    async def make_guess(
+        payload: BinaryGuessRequest,
+        db: AsyncSession = Depends(get_async_db),
+        current_user: user_model.User = Depends(get_current_user_async),
+    ):
+        return await db.run_sync(_make_guess, payload, current_user)
+
+else:
+
+    @router.post("/guess", tags=["Binary Search Battle"])
+    def make_guess(
+        payload: BinaryGuessRequest,
+        db: Session = Depends(get_db),
+        current_user: user_model.User = Depends(get_current_user),
+    ):
+        return _make_guess(db, payload, current_user)
+
+
 # ---------- Stats Route ----------
-@router.get("/stats", tags=["Binary Search Battle"])
-def binary_stats(
-    game_id: int,
-    db: Session = Depends(get_db),
-    current_user: user_model.User = Depends(get_current_user),
-):
+def _binary_stats(db: Session, game_id: int, current_user: user_model.User):
     game = (
         db.query(binary_model.BinaryGame)
         .filter(binary_model.BinaryGame.id == game_id)
@@ -199,7 +247,10 @@ def binary_stats(
 
     rounds = (
         db.query(binary_model.BinaryRound)
-        .filter(binary_model.BinaryRound.game_id == game_id)
+        .filter(
+            binary_model.BinaryRound.user_id == game.user_id,
+            binary_model.BinaryRound.game_id == game_id,
+        )
         .order_by(binary_model.BinaryRound.turn)
         .all()
     )
@@ -215,6 +266,27 @@ def binary_stats(
     }
 
 
+if settings.USE_ASYNC_DB:
+
+    @router.get("/stats", tags=["Binary Search Battle"])
+    async def binary_stats(
+        game_id: int,
+        db: AsyncSession = Depends(get_async_read_db),
+        current_user: user_model.User = Depends(get_current_user_async),
+    ):
+        return await db.run_sync(_binary_stats, game_id, current_user)
+
+else:
+
+    @router.get("/stats", tags=["Binary Search Battle"])
+    def binary_stats(
+        game_id: int,
+        db: Session = Depends(get_read_db),
+        current_user: user_model.User = Depends(get_current_user),
+    ):
+        return _binary_stats(db, game_id, current_user)
+
+
 @router.get("/feedback", tags=["Binary Search Battle"])
 def binary_feedback(
     game_id: int,
@@ -235,7 +307,10 @@ def binary_feedback(
 
     rounds = (
         db.query(binary_model.BinaryRound)
-        .filter(binary_model.BinaryRound.game_id == game.id)
+        .filter(
+            binary_model.BinaryRound.user_id == game.user_id,
+            binary_model.BinaryRound.game_id == game.id,
+        )
         .order_by(binary_model.BinaryRound.turn)
         .all()
     )
@@ -259,11 +334,12 @@ Respond as:
     """
 
     try:
-        response = openai_client.chat.completions.create(
-            model="gpt-4",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.8,
-        )
+        with metrics.llm_timer():
+            response = get_openai_client().chat.completions.create(
+                model="gpt-4",
+                messages=[{"role": "user", "content": prompt}],
+                temperature=0.8,
+            )
         return {"feedback": response.choices[0].message.content}
     except Exception as e:
         raise HTTPException(status_code=500, detail="Error generating feedback.")
@@ -271,7 +347,7 @@ Respond as:
 
 @router.get("/brain_profile", tags=["Binary Search Battle"])
 def binary_brain_profile(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: user_model.User = Depends(get_current_user),
 ):
     # Get all completed games
@@ -297,7 +373,10 @@ def binary_brain_profile(
     for game in games:
         rounds = (
             db.query(binary_model.BinaryRound)
-            .filter(binary_model.BinaryRound.game_id == game.id)
+            .filter(
+                binary_model.BinaryRound.user_id == game.user_id,
+                binary_model.BinaryRound.game_id == game.id,
+            )
             .order_by(binary_model.BinaryRound.turn)
             .all()
         )
@@ -329,11 +408,12 @@ Format it like this:
     """
 
     try:
-        response = openai_client.chat.completions.create(
-            model="gpt-4",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.8,
-        )
+        with metrics.llm_timer():
+            response = get_openai_client().chat.completions.create(
+                model="gpt-4",
+                messages=[{"role": "user", "content": prompt}],
+                temperature=0.8,
+            )
         return {
             "summary": response.choices[0].message.content,
             "total_games": total_games,
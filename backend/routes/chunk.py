@@ -1,27 +1,26 @@
 from config import *
 from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from database import SessionLocal
+from database import get_async_db, get_db
 from models import game as game_model, user as user_model
 from pydantic import BaseModel
 from models import chunk as chunk_model
 from datetime import datetime
-import random
-import json
-from routes.auth import get_current_user
-from openai import OpenAI
-import os
+from routes.auth import get_current_user, get_current_user_async
+from monitoring import metrics
+from crud import rounds as rounds_crud
+from game_cache import (
+    game_cache,
+    get_async_game_read_db,
+    get_game_read_db,
+    get_user_read_db,
+)
+import aggregates
+import stimuli
+from llm import get_openai_client
 
 router = APIRouter()
-openai_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 
 # ---------- Request Models ----------
 class ChunkStartRequest(BaseModel):
@@ -35,19 +34,24 @@ class ChunkSubmitRequest(BaseModel):
     response_time: float
 
 
+def _current_sequence(state: dict):
+    """Digits for this round; games from before seeding stored them in state."""
+    if "sequence" in state:
+        return state["sequence"]
+    return stimuli.chunk_sequence(state["seed"], state["round"], state["length"])
+
+
 # ---------- Start Route ----------
-@router.post("/chunk/start", tags=["Chunking Challenge"])
-def start_chunk_game(
-    payload: ChunkStartRequest,
-    db: Session = Depends(get_db),
-    current_user: user_model.User = Depends(get_current_user),
+def _start_chunk_game(
+    db: Session, payload: ChunkStartRequest, current_user: user_model.User
 ):
-    sequence = random.sample(range(10), payload.length)
+    seed = stimuli.new_seed()
+    sequence = stimuli.chunk_sequence(seed, 1, payload.length)
 
     state = {
-        "sequence": sequence,
+        "seed": seed,
+        "length": payload.length,
         "round": 1,
-        "log": [],
         "max_chunk_size": payload.max_chunk_size,
         "total_score": 0,
     }
@@ -57,9 +61,10 @@ def start_chunk_game(
         game_type="chunking",
         difficulty="medium",
         score=0,
-        state=json.dumps(state),
+        state=state,
     )
     db.add(new_game)
+    aggregates.record_game(db, current_user.id, "chunking", state)
     db.commit()
     db.refresh(new_game)
 
@@ -70,19 +75,37 @@ def start_chunk_game(
     }
 
 
+if settings.USE_ASYNC_DB:
+
+    @router.post("/chunk/start", tags=["Chunking Challenge"])
+    async def start_chunk_game(
+        payload: ChunkStartRequest,
+        db: AsyncSession = Depends(get_async_db),
+        current_user: user_model.User = Depends(get_current_user_async),
+    ):
+        return await db.run_sync(_start_chunk_game, payload, current_user)
+
+else:
+
+    @router.post("/chunk/start", tags=["Chunking Challenge"])
+    def start_chunk_game(
+        payload: ChunkStartRequest,
+        db: Session = Depends(get_db),
+        current_user: user_model.User = Depends(get_current_user),
+    ):
+        return _start_chunk_game(db, payload, current_user)
+
+
 # ---------- Submit Route ----------
-@router.post("/chunk/submit", tags=["Chunking Challenge"])
-def submit_chunk_response(
-    payload: ChunkSubmitRequest,
-    db: Session = Depends(get_db),
-    current_user: user_model.User = Depends(get_current_user),
+def _submit_chunk_response(
+    db: Session, payload: ChunkSubmitRequest, current_user: user_model.User
 ):
-    game = db.query(game_model.Game).filter(game_model.Game.id == payload.game_id).first()
+    game = game_cache.load(db, payload.game_id)
     if not game or game.user_id != current_user.id:
         raise HTTPException(status_code=404, detail="Game not found")
 
-    state = json.loads(game.state or "{}")
-    expected_sequence = state["sequence"]
+    state = game.state or {}
+    expected_sequence = _current_sequence(state)
     flat_chunks = [item for chunk in payload.chunks for item in chunk]
 
     is_correct = flat_chunks == expected_sequence
@@ -104,7 +127,8 @@ def submit_chunk_response(
         score = int(base - time_penalty)
         game.score += score
 
-    state["log"].append({
+    rounds_crud.take_legacy_log(game, state)
+    round_log = {
         "round": state["round"],
         "chunks": payload.chunks,
         "flat_sequence": flat_chunks,
@@ -113,14 +137,18 @@ def submit_chunk_response(
         "style": chunk_style,
         "response_time": payload.response_time,
         "score": score
-    })
+    }
+    rounds_crud.append_round(game, state["round"], round_log)
+    aggregates.record_round(game, round_log)
 
     # Prepare next round
-    new_sequence = random.sample(range(10), len(expected_sequence))
-    state["sequence"] = new_sequence
+    state.pop("sequence", None)
+    state.setdefault("seed", stimuli.new_seed())
+    state.setdefault("length", len(expected_sequence))
     state["round"] += 1
-    game.state = json.dumps(state)
-    db.commit()
+    new_sequence = _current_sequence(state)
+    game.state = state
+    game_cache.save(db, game)
 
     return {
         "correct": is_correct,
@@ -131,23 +159,39 @@ def submit_chunk_response(
             "sequence": new_sequence,
             "round": state["round"]
         },
-        "round_log": state["log"][-1]
+        "round_log": round_log
     }
 
 
+if settings.USE_ASYNC_DB:
+
+    @router.post("/chunk/submit", tags=["Chunking Challenge"])
+    async def submit_chunk_response(
+        payload: ChunkSubmitRequest,
+        db: AsyncSession = Depends(get_async_db),
+        current_user: user_model.User = Depends(get_current_user_async),
+    ):
+        return await db.run_sync(_submit_chunk_response, payload, current_user)
+
+else:
+
+    @router.post("/chunk/submit", tags=["Chunking Challenge"])
+    def submit_chunk_response(
+        payload: ChunkSubmitRequest,
+        db: Session = Depends(get_db),
+        current_user: user_model.User = Depends(get_current_user),
+    ):
+        return _submit_chunk_response(db, payload, current_user)
+
+
 # ---------- Stats Route ----------
-@router.get("/chunk/stats", tags=["Chunking Challenge"])
-def get_chunk_stats(
-    game_id: int = Query(...),
-    db: Session = Depends(get_db),
-    current_user: user_model.User = Depends(get_current_user),
-):
+def _get_chunk_stats(db: Session, game_id: int, current_user: user_model.User):
     game = db.query(game_model.Game).filter(game_model.Game.id == game_id).first()
     if not game or game.user_id != current_user.id:
         raise HTTPException(status_code=404, detail="Game not found")
 
-    state = json.loads(game.state or "{}")
-    logs = state.get("log", [])
+    state = game.state or {}
+    logs = rounds_crud.get_round_log(db, game.id, state)
     if not logs:
         return {"message": "No rounds played."}
 
@@ -166,6 +210,29 @@ def get_chunk_stats(
         "dominant_style": dominant,
         "final_score": game.score
     }
+
+
+if settings.USE_ASYNC_DB:
+
+    @router.get("/chunk/stats", tags=["Chunking Challenge"])
+    async def get_chunk_stats(
+        game_id: int = Query(...),
+        db: AsyncSession = Depends(get_async_game_read_db),
+        current_user: user_model.User = Depends(get_current_user_async),
+    ):
+        return await db.run_sync(_get_chunk_stats, game_id, current_user)
+
+else:
+
+    @router.get("/chunk/stats", tags=["Chunking Challenge"])
+    def get_chunk_stats(
+        game_id: int = Query(...),
+        db: Session = Depends(get_game_read_db),
+        current_user: user_model.User = Depends(get_current_user),
+    ):
+        return _get_chunk_stats(db, game_id, current_user)
+
+
 @router.get("/chunk/feedback", tags=["Chunking Challenge"])
 def chunk_feedback(
     game_id: int,
@@ -181,6 +248,7 @@ def chunk_feedback(
         raise HTTPException(status_code=404, detail="Game not found")
 
     rounds = db.query(chunk_model.ChunkRound).filter(
+        chunk_model.ChunkRound.user_id == current_user.id,
         chunk_model.ChunkRound.game_id == game_id
     ).order_by(chunk_model.ChunkRound.round_number).all()
 
@@ -211,49 +279,39 @@ Format:
 **💡 Tip:** <1-sentence improvement tip>
 """
 
-    response = openai_client.chat.completions.create(
-        model="gpt-4",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.8
-    )
+    with metrics.llm_timer():
+        response = get_openai_client().chat.completions.create(
+            model="gpt-4",
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0.8
+        )
 
     return {
         "feedback": response.choices[0].message.content
     }
 @router.get("/chunk/brain_profile", tags=["Chunking Challenge"])
 def chunk_brain_profile(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_user_read_db),
     current_user: user_model.User = Depends(get_current_user)
 ):
-    # Get all user games
-    games = db.query(chunk_model.ChunkGame).filter(
-        chunk_model.ChunkGame.user_id == current_user.id,
-        chunk_model.ChunkGame.correct != None
-    ).all()
-
-    if not games:
+    agg = aggregates.get_aggregate(db, current_user.id, "chunking")
+    if agg is None or not agg.rounds:
         return {"message": "No completed chunking games found."}
 
-    total_games = len(games)
-    total_correct = sum(g.correct for g in games)
-    total_rounds = sum(g.total_rounds for g in games)
+    total_games = agg.games
+    total_correct = round(agg.correct)
+    total_rounds = agg.rounds
 
-    rounds_all = db.query(chunk_model.ChunkRound).join(chunk_model.ChunkGame).filter(
-        chunk_model.ChunkGame.user_id == current_user.id
-    ).all()
-
-    avg_response_time = round(sum(r.response_time for r in rounds_all) / len(rounds_all) / 1000, 2)  # in seconds
-    sequence_lengths = [len(r.original_sequence.split()) for r in rounds_all]
-    consistency = round(
-        (max(sequence_lengths) - min(sequence_lengths)) / max(1, len(sequence_lengths)), 2
-    )
+    avg_response_time = aggregates.summary(agg)["avg_response_time"]  # in seconds
+    shortest, longest = agg.extras.get("sequence_length", (0, 0))
+    consistency = round((longest - shortest) / max(1, total_rounds), 2)
 
     prompt = f"""
 You're a neuroscientist analyzing a user's chunking memory strategy across {total_games} games.
 
 They completed {total_rounds} rounds total and got {total_correct} correct.
 Their average response time is {avg_response_time} seconds.
-Their sequence lengths varied like this: {sequence_lengths}
+Their sequence lengths ranged from {shortest} to {longest} digits.
 Their sequence complexity consistency score is: {consistency}
 
 Please return:
@@ -269,11 +327,12 @@ Respond like this:
 **💡 Tip:** <1-sentence tip>
 """
 
-    response = openai_client.chat.completions.create(
-        model="gpt-4",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.8
-    )
+    with metrics.llm_timer():
+        response = get_openai_client().chat.completions.create(
+            model="gpt-4",
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0.8
+        )
 
     return {
         "summary": response.choices[0].message.content,
@@ -0,0 +1,44 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Path, Query
+from sqlalchemy.orm import Session
+from cohorts import METRICS
+from database import get_read_db
+from models import user as user_model
+from models.cohort_stat import CohortStat
+from routes.auth import get_current_user
+
+router = APIRouter()
+
+
+@router.get("/cohorts/{metric}", tags=["Cohort Analytics"])
+def get_cohort_stats(
+    metric: str = Path(
+        ..., description="One of: pattern_grid, stroop_interference, nback_progression"
+    ),
+    cohort: Optional[str] = Query(
+        None, description='First-game month "YYYY-MM" or "all"; default every cohort'
+    ),
+    db: Session = Depends(get_read_db),
+    current_user: user_model.User = Depends(get_current_user),
+):
+    """Last nightly run of a cohort metric (see cohorts.py)."""
+    if metric not in METRICS:
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid metric. Choose from: " + ", ".join(METRICS) + ".",
+        )
+    query = db.query(CohortStat).filter(CohortStat.metric == metric)
+    if cohort is not None:
+        query = query.filter(CohortStat.cohort == cohort)
+    rows = query.order_by(CohortStat.cohort).all()
+    if not rows:
+        raise HTTPException(status_code=404, detail="No cohort stats computed yet")
+
+    return {
+        "metric": metric,
+        "computed_at": max(row.computed_at for row in rows).isoformat(),
+        "cohorts": [
+            {"cohort": row.cohort, "users": row.users, **row.stats} for row in rows
+        ],
+    }
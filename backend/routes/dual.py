@@ -1,27 +1,33 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from database import SessionLocal
+from config import settings
+from database import get_async_db, get_db
 from models import game as game_model, user as user_model, dual as dual_model
 from pydantic import BaseModel
 from datetime import datetime
-import random
-import json
-from routes.auth import get_current_user
-from openai import OpenAI
-import os
+from routes.auth import get_current_user, get_current_user_async
+from monitoring import metrics
+from crud import rounds as rounds_crud, summaries as summaries_crud
+from game_cache import (
+    game_cache,
+    get_async_game_read_db,
+    get_game_read_db,
+    get_user_read_db,
+)
+import aggregates
+import stimuli
+from llm import get_openai_client
 
-openai_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 router = APIRouter()
 LETTERS = list("ABCDEFGH")
 
 
-# ------------------- Dependency -------------------
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+def _stimulus(state: dict, index: int):
+    """Item shown at step `index`; games started before seeding stored them all."""
+    if "sequence" in state:
+        return state["sequence"][index]
+    return stimuli.dual_item(state["seed"], index, state.get("grid_size", 3), LETTERS)
 
 
 # ------------------- Request Models -------------------
@@ -37,28 +43,17 @@ class DualSubmitRequest(BaseModel):
 
 
 # ------------------- Start Route -------------------
-@router.post("/start", tags=["Dual N-Back"])
-def start_dual_nback(
-    payload: DualStartRequest,
-    db: Session = Depends(get_db),
-    current_user: user_model.User = Depends(get_current_user),
+def _start_dual_nback(
+    db: Session, payload: DualStartRequest, current_user: user_model.User
 ):
     n = payload.n
     total_rounds = 20
     grid_size = 3
 
-    sequence = [
-        {
-            "grid_pos": random.randint(0, grid_size * grid_size - 1),
-            "letter": random.choice(LETTERS),
-        }
-        for _ in range(total_rounds)
-    ]
-
     state = {
-        "sequence": sequence,
+        "seed": stimuli.new_seed(),
+        "grid_size": grid_size,
         "current_round": 0,
-        "log": [],
         "n": n,
         "score": 0,
         "max_rounds": total_rounds,
@@ -69,13 +64,14 @@ def start_dual_nback(
         game_type="dual_nback",
         difficulty=f"N={n}",
         score=0,
-        state=json.dumps(state),
+        state=state,
     )
     db.add(new_game)
+    aggregates.record_game(db, current_user.id, "dual_nback", state)
     db.commit()
     db.refresh(new_game)
 
-    first_item = sequence[0]
+    first_item = _stimulus(state, 0)
     return {
         "game_id": new_game.id,
         "n": n,
@@ -85,35 +81,50 @@ def start_dual_nback(
     }
 
 
+if settings.USE_ASYNC_DB:
+
+    @router.post("/start", tags=["Dual N-Back"])
+    async def start_dual_nback(
+        payload: DualStartRequest,
+        db: AsyncSession = Depends(get_async_db),
+        current_user: user_model.User = Depends(get_current_user_async),
+    ):
+        return await db.run_sync(_start_dual_nback, payload, current_user)
+
+else:
+
+    @router.post("/start", tags=["Dual N-Back"])
+    def start_dual_nback(
+        payload: DualStartRequest,
+        db: Session = Depends(get_db),
+        current_user: user_model.User = Depends(get_current_user),
+    ):
+        return _start_dual_nback(db, payload, current_user)
+
+
 # ------------------- Submit Route -------------------
-@router.post("/submit", tags=["Dual N-Back"])
-def submit_dual_nback(
-    payload: DualSubmitRequest,
-    db: Session = Depends(get_db),
-    current_user: user_model.User = Depends(get_current_user),
+def _submit_dual_nback(
+    db: Session, payload: DualSubmitRequest, current_user: user_model.User
 ):
-    game = (
-        db.query(game_model.Game).filter(game_model.Game.id == payload.game_id).first()
-    )
+    game = game_cache.load(db, payload.game_id)
     if not game or game.user_id != current_user.id:
         raise HTTPException(status_code=404, detail="Game not found")
 
-    state = json.loads(game.state or "{}")
-    sequence = state.get("sequence", [])
+    state = game.state or {}
     round_num = state.get("current_round", 0)
     n = state.get("n", 2)
     max_rounds = state.get("max_rounds", 20)
-    log = state.get("log", [])
+    rounds_crud.take_legacy_log(game, state)
 
-    if round_num >= len(sequence):
+    if round_num >= max_rounds:
         return {"message": "Game already completed."}
 
-    current_item = sequence[round_num]
+    current_item = _stimulus(state, round_num)
     target_index = round_num - n
     correct_letter = correct_pos = False
 
     if target_index >= 0:
-        target_item = sequence[target_index]
+        target_item = _stimulus(state, target_index)
         correct_letter = target_item["letter"] == current_item["letter"]
         correct_pos = target_item["grid_pos"] == current_item["grid_pos"]
 
@@ -134,19 +145,25 @@ def submit_dual_nback(
         "score": score,
     }
 
-    log.append(round_log)
+    rounds_crud.append_round(game, round_num + 1, round_log)
+    aggregates.record_round(game, round_log)
     game.score += score
 
-    state.update({"current_round": round_num + 1, "log": log})
+    state["current_round"] = round_num + 1
 
     if round_num + 1 >= max_rounds:
         state["finished"] = True
         game.end_time = datetime.utcnow()
 
-    game.state = json.dumps(state)
-    db.commit()
+    game.state = state
+    game_cache.save(db, game)
+    if game.end_time is not None:
+        log = rounds_crud.get_round_log(db, game.id, state)
+        summaries_crud.record_summary(
+            db, game, _dual_stats(game.id, game.score, state, log)
+        )
 
-    next_item = sequence[round_num + 1] if round_num + 1 < max_rounds else None
+    next_item = _stimulus(state, round_num + 1) if round_num + 1 < max_rounds else None
 
     return {
         "correct_letter": correct_letter,
@@ -167,19 +184,29 @@ def submit_dual_nback(
     }
 
 
-# ------------------- Stats Route -------------------
-@router.get("/stats", tags=["Dual N-Back"])
-def dual_nback_stats(
-    game_id: int = Query(...),
-    db: Session = Depends(get_db),
-    current_user: user_model.User = Depends(get_current_user),
-):
-    game = db.query(game_model.Game).filter(game_model.Game.id == game_id).first()
-    if not game or game.user_id != current_user.id:
-        raise HTTPException(status_code=404, detail="Game not found")
+if settings.USE_ASYNC_DB:
+
+    @router.post("/submit", tags=["Dual N-Back"])
+    async def submit_dual_nback(
+        payload: DualSubmitRequest,
+        db: AsyncSession = Depends(get_async_db),
+        current_user: user_model.User = Depends(get_current_user_async),
+    ):
+        return await db.run_sync(_submit_dual_nback, payload, current_user)
+
+else:
+
+    @router.post("/submit", tags=["Dual N-Back"])
+    def submit_dual_nback(
+        payload: DualSubmitRequest,
+        db: Session = Depends(get_db),
+        current_user: user_model.User = Depends(get_current_user),
+    ):
+        return _submit_dual_nback(db, payload, current_user)
 
-    state = json.loads(game.state or "{}")
-    log = state.get("log", [])
+
+# ------------------- Stats Route -------------------
+def _dual_stats(game_id: int, score: int, state: dict, log: list):
     if not log:
         return {"message": "No rounds played."}
 
@@ -191,17 +218,54 @@ def dual_nback_stats(
     avg_time = sum(r["response_time"] for r in log) / total_rounds
 
     return {
-        "game_id": game.id,
+        "game_id": game_id,
         "total_rounds": total_rounds,
         "correct_letter_matches": letter_correct,
         "correct_position_matches": pos_correct,
         "accuracy_percent": round((total_correct / total_responses) * 100, 2),
         "average_response_time_sec": round(avg_time, 2),
-        "final_score": game.score,
+        "final_score": score,
         "finished": state.get("finished", False),
     }
 
 
+def _dual_nback_stats(db: Session, game_id: int, current_user: user_model.User):
+    summary = summaries_crud.get_summary(db, game_id)
+    if summary:
+        if summary.user_id != current_user.id:
+            raise HTTPException(status_code=404, detail="Game not found")
+        return summary.stats
+
+    game = db.query(game_model.Game).filter(game_model.Game.id == game_id).first()
+    if not game or game.user_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Game not found")
+
+    state = game.state or {}
+    log = rounds_crud.get_round_log(db, game.id, state)
+    return _dual_stats(game.id, game.score, state, log)
+
+
+if settings.USE_ASYNC_DB:
+
+    @router.get("/stats", tags=["Dual N-Back"])
+    async def dual_nback_stats(
+        game_id: int = Query(...),
+        db: AsyncSession = Depends(get_async_game_read_db),
+        current_user: user_model.User = Depends(get_current_user_async),
+    ):
+        return await db.run_sync(_dual_nback_stats, game_id, current_user)
+
+else:
+
+    @router.get("/stats", tags=["Dual N-Back"])
+    def dual_nback_stats(
+        game_id: int = Query(...),
+        db: Session = Depends(get_game_read_db),
+        current_user: user_model.User = Depends(get_current_user),
+    ):
+        return _dual_nback_stats(db, game_id, current_user)
+
+
 @router.get("/feedback", tags=["Dual N-Back"])
 def dual_feedback(
     game_id: int,
@@ -222,7 +286,10 @@ def dual_feedback(
 
     rounds = (
         db.query(dual_model.DualRound)
-        .filter(dual_model.DualRound.game_id == game_id)
+        .filter(
+            dual_model.DualRound.user_id == current_user.id,
+            dual_model.DualRound.game_id == game_id,
+        )
         .order_by(dual_model.DualRound.round_number)
         .all()
     )
@@ -259,62 +326,44 @@ Format:
 **💡 Tip:** <1-line tip>
 """
 
-    response = openai_client.chat.completions.create(
-        model="gpt-4", messages=[{"role": "user", "content": prompt}], temperature=0.7
-    )
+    with metrics.llm_timer():
+        response = get_openai_client().chat.completions.create(
+            model="gpt-4",
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0.7,
+        )
 
     return {"feedback": response.choices[0].message.content}
 
 
 @router.get("/brain_profile", tags=["Dual N-Back"])
 def dual_brain_profile(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_user_read_db),
     current_user: user_model.User = Depends(get_current_user),
 ):
-    games = (
-        db.query(game_model.Game)
-        .filter(
-            game_model.Game.user_id == current_user.id,
-            game_model.Game.game_type == "dual_nback",
-            game_model.Game.end_time != None,
-        )
-        .all()
-    )
-
-    if not games:
+    agg = aggregates.get_aggregate(db, current_user.id, "dual_nback")
+    if agg is None or not agg.games:
         return {"message": "No completed dual n-back games found."}
 
-    all_logs = []
-    for game in games:
-        state = json.loads(game.state or "{}")
-        all_logs.extend(state.get("log", []))
-
-    if len(all_logs) < 5:
+    if agg.rounds < 5:
         return {"message": "Not enough data to generate profile."}
 
-    accuracies = [
-        int(r["letter_match"] == r["correct_letter"])
-        + int(r["position_match"] == r["correct_pos"])
-        for r in all_logs
-    ]
-    response_times = [r.get("response_time", 0) for r in all_logs]
-    n_levels = [
-        state.get("n", 2) for state in [json.loads(g.state or "{}") for g in games]
-    ]
+    totals = aggregates.summary(agg)
+    lowest_n, highest_n = agg.extras.get("n", (2, 2))
 
-    avg_accuracy = round(sum(accuracies) / (len(accuracies) * 2) * 100, 2)
-    avg_response = round(sum(response_times) / len(response_times), 2)
-    consistency = round((max(n_levels) - min(n_levels)) / max(1, len(n_levels)), 2)
+    avg_accuracy = totals["accuracy_percent"]
+    avg_response = totals["avg_response_time"]
+    consistency = round((highest_n - lowest_n) / max(1, agg.games), 2)
 
     prompt = f"""
 You're a neuroscientist analyzing a user's long-term performance in the Dual N-Back game.
 
-They played {len(games)} sessions and completed {len(all_logs)} rounds.
+They played {agg.games} sessions and completed {agg.rounds} rounds.
 
 Stats:
 - Avg Accuracy: {avg_accuracy}%
 - Avg Response Time: {avg_response} seconds
-- N-Back Levels Across Games: {n_levels}
+- N-Back Levels Across Games: {lowest_n} to {highest_n}
 - N-Level Consistency Score: {consistency}
 
 Return:
@@ -331,16 +380,17 @@ Format:
 """
 
     try:
-        response = openai_client.chat.completions.create(
-            model="gpt-4",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.7,
-        )
+        with metrics.llm_timer():
+            response = get_openai_client().chat.completions.create(
+                model="gpt-4",
+                messages=[{"role": "user", "content": prompt}],
+                temperature=0.7,
+            )
 
         return {
             "summary": response.choices[0].message.content,
-            "games_analyzed": len(games),
-            "rounds_total": len(all_logs),
+            "games_analyzed": agg.games,
+            "rounds_total": agg.rounds,
             "accuracy_percent": avg_accuracy,
             "avg_response_time_sec": avg_response,
             "n_level_consistency_score": consistency,
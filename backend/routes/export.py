@@ -0,0 +1,264 @@
+"""Streaming export of a user's full round history as NDJSON or CSV.
+
+Every round the user played, from every table that holds rounds, one
+record per round:
+
+  source      table the round came from (game_archives for archived games)
+  game_type   pattern, dual_nback, stroop, chunking, binary, ...
+  game_id     id in the source's game table
+  round       round (turn) number
+  timestamp   when it was stored, if the table records it
+  data        the rest of the round: the round log entry for game_rounds
+              and game_archives, the remaining columns otherwise
+
+The pattern submit route writes each round to both game_rounds and
+pattern_rounds, so pattern_rounds rows of a game that game_rounds or
+game_archives already covers are skipped; only older games' rows remain.
+
+Rows are read through server-side cursors, EXPORT_BATCH_SIZE at a time, and
+written out as they come, so the response needs the same memory for a
+hundred rounds as for millions.
+
+Exports read from the replica when one is configured, so rounds stored in
+the last few seconds (up to READ_REPLICA_MAX_LAG_SECONDS) may be missing.
+The exception is a user with games whose rounds are still buffered in the
+active-game cache: those are flushed and the export reads from the primary.
+"""
+import csv
+import io
+import json
+import zlib
+from datetime import date, datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import exists, false, or_
+
+import archival
+from config import settings
+from database import SessionLocal, read_session
+from game_cache import game_cache
+from models import user as user_model
+from models.binary import BinaryRound
+from models.chunk import ChunkRound
+from models.dual import DualRound
+from models.game import Game
+from models.game_round import GameRound
+from models.pattern_round import PatternRound
+from models.stroop import StroopRound
+from routes.auth import get_current_user
+
+router = APIRouter()
+
+FIELDS = ("source", "game_type", "game_id", "round", "timestamp", "data")
+FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+CHUNK_BYTES = 64 * 1024
+ARCHIVED_GAMES_PER_BATCH = 20  # each one decompresses to its whole round log
+
+# Per-game round tables: (model, game type, round number column)
+ROUND_TABLES = [
+    (PatternRound, "pattern", PatternRound.round_number),
+    (DualRound, "dual_nback", DualRound.round_number),
+    (StroopRound, "stroop", StroopRound.round_number),
+    (ChunkRound, "chunking", ChunkRound.round_number),
+    (BinaryRound, "binary", BinaryRound.turn),
+]
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _record(source, game_type, game_id, round_number, timestamp, data):
+    return {
+        "source": source,
+        "game_type": game_type,
+        "game_id": game_id,
+        "round": round_number,
+        "timestamp": timestamp.isoformat() if timestamp else None,
+        "data": data,
+    }
+
+
+def _game_rounds(db, user_id, batch_size):
+    rows = (
+        db.query(
+            Game.game_type,
+            GameRound.game_id,
+            GameRound.round_number,
+            GameRound.created_at,
+            GameRound.entry,
+        )
+        .join(Game, Game.id == GameRound.game_id)
+        .filter(Game.user_id == user_id)
+        .order_by(GameRound.game_id, GameRound.id)
+        .yield_per(batch_size)
+    )
+    for row in rows:
+        yield _record(
+            "game_rounds",
+            row.game_type,
+            row.game_id,
+            row.round_number,
+            row.created_at,
+            row.entry,
+        )
+
+
+def _archived_rounds(db, user_id):
+    """Rounds of archived games, decompressing a batch of games at a time."""
+    last_id = 0
+    while True:
+        games = (
+            db.query(Game.id, Game.game_type)
+            .filter(
+                Game.user_id == user_id,
+                Game.id > last_id,
+                Game.state["archived"].as_boolean(),
+            )
+            .order_by(Game.id)
+            .limit(ARCHIVED_GAMES_PER_BATCH)
+            .all()
+        )
+        if not games:
+            return
+        archives = archival.load_archives(db, [game.id for game in games])
+        for game in games:
+            rounds = archives.get(game.id, {}).get("rounds", [])
+            for i, entry in enumerate(rounds, 1):
+                yield _record(
+                    "game_archives",
+                    game.game_type,
+                    game.id,
+                    entry.get("round", i),
+                    None,
+                    entry,
+                )
+        last_id = games[-1].id
+
+
+def _exported_elsewhere(model):
+    """Whether a `model` row's game was exported from game_rounds/game_archives."""
+    if not any(fk.column.table is Game.__table__ for fk in model.game_id.foreign_keys):
+        return false()  # its own game table, never in game_rounds
+    return or_(
+        exists().where(GameRound.game_id == model.game_id),
+        exists().where(
+            Game.id == model.game_id, Game.state["archived"].as_boolean()
+        ),
+    )
+
+
+def _table_rounds(db, user_id, batch_size):
+    for model, game_type, round_column in ROUND_TABLES:
+        skip = {"id", "game_id", "user_id", "timestamp", round_column.name}
+        data_columns = [
+            column for column in model.__table__.columns if column.name not in skip
+        ]
+        rows = (
+            db.query(
+                model.game_id,
+                round_column.label("round"),
+                model.timestamp,
+                *data_columns,
+            )
+            .filter(model.user_id == user_id, ~_exported_elsewhere(model))
+            .order_by(model.game_id, round_column, model.id)
+            .yield_per(batch_size)
+        )
+        for row in rows:
+            yield _record(
+                model.__tablename__,
+                game_type,
+                row.game_id,
+                row.round,
+                row.timestamp,
+                {column.name: getattr(row, column.name) for column in data_columns},
+            )
+
+
+def export_records(db, user_id: int, batch_size: int = 1000):
+    """Every round of the user's, one dict per round (see FIELDS)."""
+    yield from _game_rounds(db, user_id, batch_size)
+    yield from _archived_rounds(db, user_id)
+    yield from _table_rounds(db, user_id, batch_size)
+
+
+def _ndjson_lines(records):
+    for record in records:
+        yield json.dumps(record, default=_json_default, separators=(",", ":")) + "\n"
+
+
+def _csv_lines(records):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(FIELDS)
+    for record in records:
+        record["data"] = json.dumps(
+            record["data"], default=_json_default, separators=(",", ":")
+        )
+        writer.writerow([record[field] for field in FIELDS])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def _chunks(lines):
+    """Join lines into ~CHUNK_BYTES pieces so each write is worth sending."""
+    pending, size = [], 0
+    for line in lines:
+        pending.append(line)
+        size += len(line)
+        if size >= CHUNK_BYTES:
+            yield "".join(pending).encode()
+            pending, size = [], 0
+    if pending:
+        yield "".join(pending).encode()
+
+
+def _gzipped(chunks):
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def stream_export(user_id: int, fmt: str, gzip: bool = False):
+    """Encoded export body; owns its session, which outlives the request's."""
+    buffered = game_cache.dirty_user(user_id)
+    db = SessionLocal() if buffered else read_session()
+    try:
+        if buffered:
+            game_cache.flush_user(db, user_id)
+        records = export_records(db, user_id, settings.EXPORT_BATCH_SIZE)
+        lines = _csv_lines(records) if fmt == "csv" else _ndjson_lines(records)
+        chunks = _chunks(lines)
+        yield from _gzipped(chunks) if gzip else chunks
+    finally:
+        db.close()
+
+
+@router.get("/export/rounds", tags=["Export"])
+def export_rounds(
+    fmt: str = Query("ndjson", alias="format", description="ndjson or csv"),
+    gzip: bool = Query(False, description="gzip the file"),
+    current_user: user_model.User = Depends(get_current_user),
+):
+    if fmt not in FORMATS:
+        raise HTTPException(
+            status_code=400, detail="Invalid format. Choose from: ndjson, csv."
+        )
+    filename = f"brainbrew-rounds-{current_user.id}.{fmt}"
+    media_type = FORMATS[fmt]
+    if gzip:
+        filename += ".gz"
+        media_type = "application/gzip"
+    return StreamingResponse(
+        stream_export(current_user.id, fmt, gzip),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, JSON
 from sqlalchemy.orm import Session, relationship
-from database import SessionLocal, Base
+from database import Base, get_db
 from models import user as user_model, game as game_model
 from datetime import datetime
 from pydantic import BaseModel
@@ -9,14 +9,6 @@ import random
 
 router = APIRouter()
 
-# Dependency
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 # Pydantic model for starting game
 class GameStartRequest(BaseModel):
     user_id: int
@@ -0,0 +1,103 @@
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Path, Query
+from sqlalchemy.orm import Session
+from database import get_read_db
+from leaderboards import PERIODS, leaderboards, period_start
+from models import user as user_model
+from models.leaderboard_entry import LeaderboardEntry
+from routes.auth import get_current_user
+from routes.rank import RANKED_GAMES
+
+router = APIRouter(prefix="/leaderboard", tags=["Leaderboards"])
+
+
+def _board(game_type: str, period: str):
+    if game_type not in RANKED_GAMES:
+        raise HTTPException(
+            status_code=400, detail="Invalid game type. Choose from: pattern, dual."
+        )
+    if period not in PERIODS:
+        raise HTTPException(
+            status_code=400, detail="Invalid period. Choose from: all, daily, weekly."
+        )
+    return (
+        RANKED_GAMES[game_type],
+        period,
+        period_start(period, datetime.utcnow()),
+    )
+
+
+def _entry(entry, rank, username):
+    return {
+        "rank": rank,
+        "user_id": entry.user_id,
+        "username": username,
+        "score": entry.score,
+        "game_id": entry.game_id,
+        "achieved_at": entry.achieved_at.isoformat(),
+    }
+
+
+@router.get("/{game_type}")
+def get_leaderboard(
+    game_type: str = Path(..., description="One of: pattern, dual"),
+    period: str = Query("all", description="One of: all, daily, weekly"),
+    page: int = Query(1, ge=1),
+    per_page: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_read_db),
+    current_user: user_model.User = Depends(get_current_user),
+):
+    board = _board(game_type, period)
+    offset = (page - 1) * per_page
+    entries = leaderboards.page(db, board, offset, per_page)
+
+    usernames = dict(
+        db.query(user_model.User.id, user_model.User.username).filter(
+            user_model.User.id.in_({entry.user_id for entry in entries})
+        )
+    )
+    # Ties share a rank: the first of a score is ranked by the count above it
+    ranked, rank, previous = [], None, None
+    for position, entry in enumerate(entries, offset + 1):
+        if entry.score != previous:
+            rank = (
+                position
+                if previous is not None
+                else leaderboards.rank(db, board, entry.score)
+            )
+            previous = entry.score
+        ranked.append(_entry(entry, rank, usernames.get(entry.user_id)))
+
+    return {
+        "game_type": game_type,
+        "period": period,
+        "period_start": board[2].isoformat(),
+        "page": page,
+        "per_page": per_page,
+        "total_players": leaderboards.players(db, board),
+        "entries": ranked,
+    }
+
+
+@router.get("/{game_type}/me")
+def get_my_leaderboard_rank(
+    game_type: str = Path(..., description="One of: pattern, dual"),
+    period: str = Query("all", description="One of: all, daily, weekly"),
+    db: Session = Depends(get_read_db),
+    current_user: user_model.User = Depends(get_current_user),
+):
+    board = _board(game_type, period)
+    entry = db.get(LeaderboardEntry, (*board, current_user.id))
+    if entry is None:
+        raise HTTPException(
+            status_code=404, detail="No finished game on this leaderboard"
+        )
+    rank = leaderboards.rank(db, board, entry.score)
+    return {
+        "game_type": game_type,
+        "period": period,
+        "period_start": board[2].isoformat(),
+        "total_players": leaderboards.players(db, board),
+        **_entry(entry, rank, current_user.username),
+    }
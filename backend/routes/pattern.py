@@ -1,27 +1,23 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from database import SessionLocal
+from config import settings
+from database import get_async_db, get_db
 from models import game as game_model, user as user_model
 from pydantic import BaseModel, conint, confloat, field_validator
 from datetime import datetime
-import random
-import json
-from routes.auth import get_current_user
+from routes.auth import get_current_user, get_current_user_async
 import statistics
 from models.pattern_round import PatternRound
+from crud import rounds as rounds_crud, summaries as summaries_crud
+from game_cache import game_cache, get_async_game_read_db, get_game_read_db
+import aggregates
+import stimuli
 from typing import Annotated
 
 router = APIRouter()
 
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-
 # ------------------- Request Models -------------------
 class PatternStartRequest(BaseModel):
     grid_size: Annotated[int, conint(ge=2, le=8)] = 3
@@ -37,24 +33,35 @@ class PatternSubmitRequest(BaseModel):
             raise ValueError("Sequence cannot be empty.")
         return v
 
+def _current_sequence(state: dict):
+    """This round's cells; games started before seeding stored them in state."""
+    if "sequence" in state:
+        return state["sequence"]
+    return stimuli.pattern_sequence(
+        state["seed"],
+        state.get("round", 1),
+        state.get("grid_size", 3),
+        state.get("sequence_length", 3),
+    )
+
+
 # ------------------- Start Route -------------------
-@router.post("/start", tags=["Pattern Memory Matrix"])
-def start_pattern_game(
-    payload: PatternStartRequest,
-    db: Session = Depends(get_db),
-    current_user: user_model.User = Depends(get_current_user),
+def _start_pattern_game(
+    db: Session, payload: PatternStartRequest, current_user: user_model.User
 ):
     grid_size = payload.grid_size
-    total_cells = grid_size * grid_size
     sequence_length = 3
-    sequence = random.sample(range(total_cells), k=sequence_length)
+    seed = stimuli.new_seed()
+    sequence = stimuli.pattern_sequence(seed, 1, grid_size, sequence_length)
 
     state = {
+        "seed": seed,
         "grid_size": grid_size,
-        "sequence": sequence,
         "sequence_length": sequence_length,
         "round": 1,
-        "log": [],
+        "rounds_logged": 0,
+        "score_sum": 0,
+        "recent_correct": [],
         "correct_streak": 0,
         "max_streak": 0,
         "revive_used": False,
@@ -68,9 +75,10 @@ def start_pattern_game(
         game_type="pattern",
         difficulty="easy",
         score=0,
-        state=json.dumps(state),
+        state=state,
     )
     db.add(new_game)
+    aggregates.record_game(db, current_user.id, "pattern", state)
     db.commit()
     db.refresh(new_game)
 
@@ -82,21 +90,37 @@ def start_pattern_game(
     }
 
 
+if settings.USE_ASYNC_DB:
+
+    @router.post("/start", tags=["Pattern Memory Matrix"])
+    async def start_pattern_game(
+        payload: PatternStartRequest,
+        db: AsyncSession = Depends(get_async_db),
+        current_user: user_model.User = Depends(get_current_user_async),
+    ):
+        return await db.run_sync(_start_pattern_game, payload, current_user)
+
+else:
+
+    @router.post("/start", tags=["Pattern Memory Matrix"])
+    def start_pattern_game(
+        payload: PatternStartRequest,
+        db: Session = Depends(get_db),
+        current_user: user_model.User = Depends(get_current_user),
+    ):
+        return _start_pattern_game(db, payload, current_user)
+
+
 # ------------------- Submit Route -------------------
-@router.post("/submit", tags=["Pattern Memory Matrix"])
-def submit_pattern(
-    payload: PatternSubmitRequest,
-    db: Session = Depends(get_db),
-    current_user: user_model.User = Depends(get_current_user),
+def _submit_pattern(
+    db: Session, payload: PatternSubmitRequest, current_user: user_model.User
 ):
-    game = (
-        db.query(game_model.Game).filter(game_model.Game.id == payload.game_id).first()
-    )
+    game = game_cache.load(db, payload.game_id)
     if not game or game.user_id != current_user.id:
         raise HTTPException(status_code=404, detail="Game not found")
 
-    state = json.loads(game.state or "{}")
-    expected = state.get("sequence", [])
+    state = game.state or {}
+    expected = _current_sequence(state)
     round_num = state.get("round", 1)
     grid_size = state.get("grid_size", 3)
     sequence_length = state.get("sequence_length", 3)
@@ -105,7 +129,17 @@ def submit_pattern(
     correct_streak = state.get("correct_streak", 0)
     max_streak = state.get("max_streak", 0)
     revive_used = state.get("revive_used", False)
-    performance_log = state.get("log", [])
+
+    # Rounds live in game_rounds; the state only carries running totals.
+    # Games started before that keep a "log" list, moved over here.
+    legacy_log = rounds_crud.take_legacy_log(game, state)
+    rounds_logged = state.get("rounds_logged", len(legacy_log))
+    score_sum = state.get(
+        "score_sum", sum(r["score_this_round"] for r in legacy_log)
+    )
+    recent_correct = state.get(
+        "recent_correct", [r["correct"] for r in legacy_log[-5:]]
+    )
 
     # --- Determine outcome ---
     timed_out = payload.response_time > max_time
@@ -150,19 +184,15 @@ def submit_pattern(
 
     # --- Projected Score ---
     rounds_remaining = max_rounds - round_num
-    avg_score_so_far = (
-        sum(r["score_this_round"] for r in performance_log) / len(performance_log)
-        if performance_log
-        else 0
-    )
+    avg_score_so_far = score_sum / rounds_logged if rounds_logged else 0
     projected_final_score = int(game.score + avg_score_so_far * rounds_remaining)
 
     # --- Revive Logic ---
     allow_revive = (
         not is_correct
         and not revive_used
-        and len(performance_log) >= 5
-        and sum(1 for r in performance_log[-5:] if not r["correct"]) == 0
+        and rounds_logged >= 5
+        and all(recent_correct[-5:])
     )
     revived = False
 
@@ -172,13 +202,15 @@ def submit_pattern(
         state.update(
             {
                 "revive_used": True,
-                "log": performance_log,
+                "rounds_logged": rounds_logged,
+                "score_sum": score_sum,
+                "recent_correct": recent_correct,
                 "correct_streak": correct_streak,
                 "max_streak": max_streak,
             }
         )
-        game.state = json.dumps(state)
-        db.commit()
+        game.state = state
+        game_cache.save(db, game)
         return {
             "correct": False,
             "message": "Revive used! Try the same round again.",
@@ -204,9 +236,18 @@ def submit_pattern(
         "max_streak_so_far": max_streak,
         "projected_final_score": projected_final_score,
     }
-    performance_log.append(round_log)
+    rounds_crud.append_round(game, round_num, round_log)
+    aggregates.record_round(game, round_log)
+    state.update(
+        {
+            "rounds_logged": rounds_logged + 1,
+            "score_sum": score_sum + final_score,
+            "recent_correct": (recent_correct + [is_correct])[-5:],
+        }
+    )
     new_round = PatternRound(
         game_id=game.id,
+        user_id=game.user_id,
         round_number=round_num,
         correct=is_correct,
         mistake_type=mistake_type,
@@ -218,7 +259,7 @@ def submit_pattern(
         max_streak_so_far=max_streak,
         projected_final_score=projected_final_score,
     )
-    db.add(new_round)
+    game.add(new_round)
 
     # --- Adaptive Difficulty ---
     if is_correct and round_num < max_rounds:
@@ -228,25 +269,25 @@ def submit_pattern(
             next_length += 1
         if correct_streak >= 3 and grid_size < 6:
             grid_size += 1
-        total_cells = grid_size * grid_size
-        new_sequence = random.sample(
-            range(total_cells), k=min(next_length, total_cells)
+        # Games from before seeding carry the sequence itself; move them over
+        state.pop("sequence", None)
+        seed = state.setdefault("seed", stimuli.new_seed())
+        new_sequence = stimuli.pattern_sequence(
+            seed, round_num + 1, grid_size, next_length
         )
 
         state.update(
             {
                 "grid_size": grid_size,
-                "sequence": new_sequence,
                 "sequence_length": next_length,
                 "round": round_num + 1,
-                "log": performance_log,
                 "correct_streak": correct_streak,
                 "max_streak": max_streak,
                 "revive_used": revive_used,
             }
         )
-        game.state = json.dumps(state)
-        db.commit()
+        game.state = state
+        game_cache.save(db, game)
 
         return {
             "correct": True,
@@ -262,7 +303,6 @@ def submit_pattern(
     winner = "Player" if is_correct and round_num >= max_rounds else "Game"
     state.update(
         {
-            "log": performance_log,
             "winner": winner,
             "correct_streak": correct_streak,
             "max_streak": max_streak,
@@ -270,8 +310,12 @@ def submit_pattern(
         }
     )
     game.end_time = datetime.utcnow()
-    game.state = json.dumps(state)
-    db.commit()
+    game.state = state
+    game_cache.save(db, game)
+    log = rounds_crud.get_round_log(db, game.id, state)
+    summaries_crud.record_summary(
+        db, game, _pattern_stats(game.id, game.score, state, log), winner=winner
+    )
 
     return {
         "correct": is_correct,
@@ -286,19 +330,29 @@ def submit_pattern(
     }
 
 
-# ------------------- Stats Route -------------------
-@router.get("/stats", tags=["Pattern Memory Matrix"])
-def get_pattern_stats(
-    game_id: int = Query(...),
-    db: Session = Depends(get_db),
-    current_user: user_model.User = Depends(get_current_user),
-):
-    game = db.query(game_model.Game).filter(game_model.Game.id == game_id).first()
-    if not game or game.user_id != current_user.id:
-        raise HTTPException(status_code=404, detail="Game not found")
+if settings.USE_ASYNC_DB:
+
+    @router.post("/submit", tags=["Pattern Memory Matrix"])
+    async def submit_pattern(
+        payload: PatternSubmitRequest,
+        db: AsyncSession = Depends(get_async_db),
+        current_user: user_model.User = Depends(get_current_user_async),
+    ):
+        return await db.run_sync(_submit_pattern, payload, current_user)
+
+else:
 
-    state = json.loads(game.state or "{}")
-    log = state.get("log", [])
+    @router.post("/submit", tags=["Pattern Memory Matrix"])
+    def submit_pattern(
+        payload: PatternSubmitRequest,
+        db: Session = Depends(get_db),
+        current_user: user_model.User = Depends(get_current_user),
+    ):
+        return _submit_pattern(db, payload, current_user)
+
+
+# ------------------- Stats Route -------------------
+def _pattern_stats(game_id: int, score: int, state: dict, log: list):
     if not log:
         return {"message": "No rounds played yet."}
 
@@ -326,24 +380,62 @@ def get_pattern_stats(
         "response_time_stddev": time_stddev,
         "mistake_breakdown": mistake_breakdown,
         "final_sequence_length": final_sequence_length,
-        "final_score": game.score,
+        "final_score": score,
         "max_streak": state.get("max_streak", 0),
         "winner": state.get("winner", None),
     }
 
 
+def _get_pattern_stats(db: Session, game_id: int, current_user: user_model.User):
+    summary = summaries_crud.get_summary(db, game_id)
+    if summary:
+        if summary.user_id != current_user.id:
+            raise HTTPException(status_code=404, detail="Game not found")
+        return summary.stats
+
+    game = db.query(game_model.Game).filter(game_model.Game.id == game_id).first()
+    if not game or game.user_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Game not found")
+
+    state = game.state or {}
+    log = rounds_crud.get_round_log(db, game.id, state)
+    return _pattern_stats(game.id, game.score, state, log)
+
+
+if settings.USE_ASYNC_DB:
+
+    @router.get("/stats", tags=["Pattern Memory Matrix"])
+    async def get_pattern_stats(
+        game_id: int = Query(...),
+        db: AsyncSession = Depends(get_async_game_read_db),
+        current_user: user_model.User = Depends(get_current_user_async),
+    ):
+        return await db.run_sync(_get_pattern_stats, game_id, current_user)
+
+else:
+
+    @router.get("/stats", tags=["Pattern Memory Matrix"])
+    def get_pattern_stats(
+        game_id: int = Query(...),
+        db: Session = Depends(get_game_read_db),
+        current_user: user_model.User = Depends(get_current_user),
+    ):
+        return _get_pattern_stats(db, game_id, current_user)
+
+
 @router.get("/feedback", tags=["Pattern Memory Matrix"])
 def get_pattern_feedback(
     game_id: int = Query(...),
     db: Session = Depends(get_db),
     current_user: user_model.User = Depends(get_current_user),
 ):
+    game_cache.flush_game(db, game_id)
     game = db.query(game_model.Game).filter(game_model.Game.id == game_id).first()
     if not game or game.user_id != current_user.id:
         raise HTTPException(status_code=404, detail="Game not found")
 
-    state = json.loads(game.state or "{}")
-    log = state.get("log", [])
+    state = game.state or {}
+    log = rounds_crud.get_round_log(db, game.id, state)
 
     if not log or len(log) < 3:
         return {"message": "Not enough data for feedback."}
@@ -421,11 +513,12 @@ def get_pattern_progress(
     db: Session = Depends(get_db),
     current_user: user_model.User = Depends(get_current_user),
 ):
+    game_cache.flush_game(db, game_id)
     game = db.query(game_model.Game).filter(game_model.Game.id == game_id).first()
     if not game or game.user_id != current_user.id:
         raise HTTPException(status_code=404, detail="Game not found")
 
-    state = json.loads(game.state or "{}")
+    state = game.state or {}
 
     if state.get("winner") is not None:
         return {"message": "Game already ended."}
@@ -435,9 +528,9 @@ def get_pattern_progress(
         "round": state.get("round"),
         "grid_size": state.get("grid_size"),
         "sequence_length": state.get("sequence_length"),
-        "sequence": state.get("sequence"),
+        "sequence": _current_sequence(state),
         "revive_used": state.get("revive_used"),
         "correct_streak": state.get("correct_streak"),
         "max_streak": state.get("max_streak"),
-        "log_length": len(state.get("log", [])),
+        "log_length": state.get("rounds_logged", len(state.get("log", []))),
     }
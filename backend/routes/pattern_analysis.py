@@ -2,32 +2,29 @@
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from database import SessionLocal
 from models.pattern_round import PatternRound
 from models.game import Game
 from routes.auth import get_current_user
+from game_cache import get_game_read_db, get_user_read_db
 import statistics
+import aggregates
 
 router = APIRouter()
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 @router.get("/pattern/analysis", tags=["Pattern Memory Matrix"])
 def analyze_pattern_game(
     game_id: int = Query(...),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_game_read_db),
     current_user = Depends(get_current_user)
 ):
     game = db.query(Game).filter(Game.id == game_id).first()
     if not game or game.user_id != current_user.id:
         raise HTTPException(status_code=404, detail="Game not found")
 
-    rounds = db.query(PatternRound).filter(PatternRound.game_id == game_id).all()
+    rounds = db.query(PatternRound).filter(
+        PatternRound.user_id == game.user_id,
+        PatternRound.game_id == game_id
+    ).all()
     if not rounds or len(rounds) < 3:
         return {"message": "Not enough data for analysis."}
 
@@ -96,40 +93,28 @@ def analyze_pattern_game(
     }
 @router.get("/pattern/brain_profile", tags=["Pattern Memory Matrix"])
 def get_brain_profile(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_user_read_db),
     current_user = Depends(get_current_user)
 ):
-    # Get all PatternGames played by the user
-    pattern_games = db.query(Game).filter(
-        Game.user_id == current_user.id,
-        Game.game_type == "pattern"
-    ).all()
-
-    if not pattern_games:
+    # Running totals kept up to date by every submitted round
+    agg = aggregates.get_aggregate(db, current_user.id, "pattern")
+    if agg is None or not agg.games:
         return {"message": "No pattern games played yet."}
 
-    all_rounds = []
-    for game in pattern_games:
-        rounds = db.query(PatternRound).filter(PatternRound.game_id == game.id).all()
-        all_rounds.extend(rounds)
-
-    if len(all_rounds) < 5:
+    rounds_total = agg.rounds
+    if rounds_total < 5:
         return {"message": "Not enough rounds across games to build profile."}
 
     # Extract metrics
-    response_times = [r.response_time for r in all_rounds]
-    correct = [r.correct for r in all_rounds]
-    grid_sizes = [r.grid_size for r in all_rounds]
-
-    avg_time = round(sum(response_times) / len(response_times), 2)
-    std_time = round(statistics.stdev(response_times), 2) if len(response_times) > 1 else 0.0
-    accuracy = round(sum(correct) / len(correct) * 100, 2)
-    avg_grid = round(sum(grid_sizes) / len(grid_sizes), 2)
+    totals = aggregates.summary(agg)
+    avg_time = totals["avg_response_time"]
+    std_time = totals["consistency"]
+    accuracy = totals["accuracy_percent"]
+    avg_grid = round(agg.extras.get("grid_size", 0) / rounds_total, 2)
 
     # Learning Trend (first 30% vs last 30%)
-    split = len(correct) // 3
-    early_acc = round(sum(correct[:split])/split * 100, 2)
-    late_acc = round(sum(correct[-split:])/split * 100, 2)
+    early_acc = totals["early_accuracy"]
+    late_acc = totals["late_accuracy"]
     trend = late_acc - early_acc
 
     # Long-term Profile
@@ -156,6 +141,6 @@ def get_brain_profile(
             "late_accuracy": late_acc,
             "learning_trend": trend
         },
-        "games_analyzed": len(pattern_games),
-        "rounds_total": len(all_rounds)
+        "games_analyzed": agg.games,
+        "rounds_total": rounds_total
     }
@@ -1,30 +1,106 @@
 from fastapi import APIRouter, Depends, HTTPException, Path
+from sqlalchemy import case, func, select
 from sqlalchemy.orm import Session
-from database import SessionLocal
 from models import game as game_model, user as user_model
+from models.game_round import GameRound
+from models.game_summary import GameSummary
+from game_cache import get_user_read_db
 from routes.auth import get_current_user
 from pydantic import conint
 from typing import Annotated
-import json
 
 router = APIRouter()
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 SUPPORTED_GAMES = {"pattern", "binary", "chunk", "stroop", "dual"}
 
+# URL names whose games rows carry a different game_type
+STORED_GAME_TYPES = {"chunk": "chunking", "dual": "dual_nback"}
+
 LimitParam = Annotated[int, conint(ge=1, le=50)]
 
+
+def _seconds_between(db: Session, start, end):
+    if db.get_bind().dialect.name == "postgresql":
+        return func.extract("epoch", end - start)
+    return (func.julianday(end) - func.julianday(start)) * 86400.0
+
+
+def _progress_query(db: Session, user_id: int, game_type: str, limit: int):
+    """The user's latest finished games with their totals, computed in SQL.
+
+    Finished games have a game_summaries row; archived ones keep their
+    totals in the state; anything else is counted from game_rounds (only for
+    the `limit` games returned).
+    """
+    Game = game_model.Game
+
+    def logged(*criteria):
+        return (
+            select(func.count(GameRound.id))
+            .where(GameRound.game_id == Game.id, *criteria)
+            .correlate(Game)
+            .scalar_subquery()
+        )
+
+    summarized = GameSummary.game_id != None
+    recent = (
+        select(
+            Game.id.label("game_id"),
+            func.coalesce(GameSummary.score, Game.score).label("score"),
+            func.coalesce(
+                GameSummary.rounds,
+                Game.state["rounds_total"].as_integer(),
+                logged(),
+            ).label("rounds"),
+            case(
+                (summarized, None),
+                else_=func.coalesce(
+                    Game.state["correct_total"].as_integer(),
+                    logged(GameRound.entry["correct"].as_boolean()),
+                ),
+            ).label("correct"),
+            GameSummary.accuracy_percent.label("summary_accuracy"),
+            case(
+                (summarized, GameSummary.winner),
+                else_=Game.state["winner"].as_string(),
+            ).label("winner"),
+            func.coalesce(
+                GameSummary.duration_sec,
+                _seconds_between(db, Game.start_time, Game.end_time),
+            ).label("duration_sec"),
+            Game.end_time.label("completed_at"),
+        )
+        .outerjoin(GameSummary, GameSummary.game_id == Game.id)
+        .where(
+            Game.user_id == user_id,
+            Game.game_type == game_type,
+            Game.end_time != None,
+        )
+        .order_by(Game.end_time.desc())
+        .limit(limit)
+        .subquery()
+    )
+    accuracy = func.coalesce(
+        recent.c.summary_accuracy,
+        recent.c.correct * 100.0 / func.nullif(recent.c.rounds, 0),
+        0.0,
+    )
+    return select(
+        recent.c.game_id,
+        recent.c.score,
+        recent.c.rounds,
+        accuracy.label("accuracy_percent"),
+        recent.c.winner,
+        recent.c.duration_sec,
+        recent.c.completed_at,
+    ).order_by(recent.c.completed_at.desc())
+
+
 @router.get("/progress/{game_type}", tags=["Progress Tracking"])
 def get_game_progress(
     game_type: str = Path(..., description="One of: pattern, binary, chunk, stroop, dual"),
     limit: LimitParam = 10,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_user_read_db),
     current_user: user_model.User = Depends(get_current_user),
 ):
     if game_type not in SUPPORTED_GAMES:
@@ -33,39 +109,27 @@ def get_game_progress(
             detail="Invalid game type. Choose from: pattern, binary, chunk, stroop, dual.",
         )
 
-    games = (
-        db.query(game_model.Game)
-        .filter(
-            game_model.Game.user_id == current_user.id,
-            game_model.Game.game_type == game_type,
-            game_model.Game.end_time != None,
+    rows = db.execute(
+        _progress_query(
+            db,
+            current_user.id,
+            STORED_GAME_TYPES.get(game_type, game_type),
+            limit,
         )
-        .order_by(game_model.Game.end_time.desc())
-        .limit(limit)
-        .all()
-    )
+    ).all()
 
-    progress_data = []
-
-    for game in games:
-        state = json.loads(game.state or "{}")
-        log = state.get("log", [])
-        total_rounds = len(log)
-        correct = sum(1 for r in log if r.get("correct"))
-        accuracy = round(correct / total_rounds * 100, 2) if total_rounds else 0.0
-
-        progress_data.append({
-            "game_id": game.id,
-            "score": game.score,
-            "rounds": total_rounds,
-            "accuracy_percent": accuracy,
-            "winner": state.get("winner"),
-            "duration_sec": (
-                (game.end_time - game.created_at).total_seconds()
-                if game.end_time and game.created_at else None
-            ),
-            "completed_at": game.end_time.isoformat() if game.end_time else None,
-        })
+    progress_data = [
+        {
+            "game_id": row.game_id,
+            "score": row.score,
+            "rounds": row.rounds,
+            "accuracy_percent": round(row.accuracy_percent, 2),
+            "winner": row.winner,
+            "duration_sec": row.duration_sec,
+            "completed_at": row.completed_at.isoformat(),
+        }
+        for row in rows
+    ]
 
     return {
         "success": True,
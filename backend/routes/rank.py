@@ -0,0 +1,61 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Path, Query
+from sqlalchemy.orm import Session
+from database import get_read_db
+from models import user as user_model
+from models.game_summary import GameSummary
+from percentiles import percentiles
+from routes.auth import get_current_user
+
+router = APIRouter()
+
+# Only these games end (and get a game_summaries row); URL name -> game_type
+RANKED_GAMES = {"pattern": "pattern", "dual": "dual_nback"}
+
+
+def _percent(fraction):
+    return None if fraction is None else round(fraction * 100, 2)
+
+
+@router.get("/rank/{game_type}", tags=["Progress Tracking"])
+def get_game_rank(
+    game_type: str = Path(..., description="One of: pattern, dual"),
+    game_id: Optional[int] = Query(None, description="Defaults to the latest game"),
+    db: Session = Depends(get_read_db),
+    current_user: user_model.User = Depends(get_current_user),
+):
+    """Where a finished game stands among everyone's finished games."""
+    if game_type not in RANKED_GAMES:
+        raise HTTPException(
+            status_code=400, detail="Invalid game type. Choose from: pattern, dual."
+        )
+    stored_type = RANKED_GAMES[game_type]
+
+    query = db.query(GameSummary).filter(
+        GameSummary.user_id == current_user.id, GameSummary.game_type == stored_type
+    )
+    if game_id is not None:
+        summary = query.filter(GameSummary.game_id == game_id).first()
+    else:
+        summary = query.order_by(GameSummary.completed_at.desc()).first()
+    if summary is None:
+        raise HTTPException(status_code=404, detail="No finished game found")
+
+    score_rank, games = percentiles.rank(stored_type, "score", summary.score)
+    time_rank = None
+    if summary.avg_response_time is not None:
+        time_rank, _ = percentiles.rank(
+            stored_type, "response_time", summary.avg_response_time
+        )
+
+    return {
+        "game_type": game_type,
+        "game_id": summary.game_id,
+        "score": summary.score,
+        "better_score_than_percent": _percent(score_rank),
+        "avg_response_time_sec": summary.avg_response_time,
+        # Quicker is better: rank by the share of games that were slower
+        "faster_than_percent": _percent(None if time_rank is None else 1 - time_rank),
+        "games_ranked": games,
+    }
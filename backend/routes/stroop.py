@@ -1,25 +1,25 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from database import SessionLocal
+from config import settings
+from database import get_async_db, get_db
 from models import game as game_model, user as user_model, stroop as stroop_model
 from pydantic import BaseModel
 from datetime import datetime
-import random
-import json
-from routes.auth import get_current_user
-from openai import OpenAI
-import os
+from routes.auth import get_current_user, get_current_user_async
+from monitoring import metrics
+from crud import rounds as rounds_crud
+from game_cache import (
+    game_cache,
+    get_async_game_read_db,
+    get_game_read_db,
+    get_user_read_db,
+)
+import aggregates
+import stimuli
+from llm import get_openai_client
 
 router = APIRouter()
-openai_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
-
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
 
 
 # ------------ Game Setup ------------
@@ -37,23 +37,25 @@ class StroopStartRequest(BaseModel):
     rounds: int = 5
 
 
+def _current_pair(state: dict):
+    """(word, font color) on screen; games from before seeding stored them."""
+    if "current_word" in state:
+        return state["current_word"], state["current_color"]
+    return stimuli.stroop_pair(state["seed"], state.get("round", 1), COLORS)
+
+
 # ------------ Start Game ------------
-@router.post("/stroop/start", tags=["Stroop Inferno"])
-def start_stroop_game(
-    request: StroopStartRequest,
-    db: Session = Depends(get_db),
-    current_user: user_model.User = Depends(get_current_user),
+def _start_stroop_game(
+    db: Session, request: StroopStartRequest, current_user: user_model.User
 ):
-    word = random.choice(COLORS)
-    font_color = random.choice(COLORS)
+    seed = stimuli.new_seed()
+    word, font_color = stimuli.stroop_pair(seed, 1, COLORS)
     congruent = word == font_color
 
     state = {
+        "seed": seed,
         "round": 1,
         "total_rounds": request.rounds,
-        "log": [],
-        "current_word": word,
-        "current_color": font_color,
     }
 
     game = game_model.Game(
@@ -61,9 +63,10 @@ def start_stroop_game(
         game_type="stroop",
         difficulty="medium",
         score=0,
-        state=json.dumps(state),
+        state=state,
     )
     db.add(game)
+    aggregates.record_game(db, current_user.id, "stroop", state)
     db.commit()
     db.refresh(game)
 
@@ -76,22 +79,37 @@ def start_stroop_game(
     }
 
 
+if settings.USE_ASYNC_DB:
+
+    @router.post("/stroop/start", tags=["Stroop Inferno"])
+    async def start_stroop_game(
+        request: StroopStartRequest,
+        db: AsyncSession = Depends(get_async_db),
+        current_user: user_model.User = Depends(get_current_user_async),
+    ):
+        return await db.run_sync(_start_stroop_game, request, current_user)
+
+else:
+
+    @router.post("/stroop/start", tags=["Stroop Inferno"])
+    def start_stroop_game(
+        request: StroopStartRequest,
+        db: Session = Depends(get_db),
+        current_user: user_model.User = Depends(get_current_user),
+    ):
+        return _start_stroop_game(db, request, current_user)
+
+
 # ------------ Submit Response ------------
-@router.post("/stroop/submit", tags=["Stroop Inferno"])
-def submit_stroop_response(
-    payload: StroopSubmitRequest,
-    db: Session = Depends(get_db),
-    current_user: user_model.User = Depends(get_current_user),
+def _submit_stroop_response(
+    db: Session, payload: StroopSubmitRequest, current_user: user_model.User
 ):
-    game = (
-        db.query(game_model.Game).filter(game_model.Game.id == payload.game_id).first()
-    )
+    game = game_cache.load(db, payload.game_id)
     if not game or game.user_id != current_user.id:
         raise HTTPException(status_code=404, detail="Game not found")
 
-    state = json.loads(game.state or "{}")
-    word = state.get("current_word")
-    font_color = state.get("current_color")
+    state = game.state or {}
+    word, font_color = _current_pair(state)
     round_num = state.get("round", 1)
 
     is_correct = payload.response_color.strip().upper() == font_color
@@ -103,36 +121,30 @@ def submit_stroop_response(
     game.score += score
 
     # Log performance
-    log = state.get("log", [])
-    log.append(
-        {
-            "round": round_num,
-            "word": word,
-            "font_color": font_color,
-            "response_color": payload.response_color.upper(),
-            "response_time": payload.response_time,
-            "correct": is_correct,
-            "congruent": is_congruent,
-            "score": score,
-        }
-    )
+    rounds_crud.take_legacy_log(game, state)
+    round_log = {
+        "round": round_num,
+        "word": word,
+        "font_color": font_color,
+        "response_color": payload.response_color.upper(),
+        "response_time": payload.response_time,
+        "correct": is_correct,
+        "congruent": is_congruent,
+        "score": score,
+    }
+    rounds_crud.append_round(game, round_num, round_log)
+    aggregates.record_round(game, round_log)
 
     # Prepare next round
-    next_word = random.choice(COLORS)
-    next_color = random.choice(COLORS)
+    state.pop("current_word", None)
+    state.pop("current_color", None)
+    state.setdefault("seed", stimuli.new_seed())
+    state["round"] = round_num + 1
+    next_word, next_color = _current_pair(state)
     congruent = next_word == next_color
 
-    state.update(
-        {
-            "round": round_num + 1,
-            "log": log,
-            "current_word": next_word,
-            "current_color": next_color,
-        }
-    )
-
-    game.state = json.dumps(state)
-    db.commit()
+    game.state = state
+    game_cache.save(db, game)
 
     return {
         "correct": is_correct,
@@ -144,23 +156,39 @@ def submit_stroop_response(
             "is_congruent": congruent,
             "round": round_num + 1,
         },
-        "round_log": log[-1],
+        "round_log": round_log,
     }
 
 
+if settings.USE_ASYNC_DB:
+
+    @router.post("/stroop/submit", tags=["Stroop Inferno"])
+    async def submit_stroop_response(
+        payload: StroopSubmitRequest,
+        db: AsyncSession = Depends(get_async_db),
+        current_user: user_model.User = Depends(get_current_user_async),
+    ):
+        return await db.run_sync(_submit_stroop_response, payload, current_user)
+
+else:
+
+    @router.post("/stroop/submit", tags=["Stroop Inferno"])
+    def submit_stroop_response(
+        payload: StroopSubmitRequest,
+        db: Session = Depends(get_db),
+        current_user: user_model.User = Depends(get_current_user),
+    ):
+        return _submit_stroop_response(db, payload, current_user)
+
+
 # ------------ Stats ------------
-@router.get("/stroop/stats", tags=["Stroop Inferno"])
-def get_stroop_stats(
-    game_id: int = Query(...),
-    db: Session = Depends(get_db),
-    current_user: user_model.User = Depends(get_current_user),
-):
+def _get_stroop_stats(db: Session, game_id: int, current_user: user_model.User):
     game = db.query(game_model.Game).filter(game_model.Game.id == game_id).first()
     if not game or game.user_id != current_user.id:
         raise HTTPException(status_code=404, detail="Game not found")
 
-    state = json.loads(game.state or "{}")
-    logs = state.get("log", [])
+    state = game.state or {}
+    logs = rounds_crud.get_round_log(db, game.id, state)
     if not logs:
         return {"message": "No rounds played."}
 
@@ -185,6 +213,27 @@ def get_stroop_stats(
     }
 
 
+if settings.USE_ASYNC_DB:
+
+    @router.get("/stroop/stats", tags=["Stroop Inferno"])
+    async def get_stroop_stats(
+        game_id: int = Query(...),
+        db: AsyncSession = Depends(get_async_game_read_db),
+        current_user: user_model.User = Depends(get_current_user_async),
+    ):
+        return await db.run_sync(_get_stroop_stats, game_id, current_user)
+
+else:
+
+    @router.get("/stroop/stats", tags=["Stroop Inferno"])
+    def get_stroop_stats(
+        game_id: int = Query(...),
+        db: Session = Depends(get_game_read_db),
+        current_user: user_model.User = Depends(get_current_user),
+    ):
+        return _get_stroop_stats(db, game_id, current_user)
+
+
 @router.get("/stroop/feedback", tags=["Stroop Inferno"])
 def stroop_feedback(
     game_id: int,
@@ -205,7 +254,10 @@ def stroop_feedback(
 
     rounds = (
         db.query(stroop_model.StroopRound)
-        .filter(stroop_model.StroopRound.game_id == game_id)
+        .filter(
+            stroop_model.StroopRound.user_id == current_user.id,
+            stroop_model.StroopRound.game_id == game_id,
+        )
         .order_by(stroop_model.StroopRound.round_number)
         .all()
     )
@@ -242,47 +294,36 @@ Format:
 **💡 Tip:** <1-sentence tip>
 """
 
-    response = openai_client.chat.completions.create(
-        model="gpt-4", messages=[{"role": "user", "content": prompt}], temperature=0.8
-    )
+    with metrics.llm_timer():
+        response = get_openai_client().chat.completions.create(
+            model="gpt-4",
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0.8,
+        )
 
     return {"feedback": response.choices[0].message.content}
 @router.get("/stroop/brain_profile", tags=["Stroop Inferno"])
 def stroop_brain_profile(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_user_read_db),
     current_user: user_model.User = Depends(get_current_user)
 ):
-    # Get all stroop games
-    games = db.query(stroop_model.StroopGame).filter(
-        stroop_model.StroopGame.user_id == current_user.id
-    ).all()
-
-    if not games:
+    agg = aggregates.get_aggregate(db, current_user.id, "stroop")
+    if agg is None or not agg.games:
         raise HTTPException(status_code=404, detail="No Stroop games found.")
 
-    game_ids = [g.id for g in games]
-
-    # Get all rounds for those games
-    rounds = db.query(stroop_model.StroopRound).filter(
-        stroop_model.StroopRound.game_id.in_(game_ids)
-    ).all()
-
-    if not rounds:
+    if not agg.rounds:
         raise HTTPException(status_code=404, detail="No Stroop rounds found.")
 
-    correct_total = sum(r.correct for r in rounds)
-    total = len(rounds)
-    avg_response_time = round(sum(r.response_time for r in rounds) / total, 2)
-
-    conflict_trials = [r for r in rounds if r.conflict]
-    correct_conflict = sum(r.correct for r in conflict_trials)
-    total_conflict = len(conflict_trials)
+    totals = aggregates.summary(agg)
+    avg_response_time = totals["avg_response_time"]
+    correct_conflict = agg.extras.get("conflict_correct", 0)
+    total_conflict = agg.extras.get("conflict", 0)
 
     # Build summary
     summary = {
-        "total_games_played": len(games),
-        "total_rounds": total,
-        "overall_accuracy_percent": round((correct_total / total) * 100, 2),
+        "total_games_played": agg.games,
+        "total_rounds": agg.rounds,
+        "overall_accuracy_percent": totals["accuracy_percent"],
         "avg_response_time_sec": avg_response_time,
         "conflict_accuracy_percent": round((correct_conflict / total_conflict) * 100, 2) if total_conflict > 0 else None
     }
@@ -0,0 +1,132 @@
+"""Mergeable quantile sketch (a merging t-digest).
+
+Keeps a few dozen centroids (mean, weight) however many values it has
+seen, and stays most precise in the tails, where "faster than 99% of
+players" is decided. Two digests merge into one with the same guarantees,
+which is what lets every worker sketch its own games and fold them into a
+shared snapshot (see percentiles.py).
+"""
+import bisect
+import math
+
+
+class TDigest:
+    def __init__(self, compression: float = 100):
+        self.compression = compression
+        self.count = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self._centroids = []  # [mean, weight], sorted by mean
+        self._buffer = []
+
+    def add(self, value: float, weight: float = 1.0):
+        self._buffer.append([value, weight])
+        self.count += weight
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if len(self._buffer) >= 5 * self.compression:
+            self._compress()
+
+    def merge(self, other: "TDigest"):
+        other._compress()
+        if not other.count:
+            return
+        self._buffer.extend([mean, weight] for mean, weight in other._centroids)
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+
+    def cdf(self, value: float) -> float:
+        """Fraction of the values below `value` (ties count half)."""
+        self._compress()
+        if not self.count:
+            return math.nan
+        if value < self.min:
+            return 0.0
+        if value > self.max:
+            return 1.0
+        at = sum(weight for mean, weight in self._centroids if mean == value)
+        if at:
+            below = sum(weight for mean, weight in self._centroids if mean < value)
+            return (below + at / 2) / self.count
+        xs, ys = self._knots()
+        i = bisect.bisect_right(xs, value)
+        if i == len(xs):
+            return 1.0
+        x0, x1, y0, y1 = xs[i - 1], xs[i], ys[i - 1], ys[i]
+        return (y0 + (y1 - y0) * (value - x0) / (x1 - x0)) / self.count
+
+    def quantile(self, q: float) -> float:
+        self._compress()
+        if not self.count:
+            return math.nan
+        xs, ys = self._knots()
+        target = min(max(q, 0.0), 1.0) * self.count
+        i = bisect.bisect_left(ys, target)
+        if i == 0:
+            return xs[0]
+        if i == len(ys):
+            return xs[-1]
+        x0, x1, y0, y1 = xs[i - 1], xs[i], ys[i - 1], ys[i]
+        return x0 + (x1 - x0) * (target - y0) / (y1 - y0)
+
+    def to_dict(self):
+        self._compress()
+        return {
+            "compression": self.compression,
+            "count": self.count,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+            "centroids": self._centroids,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        digest = cls(data["compression"])
+        digest.count = data["count"]
+        if digest.count:
+            digest.min, digest.max = data["min"], data["max"]
+        digest._centroids = [list(centroid) for centroid in data["centroids"]]
+        return digest
+
+    def _knots(self):
+        """Cumulative weight curve: each centroid's mass is centred on its mean."""
+        xs, ys, seen = [self.min], [0.0], 0.0
+        for mean, weight in self._centroids:
+            xs.append(mean)
+            ys.append(seen + weight / 2)
+            seen += weight
+        xs.append(self.max)
+        ys.append(seen)
+        return xs, ys
+
+    def _k(self, q):
+        return self.compression / (2 * math.pi) * math.asin(2 * q - 1)
+
+    def _q(self, k):
+        angle = k * 2 * math.pi / self.compression
+        angle = min(max(angle, -math.pi / 2), math.pi / 2)
+        return (math.sin(angle) + 1) / 2
+
+    def _compress(self):
+        if not self._buffer:
+            return
+        points = sorted(self._centroids + self._buffer)
+        self._buffer = []
+        total = sum(weight for _, weight in points)
+
+        merged, seen = [], 0.0
+        mean, weight = points[0]
+        q_limit = self._q(self._k(0.0) + 1)
+        for next_mean, next_weight in points[1:]:
+            if (seen + weight + next_weight) / total <= q_limit:
+                weight += next_weight
+                mean += (next_mean - mean) * next_weight / weight
+            else:
+                merged.append([mean, weight])
+                seen += weight
+                q_limit = self._q(self._k(seen / total) + 1)
+                mean, weight = next_mean, next_weight
+        merged.append([mean, weight])
+        self._centroids = merged
@@ -0,0 +1,47 @@
+"""Deterministic stimulus generation for the sequence games.
+
+A game stores one random ``seed`` in its state instead of the stimuli it
+shows; stimulus ``i`` is rebuilt on demand from ``(seed, i)``. The same seed
+always replays the same session, which also makes games reproducible when
+debugging.
+"""
+import random
+import secrets
+
+
+def new_seed():
+    return secrets.randbits(63)
+
+
+def _rng(seed: int, kind: str, index: int):
+    # String seeds are hashed with SHA-512, so this is stable across runs and
+    # Python versions (unlike hash()).
+    return random.Random(f"{seed}:{kind}:{index}")
+
+
+def pattern_sequence(seed: int, round_num: int, grid_size: int, length: int):
+    """Cells lit in a pattern round (distinct, in display order)."""
+    total_cells = grid_size * grid_size
+    return _rng(seed, "pattern", round_num).sample(
+        range(total_cells), k=min(length, total_cells)
+    )
+
+
+def dual_item(seed: int, index: int, grid_size: int, letters):
+    """Position and letter shown at step `index` (0-based) of a dual n-back."""
+    rng = _rng(seed, "dual", index)
+    return {
+        "grid_pos": rng.randint(0, grid_size * grid_size - 1),
+        "letter": rng.choice(letters),
+    }
+
+
+def stroop_pair(seed: int, round_num: int, colors):
+    """(word, font color) for a Stroop round."""
+    rng = _rng(seed, "stroop", round_num)
+    return rng.choice(colors), rng.choice(colors)
+
+
+def chunk_sequence(seed: int, round_num: int, length: int):
+    """Digits to memorize in a chunking round."""
+    return _rng(seed, "chunk", round_num).sample(range(10), length)
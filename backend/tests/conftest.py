@@ -1,7 +1,26 @@
+import atexit
+import os
+import shutil
+import tempfile
+import uuid
+
+# The fixtures below create, empty and drop tables, so the suite never runs
+# on the configured DATABASE_URL: it gets a scratch SQLite file unless
+# TEST_DATABASE_URL names a disposable database. Settings are read at import
+# time, so this has to happen before the app is imported.
+_scratch = tempfile.mkdtemp(prefix="brainbrew-tests-")
+atexit.register(shutil.rmtree, _scratch, True)
+os.environ["DATABASE_URL"] = (
+    os.environ.get("TEST_DATABASE_URL") or f"sqlite:///{_scratch}/test.db"
+)
+os.environ["ASYNC_DATABASE_URL"] = ""
+os.environ["READ_DATABASE_URL"] = ""
+
 import pytest
 from fastapi.testclient import TestClient
 from main import app
 from database import SessionLocal, Base, engine
+from game_cache import MODES, game_cache
 from models import user as user_model
 
 @pytest.fixture(scope="module")
@@ -18,3 +37,40 @@ def test_user(test_client):
     response = test_client.post("/auth/login", json=user_data)
     token = response.json()["access_token"]
     return {"Authorization": f"Bearer {token}"}
+
+@pytest.fixture(params=MODES)
+def cache_mode(request, monkeypatch, db):
+    """Run the test under each ACTIVE_GAME_CACHE mode."""
+    monkeypatch.setattr(game_cache, "mode", request.param)
+    yield request.param
+    game_cache.flush_all()
+    game_cache.clear()
+
+
+@pytest.fixture
+def db():
+    """A session on the scratch database, emptied again after the test."""
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    yield session
+    session.rollback()
+    for table in reversed(Base.metadata.sorted_tables):
+        session.execute(table.delete())
+    session.commit()
+    session.close()
+
+
+@pytest.fixture
+def player(db):
+    """Creates a user with a unique name: ``user = player()``."""
+
+    def create():
+        name = f"player_{uuid.uuid4().hex[:8]}"
+        user = user_model.User(
+            username=name, email=f"{name}@example.com", hashed_password="x"
+        )
+        db.add(user)
+        db.commit()
+        return user
+
+    return create
@@ -0,0 +1,147 @@
+import random
+import statistics
+
+import pytest
+
+import aggregates
+from crud import rounds as rounds_crud
+from game_cache import game_cache, get_user_read_db
+from models.game_round import GameRound
+from models.user_game_aggregate import UserGameAggregate
+from routes.dual import (
+    DualStartRequest,
+    DualSubmitRequest,
+    _start_dual_nback,
+    _submit_dual_nback,
+)
+from routes.stroop import (
+    StroopStartRequest,
+    StroopSubmitRequest,
+    _current_pair,
+    _start_stroop_game,
+    _submit_stroop_response,
+    stroop_brain_profile,
+)
+
+
+pytestmark = pytest.mark.usefixtures("cache_mode")
+
+
+def _columns(agg):
+    return {
+        column.name: getattr(agg, column.name)
+        for column in UserGameAggregate.__table__.columns
+        if column.name != "updated_at"
+    }
+
+
+def test_running_moments_and_windows():
+    rng = random.Random(20)
+    entries = [
+        {"correct": rng.random() < 0.7, "response_time": rng.uniform(0.5, 4.0)}
+        for _ in range(50)
+    ]
+    agg = aggregates._empty(1, "chunking")
+    for entry in entries:
+        aggregates.add_round(agg, entry, window=10)
+
+    times = [entry["response_time"] for entry in entries]
+    correct = [float(entry["correct"]) for entry in entries]
+    assert agg.rounds == 50
+    assert agg.correct == sum(correct)
+    assert agg.rt_mean == pytest.approx(statistics.mean(times))
+    assert agg.rt_m2 / 49 == pytest.approx(statistics.variance(times))
+    assert agg.early == correct[:10]
+    assert agg.late == correct[-10:]
+
+    totals = aggregates.summary(agg)
+    assert totals["consistency"] == round(statistics.stdev(times), 2)
+    # Past three windows of rounds the trend compares the windows
+    assert totals["early_accuracy"] == round(sum(correct[:10]) / 10 * 100, 2)
+    assert totals["late_accuracy"] == round(sum(correct[-10:]) / 10 * 100, 2)
+
+
+def test_submits_match_a_rebuild_from_history(db, player):
+    user = player()
+    for n in (1, 3):
+        game_id = _start_dual_nback(db, DualStartRequest(n=n), user)["game_id"]
+        for i in range(20):
+            _submit_dual_nback(
+                db,
+                DualSubmitRequest(
+                    game_id=game_id,
+                    letter_match=i % 3 == 0,
+                    position_match=i % 2 == 0,
+                    response_time=0.4 + i / 20,
+                ),
+                user,
+            )
+
+    live = _columns(aggregates.get_aggregate(db, user.id, "dual_nback"))
+    assert live["games"] == 2
+    assert live["rounds"] == 40
+    assert live["extras"] == {"n": [1, 3]}
+
+    aggregates.rebuild(db, user.id)
+    db.expire_all()
+    rebuilt = _columns(aggregates.get_aggregate(db, user.id, "dual_nback"))
+    assert rebuilt.pop("rt_mean") == pytest.approx(live.pop("rt_mean"))
+    assert rebuilt.pop("rt_m2") == pytest.approx(live.pop("rt_m2"))
+    assert rebuilt == live
+
+
+def test_round_counts_only_if_its_write_commits(db, monkeypatch, player):
+    user = player()
+    game_id = _start_dual_nback(db, DualStartRequest(n=2), user)["game_id"]
+    submit = DualSubmitRequest(
+        game_id=game_id, letter_match=False, position_match=False, response_time=1
+    )
+
+    def broken_round(game, round_number, entry):
+        game.add(GameRound(game_id=game.id, round_number=None, entry=entry))
+
+    with monkeypatch.context() as patch:
+        patch.setattr(rounds_crud, "append_round", broken_round)
+        patch.setattr(game_cache, "flush_every", 1)  # write it now
+        with pytest.raises(Exception):
+            _submit_dual_nback(db, submit, user)
+    db.rollback()
+    assert aggregates.get_aggregate(db, user.id, "dual_nback").rounds == 0
+
+    _submit_dual_nback(db, submit, user)  # the client's retry
+    game_cache.flush_game(db, game_id)
+    db.expire_all()
+    assert aggregates.get_aggregate(db, user.id, "dual_nback").rounds == 1
+    logged = db.query(GameRound.round_number).filter_by(game_id=game_id).all()
+    assert logged == [(1,)]
+
+
+def test_stroop_profile_reads_the_aggregate(db, player):
+    user = player()
+    game_id = _start_stroop_game(db, StroopStartRequest(), user)["game_id"]
+    conflict = conflict_correct = 0
+    for i in range(12):
+        state = game_cache.load(db, game_id).state
+        word, font_color = _current_pair(state)
+        answer = font_color if i % 4 else "NONE"
+        conflict += word != font_color
+        conflict_correct += word != font_color and answer == font_color
+        _submit_stroop_response(
+            db,
+            StroopSubmitRequest(
+                game_id=game_id, response_color=answer, response_time=0.5
+            ),
+            user,
+        )
+        db.expire_all()
+
+    reads = get_user_read_db(user)
+    profile = stroop_brain_profile(db=next(reads), current_user=user)
+    reads.close()
+    assert profile["total_games_played"] == 1
+    assert profile["total_rounds"] == 12
+    assert profile["overall_accuracy_percent"] == 75.0
+    assert profile["avg_response_time_sec"] == 0.5
+    assert profile["conflict_accuracy_percent"] == (
+        round(conflict_correct / conflict * 100, 2) if conflict else None
+    )
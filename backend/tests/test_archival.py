@@ -0,0 +1,61 @@
+from datetime import datetime, timedelta
+
+import archival
+from crud import rounds as rounds_crud
+from models import game as game_model
+from models.game_archive import GameArchive
+from models.game_round import GameRound
+
+
+def _finished_game(db, user, days_ago, rounds=20):
+    game = game_model.Game(
+        user_id=user.id,
+        game_type="stroop",
+        score=40,
+        state={"seed": 7, "round": rounds + 1, "finished": True},
+        end_time=datetime.utcnow() - timedelta(days=days_ago),
+    )
+    db.add(game)
+    db.commit()
+    db.add_all(
+        GameRound(
+            game_id=game.id,
+            round_number=i,
+            entry={"round": i, "correct": i % 4 != 0, "response_time": 0.8},
+        )
+        for i in range(1, rounds + 1)
+    )
+    db.commit()
+    return game
+
+
+def test_archive_moves_old_games_to_compressed_rows(db, player):
+    old = _finished_game(db, player(), days_ago=120)
+    recent = _finished_game(db, player(), days_ago=1)
+    log = rounds_crud.get_round_log(db, old.id, old.state)
+
+    count, raw, compressed = archival.archive_games(db, timedelta(days=90))
+    assert count >= 1
+    assert compressed < raw
+    db.expire_all()
+
+    stub = old.state
+    assert stub["archived"] and stub["finished"]
+    assert (stub["rounds_total"], stub["correct_total"]) == (20, 15)
+    assert db.query(GameRound).filter(GameRound.game_id == old.id).count() == 0
+    assert db.get(GameArchive, old.id).codec == archival.CODEC
+    assert not recent.state.get("archived")
+
+    # Reads decompress transparently
+    assert rounds_crud.get_round_log(db, old.id, stub) == log
+    logs = rounds_crud.get_round_logs(db, [old, recent])
+    assert logs[old.id] == log
+    assert len(logs[recent.id]) == 20
+
+    # Already archived games are skipped
+    assert archival.archive_games(db, timedelta(days=90))[0] == 0
+
+
+def test_zlib_archives_stay_readable():
+    codec, payload = "zlib", archival.zlib.compress(b'{"rounds": []}')
+    assert archival.decompress(codec, payload) == b'{"rounds": []}'
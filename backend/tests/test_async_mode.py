@@ -0,0 +1,86 @@
+import json
+import os
+import subprocess
+import sys
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Settings are read at import time, so the async app runs in its own process
+PLAY_DUAL = """
+import json
+from fastapi.testclient import TestClient
+import database
+from auth.user_cache import user_cache
+from database import Base, engine
+from main import app
+
+Base.metadata.create_all(bind=engine)
+results = {}
+with TestClient(app) as client:
+    login = {"username": "async@example.com", "password": "testpass"}
+    client.post(
+        "/auth/register",
+        json={
+            "username": "async",
+            "email": login["username"],
+            "password": login["password"],
+        },
+    )
+    token = client.post("/auth/login", data=login).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    user_cache.clear()  # the first request resolves the user on the async pool
+
+    sync_checkouts = database.pool_status()["primary"]["checkouts"]
+    game_id = client.post("/dual/start", headers=headers, json={"n": 2}).json()[
+        "game_id"
+    ]
+    for _ in range(20):
+        submit = client.post(
+            "/dual/submit",
+            headers=headers,
+            json={
+                "game_id": game_id,
+                "letter_match": False,
+                "position_match": False,
+                "response_time": 0.5,
+            },
+        )
+        assert submit.status_code == 200, submit.text
+    stats = client.get("/dual/stats", headers=headers, params={"game_id": game_id})
+    results["game_over"] = submit.json()["game_over"]
+    results["stats_status"] = stats.status_code
+    results["total_rounds"] = stats.json().get("total_rounds")
+    results["sync_checkouts"] = (
+        database.pool_status()["primary"]["checkouts"] - sync_checkouts
+    )
+    results["async_checkouts"] = database.pool_status()["async"]["checkouts"]
+print(json.dumps(results))
+"""
+
+
+def test_async_routes_play_a_game(tmp_path):
+    env = dict(
+        os.environ,
+        USE_ASYNC_DB="true",
+        DATABASE_URL=f"sqlite:///{tmp_path / 'async.db'}",
+        ASYNC_DATABASE_URL="",
+        READ_DATABASE_URL="",
+        ROUND_WRITER_ENABLED="false",  # refused in async mode
+    )
+    run = subprocess.run(
+        [sys.executable, "-c", PLAY_DUAL],
+        cwd=BACKEND,
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+    assert run.returncode == 0, run.stderr
+    results = json.loads(run.stdout.strip().splitlines()[-1])
+
+    assert results["game_over"] is True
+    assert results["stats_status"] == 200
+    assert results["total_rounds"] == 20
+    assert results["async_checkouts"] > 0
+    # Neither the game routes nor their auth dependency touch the sync pool
+    assert results["sync_checkouts"] == 0
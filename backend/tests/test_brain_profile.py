@@ -0,0 +1,64 @@
+import aggregates
+from models import game as game_model
+from models.game_round import GameRound
+from routes.pattern_analysis import get_brain_profile
+
+
+def _pattern_game(db, user, rounds):
+    """A played pattern game as history, i.e. without touching aggregates."""
+    game = game_model.Game(user_id=user.id, game_type="pattern", score=0, state={})
+    db.add(game)
+    db.commit()
+    db.add_all(
+        GameRound(
+            game_id=game.id,
+            round_number=number,
+            entry={
+                "round": number,
+                "correct": correct,
+                "grid_size": grid_size,
+                "response_time": response_time,
+            },
+        )
+        for number, (correct, grid_size, response_time) in enumerate(rounds, 1)
+    )
+    db.commit()
+    return game
+
+
+def test_profile_spans_games_in_play_order(db, player):
+    user = player()
+    _pattern_game(db, user, [(False, 3, 4.0), (False, 3, 4.0), (True, 3, 2.0)])
+    _pattern_game(db, user, [(True, 4, 2.0), (True, 4, 2.0), (True, 5, 2.0)])
+    _pattern_game(db, user, [])  # counted, but contributes no rounds
+
+    # Another player's rounds must not leak in
+    other = player()
+    _pattern_game(db, other, [(False, 9, 9.0)] * 6)
+    aggregates.rebuild(db, user.id)
+    aggregates.rebuild(db, other.id)
+
+    profile = get_brain_profile(db=db, current_user=user)
+    assert profile["games_analyzed"] == 3
+    assert profile["rounds_total"] == 6
+    assert profile["summary"] == {
+        "avg_accuracy_percent": 66.67,
+        "avg_response_time": 2.67,
+        "consistency": 1.03,
+        "avg_grid_size": 3.67,
+        "early_accuracy": 0.0,
+        "late_accuracy": 100.0,
+        "learning_trend": 100.0,
+    }
+    assert profile["profile"] == "Reactive Learner"
+
+
+def test_profile_needs_games_and_rounds(db, player):
+    user = player()
+    assert get_brain_profile(db=db, current_user=user) == {
+        "message": "No pattern games played yet."
+    }
+
+    _pattern_game(db, user, [(True, 3, 1.0)] * 4)
+    aggregates.rebuild(db, user.id)
+    assert "Not enough rounds" in get_brain_profile(db=db, current_user=user)["message"]
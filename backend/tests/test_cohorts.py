@@ -0,0 +1,151 @@
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+
+import cohorts
+from models import game as game_model
+from models.cohort_stat import CohortStat
+from models.game_round import GameRound
+from models.game_summary import GameSummary
+from models.pattern_round import PatternRound
+from routes.cohorts import get_cohort_stats
+
+
+def _game(db, user, game_type, started, state=None, accuracy=None):
+    game = game_model.Game(
+        user_id=user.id, game_type=game_type, state=state or {}, start_time=started
+    )
+    db.add(game)
+    db.commit()
+    if accuracy is not None:
+        db.add(
+            GameSummary(
+                game_id=game.id,
+                user_id=user.id,
+                game_type=game_type,
+                accuracy_percent=accuracy,
+                stats={},
+            )
+        )
+        db.commit()
+    return game
+
+
+def _seed(db, player, year):
+    """A January player (pattern) and a February one (stroop, dual)."""
+    january, february = player(), player()
+    pattern = _game(db, january, "pattern", datetime(year, 1, 5))
+    db.add_all(
+        PatternRound(
+            game_id=pattern.id,
+            user_id=january.id,
+            round_number=i,
+            grid_size=grid,
+            correct=correct,
+            response_time=response_time,
+        )
+        for i, (grid, correct, response_time) in enumerate(
+            [(3, True, 1.0), (3, False, 3.0), (4, True, 2.0)], 1
+        )
+    )
+    _game(db, january, "dual_nback", datetime(year, 3, 1), {"n": 2})
+
+    stroop = _game(db, february, "stroop", datetime(year, 2, 10))
+    db.add_all(
+        GameRound(
+            game_id=stroop.id,
+            round_number=i,
+            entry={"congruent": congruent, "correct": correct, "response_time": rt},
+        )
+        for i, (congruent, correct, rt) in enumerate(
+            [(True, True, 0.5), (False, True, 0.9), (False, False, 1.1)], 1
+        )
+    )
+    db.commit()
+    for day, n, accuracy in [(11, 1, 50.0), (12, 2, 80.0), (13, 3, None)]:
+        _game(db, february, "dual_nback", datetime(year, 2, day), {"n": n}, accuracy)
+    return january, february
+
+
+def _stats(db, year):
+    return {
+        (row.metric, row.cohort[5:]): (row.users, row.stats)
+        for row in db.query(CohortStat).filter(
+            CohortStat.cohort.in_([f"{year}-01", f"{year}-02"])
+        )
+    }
+
+
+def test_cohort_metrics(db, player):
+    _seed(db, player, 1999)
+    assert cohorts.run(db, workers=1, chunk_rows=2) > 0
+    stats = _stats(db, 1999)
+
+    assert stats[("pattern_grid", "01")] == (
+        1,
+        {
+            "grid_size": [3, 4],
+            "rounds": [2, 1],
+            "accuracy_percent": [50.0, 100.0],
+            "avg_response_time": [2.0, 2.0],
+        },
+    )
+    users, stroop = stats[("stroop_interference", "02")]
+    assert stroop["congruent"] == {
+        "rounds": 1,
+        "accuracy_percent": 100.0,
+        "avg_response_time": 0.5,
+    }
+    assert stroop["incongruent"]["accuracy_percent"] == 50.0
+    assert stroop["interference_cost_sec"] == pytest.approx(0.5)
+    assert stroop["accuracy_cost_percent"] == 50.0
+
+    assert stats[("nback_progression", "02")][1] == {
+        "game_number": [1, 2, 3],
+        "games": [1, 1, 1],
+        "avg_n": [1.0, 2.0, 3.0],
+        "finished": [1, 1, 0],
+        "avg_accuracy_percent": [50.0, 80.0, 0.0],
+    }
+    assert stats[("nback_progression", "01")][1]["finished"] == [0]
+    assert ("stroop_interference", "01") in stats  # every metric, every cohort
+    # Only this test's two players are in the database
+    everyone = db.get(CohortStat, ("nback_progression", "all"))
+    assert everyone.users == 2
+    assert everyone.stats["games"] == [2, 1, 1]
+
+
+def test_process_pool_matches_one_worker(db, player):
+    _seed(db, player, 1998)
+    cohorts.run(db, workers=1, chunk_rows=3)
+    serial = _stats(db, 1998)
+    cohorts.run(db, workers=2, chunk_rows=3)
+    db.expire_all()
+    assert _stats(db, 1998) == serial
+
+
+def test_cohort_route(db, player):
+    january, _ = _seed(db, player, 1997)
+    cohorts.run(db, workers=1)
+
+    response = get_cohort_stats(
+        metric="pattern_grid", cohort="1997-01", db=db, current_user=january
+    )
+    assert [entry["cohort"] for entry in response["cohorts"]] == ["1997-01"]
+    assert response["cohorts"][0]["grid_size"] == [3, 4]
+
+    everyone = get_cohort_stats(
+        metric="pattern_grid", cohort=None, db=db, current_user=january
+    )
+    assert everyone["cohorts"][0]["cohort"] == "1997-01"
+    assert {"all", "1997-02"} <= {entry["cohort"] for entry in everyone["cohorts"]}
+
+    with pytest.raises(HTTPException) as invalid:
+        get_cohort_stats(metric="reaction", cohort=None, db=db, current_user=january)
+    assert invalid.value.status_code == 400
+    with pytest.raises(HTTPException) as missing:
+        get_cohort_stats(
+            metric="pattern_grid", cohort="1900-01", db=db, current_user=january
+        )
+    assert missing.value.status_code == 404
@@ -0,0 +1,27 @@
+import pytest
+from sqlalchemy import create_engine, exc
+
+from monitoring.pool import instrumented_pool_class
+
+
+def test_pool_stats_record_waits_and_timeouts(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=instrumented_pool_class("test"),
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.05,
+    )
+    stats = engine.pool.stats
+
+    held = engine.connect()
+    with pytest.raises(exc.TimeoutError):
+        engine.connect()
+    held.close()
+    engine.connect().close()
+
+    snapshot = stats.snapshot(engine.pool)
+    assert snapshot["checkouts"] == 2
+    assert snapshot["timeouts"] == 1
+    assert snapshot["waits"] == 1
+    assert snapshot["checked_out"] == 0
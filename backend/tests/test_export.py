@@ -0,0 +1,161 @@
+import asyncio
+import csv
+import gzip
+import io
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+
+import archival
+from game_cache import game_cache
+from models import game as game_model
+from models.binary import BinaryGame, BinaryRound
+from models.game_round import GameRound
+from models.pattern_round import PatternRound
+from routes.export import export_rounds, stream_export
+from routes.pattern import (
+    PatternStartRequest,
+    PatternSubmitRequest,
+    _current_sequence,
+    _start_pattern_game,
+    _submit_pattern,
+)
+
+
+pytestmark = pytest.mark.usefixtures("cache_mode")
+
+
+def _game(db, user, game_type, rounds, days_ago=0):
+    game = game_model.Game(
+        user_id=user.id,
+        game_type=game_type,
+        score=10,
+        state={},
+        end_time=datetime.utcnow() - timedelta(days=days_ago),
+    )
+    db.add(game)
+    db.commit()
+    db.add_all(
+        GameRound(
+            game_id=game.id,
+            round_number=i,
+            entry={"round": i, "correct": i % 2 == 1},
+        )
+        for i in range(1, rounds + 1)
+    )
+    db.commit()
+    return game
+
+
+def _history(db, player):
+    """One user's rounds spread over live, archived and per-game tables."""
+    user = player()
+    live = _game(db, user, "dual_nback", 3)
+    archived = _game(db, user, "stroop", 2, days_ago=400)
+    archival.archive_games(db, timedelta(days=365))
+    legacy = _game(db, user, "pattern", 0)  # from before the round log
+    db.add(
+        PatternRound(
+            game_id=legacy.id,
+            user_id=user.id,
+            round_number=1,
+            correct=True,
+            grid_size=3,
+            response_time=1.5,
+        )
+    )
+    binary = BinaryGame(user_id=user.id, target=42)
+    db.add(binary)
+    db.commit()
+    db.add_all(
+        BinaryRound(
+            game_id=binary.id, user_id=user.id, turn=turn, guesser="user", guess=guess
+        )
+        for turn, guess in ((1, 50), (2, 25))
+    )
+    db.commit()
+    _game(db, player(), "dual_nback", 4)  # someone else's
+    return user, live, archived, legacy, binary
+
+
+def _body(user_id, fmt, compress=False):
+    return b"".join(stream_export(user_id, fmt, compress))
+
+
+def test_ndjson_covers_every_round_table(db, player):
+    user, live, archived, legacy, binary = _history(db, player)
+    records = [json.loads(line) for line in _body(user.id, "ndjson").splitlines()]
+
+    assert [(r["source"], r["game_id"], r["round"]) for r in records] == [
+        ("game_rounds", live.id, 1),
+        ("game_rounds", live.id, 2),
+        ("game_rounds", live.id, 3),
+        ("game_archives", archived.id, 1),
+        ("game_archives", archived.id, 2),
+        ("pattern_rounds", legacy.id, 1),
+        ("binary_rounds", binary.id, 1),
+        ("binary_rounds", binary.id, 2),
+    ]
+    assert records[0]["game_type"] == "dual_nback"
+    assert records[0]["data"] == {"round": 1, "correct": True}
+    assert records[3]["game_type"] == "stroop"
+    assert records[5]["data"]["response_time"] == 1.5
+    assert records[7]["data"]["guess"] == 25
+    assert records[7]["timestamp"]
+
+
+def test_pattern_rounds_are_exported_once(db, player):
+    user = player()
+    game_id = _start_pattern_game(db, PatternStartRequest(), user)["game_id"]
+    for _ in range(3):
+        state = game_cache.load(db, game_id).state
+        _submit_pattern(
+            db,
+            PatternSubmitRequest(
+                game_id=game_id,
+                sequence=_current_sequence(state),
+                response_time=1.0,
+            ),
+            user,
+        )
+        db.expire_all()
+
+    # Rounds still buffered in the game cache are flushed for the export
+    records = [json.loads(line) for line in _body(user.id, "ndjson").splitlines()]
+    assert [(r["source"], r["game_id"], r["round"]) for r in records] == [
+        ("game_rounds", game_id, 1),
+        ("game_rounds", game_id, 2),
+        ("game_rounds", game_id, 3),
+    ]
+    assert db.query(PatternRound).filter_by(game_id=game_id).count() == 3
+
+
+def test_csv_and_gzip(db, player):
+    user, *_ = _history(db, player)
+    ndjson = _body(user.id, "ndjson")
+    assert gzip.decompress(_body(user.id, "ndjson", compress=True)) == ndjson
+
+    rows = list(csv.DictReader(io.StringIO(_body(user.id, "csv").decode())))
+    assert len(rows) == len(ndjson.splitlines())
+    assert rows[0]["source"] == "game_rounds"
+    assert json.loads(rows[0]["data"]) == {"round": 1, "correct": True}
+
+
+def test_export_route_streams_a_download(db, player):
+    user, *_ = _history(db, player)
+    response = export_rounds(fmt="csv", gzip=True, current_user=user)
+    assert response.media_type == "application/gzip"
+    assert response.headers["content-disposition"] == (
+        f'attachment; filename="brainbrew-rounds-{user.id}.csv.gz"'
+    )
+
+    async def body():
+        return b"".join([chunk async for chunk in response.body_iterator])
+
+    assert gzip.decompress(asyncio.run(body())) == _body(user.id, "csv")
+
+    with pytest.raises(HTTPException) as invalid:
+        export_rounds(fmt="xml", gzip=False, current_user=user)
+    assert invalid.value.status_code == 400
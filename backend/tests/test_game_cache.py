@@ -0,0 +1,165 @@
+import threading
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import database
+import game_cache as game_cache_module
+from database import SessionLocal, engine
+from game_cache import ActiveGameCache, get_game_read_db
+from models import game as game_model
+from models.game_round import GameRound
+
+
+def _new_game(db):
+    game = game_model.Game(
+        user_id=1, game_type="stroop", score=0, state={"round": 1}
+    )
+    db.add(game)
+    db.commit()
+    return game.id
+
+
+def _play_round(cache, db, game_id, finish=False):
+    game = cache.load(db, game_id)
+    state = game.state
+    game.add(GameRound(game_id=game_id, round_number=state["round"], entry={}))
+    state["round"] += 1
+    game.score += 10
+    game.state = state
+    if finish:
+        game.end_time = datetime.utcnow()
+    cache.save(db, game)
+
+
+def _stored(db, game_id):
+    db.expire_all()
+    game = db.get(game_model.Game, game_id)
+    rounds = db.query(GameRound).filter(GameRound.game_id == game_id).count()
+    return game.state["round"], game.score, rounds
+
+
+def test_write_behind_flushes_every_k_rounds_and_at_game_end(db):
+    cache = ActiveGameCache("write_behind", max_size=10, idle_seconds=60, flush_every=3)
+    game_id = _new_game(db)
+
+    _play_round(cache, db, game_id)
+    _play_round(cache, db, game_id)
+    assert _stored(db, game_id) == (1, 0, 0)
+    assert cache.stats()["dirty"] == 1
+
+    _play_round(cache, db, game_id)
+    assert _stored(db, game_id) == (4, 30, 3)
+
+    _play_round(cache, db, game_id, finish=True)
+    assert _stored(db, game_id) == (5, 40, 4)
+    assert cache.stats()["size"] == 0
+    assert cache.stats()["hits"] == 3
+
+
+def test_write_behind_flushes_on_eviction_and_on_demand(db):
+    cache = ActiveGameCache("write_behind", max_size=1, idle_seconds=60, flush_every=10)
+    first, second = _new_game(db), _new_game(db)
+
+    _play_round(cache, db, first)
+    _play_round(cache, db, second)
+    assert _stored(db, first) == (2, 10, 1)
+    assert _stored(db, second) == (1, 0, 0)
+
+    cache.flush_game(db, second)
+    assert _stored(db, second) == (2, 10, 1)
+
+
+def test_off_mode_writes_every_round(db):
+    cache = ActiveGameCache("off", max_size=10, idle_seconds=60, flush_every=5)
+    game_id = _new_game(db)
+
+    _play_round(cache, db, game_id)
+    assert _stored(db, game_id) == (2, 10, 1)
+    assert cache.stats()["size"] == 0
+
+
+def test_game_end_waits_for_a_flush_in_progress(db):
+    cache = ActiveGameCache("write_behind", max_size=10, idle_seconds=60, flush_every=9)
+    game_id = _new_game(db)
+    _play_round(cache, db, game_id)
+
+    # Another request (e.g. /stats) is part-way through flushing the game
+    writing, release = threading.Event(), threading.Event()
+    write = cache._write
+
+    def slow_write(session, header, rows):
+        writing.set()
+        release.wait(5)
+        write(session, header, rows)
+
+    def flush():
+        with SessionLocal() as session:
+            cache.flush_game(session, game_id)
+
+    cache._write = slow_write
+    stats = threading.Thread(target=flush)
+    stats.start()
+    writing.wait(5)
+    cache._write = write
+
+    def finish():
+        with SessionLocal() as session:
+            _play_round(cache, session, game_id, finish=True)
+
+    submit = threading.Thread(target=finish)
+    submit.start()
+    submit.join(0.2)
+    assert submit.is_alive()  # its rounds are not all in the database yet
+
+    release.set()
+    stats.join(5)
+    submit.join(5)
+    assert _stored(db, game_id) == (3, 20, 2)
+
+
+def test_stats_of_a_buffered_game_are_read_from_the_primary(db, monkeypatch, tmp_path):
+    replica = create_engine(f"sqlite:///{tmp_path / 'replica.db'}")
+    monkeypatch.setattr(database, "read_engine", replica)
+    monkeypatch.setattr(database, "ReadSessionLocal", sessionmaker(bind=replica))
+    monkeypatch.setitem(database._replica_health, "checked_at", 0.0)
+    cache = ActiveGameCache("write_behind", max_size=10, idle_seconds=60, flush_every=9)
+    monkeypatch.setattr(game_cache_module, "game_cache", cache)
+    game_id = _new_game(db)
+    _play_round(cache, db, game_id)
+
+    dependency = get_game_read_db(game_id)
+    session = next(dependency)
+    assert session.get_bind() is engine
+    assert session.query(GameRound).filter(GameRound.game_id == game_id).count() == 1
+    dependency.close()
+
+    # Nothing left to flush: back to the replica
+    dependency = get_game_read_db(game_id)
+    assert next(dependency).get_bind() is replica
+    dependency.close()
+
+
+@pytest.mark.parametrize("mode", ["write_through", "write_behind"])
+def test_failed_write_is_retried_as_the_same_round(db, mode):
+    cache = ActiveGameCache(mode, max_size=10, idle_seconds=60, flush_every=2)
+    game_id = _new_game(db)
+    _play_round(cache, db, game_id)
+    write = cache._write
+
+    def lost_connection(session, header, rows):
+        cache._write = write
+        raise ConnectionError("server closed the connection")
+
+    cache._write = lost_connection
+    with pytest.raises(ConnectionError):
+        _play_round(cache, db, game_id, finish=mode == "write_behind")
+    assert cache.stats()["size"] == 0
+    stored = (2, 10, 1) if mode == "write_through" else (1, 0, 0)
+    assert _stored(db, game_id) == stored
+
+    # The client retries: scored against what the database holds
+    _play_round(cache, db, game_id, finish=True)
+    assert _stored(db, game_id) == (stored[0] + 1, stored[1] + 10, stored[2] + 1)
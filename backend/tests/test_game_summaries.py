@@ -0,0 +1,70 @@
+import pytest
+from fastapi import HTTPException
+
+from crud import rounds as rounds_crud, summaries as summaries_crud
+from models import game as game_model
+from models.game_summary import GameSummary
+from routes.dual import (
+    DualStartRequest,
+    DualSubmitRequest,
+    _dual_nback_stats,
+    _start_dual_nback,
+    _submit_dual_nback,
+)
+
+
+pytestmark = pytest.mark.usefixtures("cache_mode")
+
+
+def test_dual_summary_written_at_game_end(db, player):
+    user = player()
+    game_id = _start_dual_nback(db, DualStartRequest(n=2), user)["game_id"]
+    for i in range(20):
+        assert db.get(GameSummary, game_id) is None
+        _submit_dual_nback(
+            db,
+            DualSubmitRequest(
+                game_id=game_id,
+                letter_match=False,
+                position_match=i % 2 == 0,
+                response_time=0.5,
+            ),
+            user,
+        )
+
+    summary = db.get(GameSummary, game_id)
+    assert summary.user_id == user.id
+    assert summary.game_type == "dual_nback"
+    assert summary.rounds == 20
+    assert summary.completed_at is not None
+
+    # Served from the summary: identical to recomputing from the log
+    game = db.get(game_model.Game, game_id)
+    state = game.state
+    log = rounds_crud.get_round_log(db, game_id, state)
+    assert summary.stats["total_rounds"] == len(log)
+    db.query(game_model.Game).filter(game_model.Game.id == game_id).update(
+        {game_model.Game.score: -1}, synchronize_session=False
+    )
+    db.commit()
+    assert _dual_nback_stats(db, game_id, user) == summary.stats
+
+
+def test_summary_is_private(db, player):
+    owner, other = player(), player()
+    game_id = _start_dual_nback(db, DualStartRequest(n=1), owner)["game_id"]
+    for _ in range(20):
+        _submit_dual_nback(
+            db,
+            DualSubmitRequest(
+                game_id=game_id,
+                letter_match=False,
+                position_match=False,
+                response_time=0.5,
+            ),
+            owner,
+        )
+    assert summaries_crud.get_summary(db, game_id) is not None
+    with pytest.raises(HTTPException) as exc:
+        _dual_nback_stats(db, game_id, other)
+    assert exc.value.status_code == 404
@@ -0,0 +1,197 @@
+import uuid
+from datetime import date, datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+
+import leaderboards as leaderboards_module
+from game_cache import ActiveGame
+from crud import summaries as summaries_crud
+from leaderboards import Leaderboards, leaderboards
+from models import game as game_model
+from models.leaderboard_entry import LeaderboardEntry
+from routes.leaderboard import get_leaderboard, get_my_leaderboard_rank
+
+
+@pytest.fixture(autouse=True)
+def empty_boards():
+    leaderboards.clear()
+    yield
+    leaderboards.clear()
+
+
+def _finish(db, boards, user, score, ended=None, game_id=None):
+    ended = ended or datetime.utcnow()
+    game_id = game_id or uuid.uuid4().int % 10**8
+    game = ActiveGame(game_id, user.id, "pattern", score, {}, ended, ended)
+    improved = boards.record(db, game)
+    db.commit()
+    boards.offer(improved)
+    return game
+
+
+def _board(period, when=None):
+    when = when or datetime.utcnow()
+    return ("pattern", period, leaderboards_module.period_start(period, when))
+
+
+def test_boards_keep_each_players_best(db, player):
+    user = player()
+    monday = datetime(2026, 10, 12, 9)
+    _finish(db, leaderboards, user, 40, monday)
+    best = _finish(db, leaderboards, user, 70, monday + timedelta(days=2))
+    _finish(db, leaderboards, user, 50, monday + timedelta(days=2, hours=1))
+    _finish(db, leaderboards, user, 20, monday + timedelta(days=7))
+
+    def boards():
+        return {
+            (entry.period, entry.period_start): entry.score
+            for entry in db.query(LeaderboardEntry).filter_by(user_id=user.id)
+        }
+
+    assert boards() == {
+        ("all", date(1970, 1, 1)): 70,
+        ("weekly", date(2026, 10, 12)): 70,
+        ("weekly", date(2026, 10, 19)): 20,
+        ("daily", date(2026, 10, 12)): 40,
+        ("daily", date(2026, 10, 14)): 70,
+        ("daily", date(2026, 10, 19)): 20,
+    }
+    all_time = db.get(LeaderboardEntry, (*_board("all"), user.id))
+    assert (all_time.game_id, all_time.achieved_at) == (best.id, best.end_time)
+
+    # Keep the boards that ended on or after Oct 14th
+    keep_days = (datetime.utcnow().date() - date(2026, 10, 14)).days
+    leaderboards_module.prune(db, keep_days)
+    assert set(boards()) == {
+        ("all", date(1970, 1, 1)),
+        ("weekly", date(2026, 10, 12)),
+        ("weekly", date(2026, 10, 19)),
+        ("daily", date(2026, 10, 14)),
+        ("daily", date(2026, 10, 19)),
+    }
+
+
+def test_games_finishing_together_share_one_entry(db, player):
+    # Neither sees the other's entry before it commits
+    user, ended = player(), datetime.utcnow()
+    first = ActiveGame(1, user.id, "pattern", 30, {}, ended, ended)
+    second = ActiveGame(2, user.id, "pattern", 60, {}, ended, ended)
+    improved = leaderboards.record(db, first) + leaderboards.record(db, second)
+    db.commit()
+
+    assert len(improved) == 6
+    entry = db.get(LeaderboardEntry, (*_board("all"), user.id))
+    assert (entry.score, entry.game_id) == (60, 2)
+    assert leaderboards.record(db, first) == []
+
+
+def test_pages_and_ranks_past_the_top_k(db, player):
+    boards = Leaderboards(top_k=2, refresh_seconds=60)
+    players = [player() for _ in range(5)]
+    start = datetime.utcnow() - timedelta(minutes=10)
+    for i, (player, score) in enumerate(zip(players, (50, 40, 40, 30, 10))):
+        _finish(db, boards, player, score, start + timedelta(seconds=i))
+    board = _board("all")
+
+    top = boards.page(db, board, 0, 2)  # from memory
+    rest = boards.page(db, board, 2, 3)  # from the table
+    assert [entry.user_id for entry in top + rest] == [p.id for p in players]
+    ranks = [boards.rank(db, board, score) for score in (50, 40, 30, 10)]
+    assert ranks == [1, 2, 4, 5]
+    assert boards.players(db, board) == 5
+
+    # A local finish moves the top right away
+    _finish(db, boards, players[4], 60)
+    assert [entry.user_id for entry in boards.page(db, board, 0, 2)] == [
+        players[4].id,
+        players[0].id,
+    ]
+    assert boards.rank(db, board, 50) == 2
+
+
+def test_leaderboard_routes(db, player):
+    players = [player() for _ in range(3)]
+    for user, score in zip(players, (30, 90, 30)):
+        _finish(db, leaderboards, user, score)
+
+    board = get_leaderboard(
+        game_type="pattern",
+        period="daily",
+        page=1,
+        per_page=2,
+        db=db,
+        current_user=players[0],
+    )
+    assert board["total_players"] == 3
+    assert [(e["rank"], e["username"]) for e in board["entries"]] == [
+        (1, players[1].username),
+        (2, players[0].username),
+    ]
+    second = get_leaderboard(
+        game_type="pattern",
+        period="daily",
+        page=2,
+        per_page=2,
+        db=db,
+        current_user=players[0],
+    )
+    assert [(e["rank"], e["user_id"]) for e in second["entries"]] == [
+        (2, players[2].id)
+    ]
+
+    me = get_my_leaderboard_rank(
+        game_type="pattern", period="weekly", db=db, current_user=players[2]
+    )
+    assert (me["rank"], me["score"], me["total_players"]) == (2, 30, 3)
+
+    with pytest.raises(HTTPException) as missing:
+        get_my_leaderboard_rank(
+            game_type="dual", period="all", db=db, current_user=players[0]
+        )
+    assert missing.value.status_code == 404
+    for game_type, period in (("stroop", "all"), ("pattern", "monthly")):
+        with pytest.raises(HTTPException) as invalid:
+            get_leaderboard(
+                game_type=game_type,
+                period=period,
+                page=1,
+                per_page=20,
+                db=db,
+                current_user=players[0],
+            )
+        assert invalid.value.status_code == 400
+
+
+def test_rebuild_matches_incremental(db, player):
+    players = [player() for _ in range(3)]
+    ended = datetime.utcnow() - timedelta(days=1)
+    for i, score in enumerate((10, 35, 20, 35, 5, 60)):
+        game = game_model.Game(
+            user_id=players[i % 3].id,
+            game_type="pattern",
+            score=score,
+            state={},
+            start_time=ended,
+            end_time=ended + timedelta(minutes=i),
+        )
+        db.add(game)
+        db.commit()
+        summaries_crud.record_summary(db, game, {"total_rounds": 1})
+
+    def entries():
+        return {
+            (e.game_type, e.period, e.period_start, e.user_id): (
+                e.score,
+                e.game_id,
+                e.achieved_at,
+            )
+            for e in db.query(LeaderboardEntry).filter(
+                LeaderboardEntry.user_id.in_([p.id for p in players])
+            )
+        }
+
+    incremental = entries()
+    assert len(incremental) == 3 * 3
+    assert leaderboards_module.rebuild(db) >= len(incremental)
+    assert entries() == incremental
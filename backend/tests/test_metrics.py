@@ -0,0 +1,22 @@
+from monitoring.metrics import Counter, Histogram, Registry
+
+
+def test_registry_renders_prometheus_text():
+    registry = Registry()
+    requests = registry.register(
+        Counter("requests_total", "Requests.", ("route", "status"))
+    )
+    latency = registry.register(
+        Histogram("latency_seconds", "Latency.", ("route",), buckets=(0.1, 1.0))
+    )
+    requests.inc("/pattern/submit", "200")
+    requests.inc("/pattern/submit", "200")
+    latency.observe(0.05, "/pattern/submit")
+    latency.observe(0.5, "/pattern/submit")
+
+    lines = registry.render().splitlines()
+    assert "# TYPE requests_total counter" in lines
+    assert 'requests_total{route="/pattern/submit",status="200"} 2' in lines
+    assert 'latency_seconds_bucket{route="/pattern/submit",le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{route="/pattern/submit",le="+Inf"} 2' in lines
+    assert 'latency_seconds_count{route="/pattern/submit"} 2' in lines
@@ -0,0 +1,57 @@
+from datetime import date
+
+import partitioning
+
+
+def test_add_months_crosses_year_boundaries():
+    assert partitioning.add_months(date(2026, 11, 1), 2) == date(2027, 1, 1)
+    assert partitioning.add_months(date(2026, 1, 1), -1) == date(2025, 12, 1)
+
+
+def test_month_partition_covers_one_calendar_month():
+    sql = partitioning.month_partition_sql("stroop_rounds", date(2026, 12, 17))
+    assert "stroop_rounds_p2026_12 PARTITION OF stroop_rounds" in sql
+    assert "FROM ('2026-12-01') TO ('2027-01-01')" in sql
+
+
+def test_user_hash_rebuild_keeps_rows_and_indexes():
+    statements = partitioning.partition_table_sql(
+        "binary_rounds", "user_hash", partitions=4
+    )
+    sql = "\n".join(statements)
+    assert "PARTITION BY HASH (user_id)" in sql
+    assert sql.count("FOR VALUES WITH (MODULUS 4") == 4
+    assert 'ADD PRIMARY KEY (id, "user_id")' in sql
+    assert "INSERT INTO binary_rounds SELECT * FROM binary_rounds_old" in sql
+    assert "INCLUDE (guesser, guess, feedback)" in sql
+    # rows are copied before the old table (and its index names) go away
+    insert = statements.index(
+        "INSERT INTO binary_rounds SELECT * FROM binary_rounds_old"
+    )
+    assert insert < statements.index("DROP TABLE binary_rounds_old")
+    assert statements[-1].startswith("CREATE INDEX")
+
+
+def test_month_rebuild_has_default_partition():
+    sql = "\n".join(
+        partitioning.partition_table_sql(
+            "pattern_rounds", "month", months=[date(2026, 10, 1)]
+        )
+    )
+    assert 'PARTITION BY RANGE ("timestamp")' in sql
+    assert "pattern_rounds_p2026_10" in sql
+    assert "pattern_rounds_default PARTITION OF pattern_rounds DEFAULT" in sql
+
+
+def test_game_rounds_is_partitioned_by_month_on_created_at():
+    statements = partitioning.partition_table_sql(
+        "game_rounds", "user_hash", months=[date(2026, 10, 1)]
+    )
+    sql = "\n".join(statements)
+    assert 'PARTITION BY RANGE ("created_at")' in sql
+    assert 'ADD PRIMARY KEY (id, "created_at")' in sql
+    assert "REFERENCES games (id) ON DELETE CASCADE" in sql
+    assert (
+        "CREATE INDEX ix_game_rounds_correct ON game_rounds (game_id) "
+        "WHERE CAST(entry ->> 'correct' AS BOOLEAN)"
+    ) in statements
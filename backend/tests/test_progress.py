@@ -0,0 +1,92 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from models import game as game_model
+from models.game_round import GameRound
+from routes.dual import (
+    DualStartRequest,
+    DualSubmitRequest,
+    _dual_nback_stats,
+    _start_dual_nback,
+    _submit_dual_nback,
+)
+from routes.progress import get_game_progress
+
+
+pytestmark = pytest.mark.usefixtures("cache_mode")
+
+
+def _finished_game(db, user, state, correct, ended):
+    """A finished dual game from before summaries: totals come from its rows."""
+    game = game_model.Game(
+        user_id=user.id,
+        game_type="dual_nback",
+        score=len(correct),
+        state=state,
+        start_time=ended - timedelta(seconds=90),
+        end_time=ended,
+    )
+    db.add(game)
+    db.commit()
+    db.add_all(
+        GameRound(game_id=game.id, round_number=i, entry={"correct": flag})
+        for i, flag in enumerate(correct, 1)
+    )
+    db.commit()
+    return game
+
+
+def test_progress_totals_come_from_sql(db, player):
+    user = player()
+    now = datetime.utcnow()
+    logged = _finished_game(
+        db, user, {"winner": "Game"}, [True, False, True, True], now - timedelta(days=2)
+    )
+    archived = _finished_game(
+        db,
+        user,
+        {"archived": True, "rounds_total": 8, "correct_total": 2},
+        [],
+        now - timedelta(days=3),
+    )
+    _finished_game(db, player(), {}, [True], now)  # someone else's
+    db.add(game_model.Game(user_id=user.id, game_type="dual_nback", state={}))
+    db.commit()  # unfinished
+
+    summarized = _start_dual_nback(db, DualStartRequest(n=1), user)["game_id"]
+    for i in range(20):
+        _submit_dual_nback(
+            db,
+            DualSubmitRequest(
+                game_id=summarized,
+                letter_match=False,
+                position_match=i % 2 == 0,
+                response_time=0.5,
+            ),
+            user,
+        )
+
+    progress = get_game_progress(game_type="dual", limit=10, db=db, current_user=user)
+    assert progress["total_sessions"] == 3
+    history = {entry["game_id"]: entry for entry in progress["history"]}
+    assert list(history) == [summarized, logged.id, archived.id]
+
+    stats = _dual_nback_stats(db, summarized, user)
+    assert history[summarized]["rounds"] == 20
+    assert history[summarized]["accuracy_percent"] == stats["accuracy_percent"]
+
+    assert history[logged.id] == {
+        "game_id": logged.id,
+        "score": 4,
+        "rounds": 4,
+        "accuracy_percent": 75.0,
+        "winner": "Game",
+        "duration_sec": pytest.approx(90, abs=0.01),
+        "completed_at": logged.end_time.isoformat(),
+    }
+    assert history[archived.id]["rounds"] == 8
+    assert history[archived.id]["accuracy_percent"] == 25.0
+
+    limited = get_game_progress(game_type="dual", limit=1, db=db, current_user=user)
+    assert [entry["game_id"] for entry in limited["history"]] == [summarized]
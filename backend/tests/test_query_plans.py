@@ -0,0 +1,184 @@
+"""EXPLAIN checks that the hot query shapes are served by their indexes.
+
+Runs against a scratch SQLite file by default; point PLAN_TEST_DATABASE_URL
+at an empty Postgres database to check the Postgres plans instead (the
+tables are created and dropped there).
+"""
+import json
+import os
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, insert, text
+from sqlalchemy.orm import Session
+
+from database import Base
+from models import binary as binary_model, stroop as stroop_model
+from models import user as user_model
+from models.game import Game
+from models.pattern_round import PatternRound
+
+USERS = 200
+GAMES_PER_USER = 50
+ROUNDS_PER_GAME = 10
+GAME_TYPES = ["pattern", "dual_nback", "stroop", "chunk", "binary"]
+FINISHED = datetime(2026, 1, 1)
+
+
+@pytest.fixture(scope="module")
+def plan_engine(tmp_path_factory):
+    url = os.environ.get("PLAN_TEST_DATABASE_URL") or (
+        f"sqlite:///{tmp_path_factory.mktemp('plans') / 'plans.db'}"
+    )
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    _seed(engine)
+    yield engine
+    Base.metadata.drop_all(bind=engine)
+    engine.dispose()
+
+
+def _seed(engine):
+    games = USERS * GAMES_PER_USER
+    with engine.begin() as conn:
+        conn.execute(
+            insert(user_model.User),
+            [
+                {"id": u, "username": f"p{u}", "email": f"p{u}@example.com"}
+                for u in range(1, USERS + 1)
+            ],
+        )
+        conn.execute(
+            insert(Game),
+            [
+                {
+                    "id": g,
+                    "user_id": g % USERS + 1,
+                    "game_type": GAME_TYPES[g % len(GAME_TYPES)],
+                    "score": g % 97,
+                    "start_time": FINISHED,
+                    # one game in fifty is still being played
+                    "end_time": None if g % 50 == 0 else FINISHED,
+                }
+                for g in range(1, games + 1)
+            ],
+        )
+        conn.execute(
+            insert(binary_model.BinaryGame),
+            [{"id": g, "user_id": g % USERS + 1} for g in range(1, games + 1)],
+        )
+        conn.execute(
+            insert(stroop_model.StroopGame),
+            [{"id": g, "user_id": g % USERS + 1} for g in range(1, games + 1)],
+        )
+        rounds = [
+            (g, r) for g in range(1, games + 1) for r in range(1, ROUNDS_PER_GAME + 1)
+        ]
+        conn.execute(
+            insert(PatternRound),
+            [
+                {"game_id": g, "user_id": g % USERS + 1, "round_number": r}
+                for g, r in rounds
+            ],
+        )
+        conn.execute(
+            insert(binary_model.BinaryRound),
+            [
+                {"game_id": g, "user_id": g % USERS + 1, "turn": r, "guess": r}
+                for g, r in rounds
+            ],
+        )
+        conn.execute(
+            insert(stroop_model.StroopRound),
+            [
+                {"game_id": g, "user_id": g % USERS + 1, "round_number": r}
+                for g, r in rounds
+            ],
+        )
+        conn.execute(text("ANALYZE"))
+
+
+def _plan(engine, query):
+    """Index names used by the plan and the tables read with a full scan."""
+    sql = str(
+        query.statement.compile(
+            dialect=engine.dialect, compile_kwargs={"literal_binds": True}
+        )
+    )
+    with engine.connect() as conn:
+        if engine.dialect.name == "postgresql":
+            plan = conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            indexes, scans = set(), set()
+            nodes = [plan[0]["Plan"]]
+            while nodes:
+                node = nodes.pop()
+                if "Index Name" in node:
+                    indexes.add(node["Index Name"])
+                if node["Node Type"] == "Seq Scan":
+                    scans.add(node["Relation Name"])
+                nodes.extend(node.get("Plans", []))
+            return indexes, scans
+
+        details = [row[-1] for row in conn.execute(text(f"EXPLAIN QUERY PLAN {sql}"))]
+        indexes = {d.split(" INDEX ")[1].split()[0] for d in details if " INDEX " in d}
+        scans = {d.split()[1] for d in details if d.startswith("SCAN ")}
+        return indexes, scans
+
+
+def _assert_uses(engine, query, index, table):
+    indexes, scans = _plan(engine, query)
+    assert index in indexes
+    assert table not in scans
+
+
+def test_progress_uses_games_composite_index(plan_engine):
+    with Session(plan_engine) as db:
+        query = (
+            db.query(Game)
+            .filter(
+                Game.user_id == 7,
+                Game.game_type == "stroop",
+                Game.end_time != None,
+            )
+            .order_by(Game.end_time.desc())
+            .limit(10)
+        )
+        _assert_uses(
+            plan_engine, query, "ix_games_user_id_game_type_end_time", "games"
+        )
+
+
+def test_abandoned_games_use_partial_index(plan_engine):
+    with Session(plan_engine) as db:
+        query = db.query(Game.id).filter(
+            Game.end_time == None, Game.start_time < datetime(2026, 1, 2)
+        )
+        _assert_uses(plan_engine, query, "ix_games_unfinished", "games")
+
+
+def test_round_lookups_use_game_id_indexes(plan_engine):
+    with Session(plan_engine) as db:
+        _assert_uses(
+            plan_engine,
+            db.query(PatternRound).filter(PatternRound.game_id == 123),
+            "ix_pattern_rounds_game_id_round_number",
+            "pattern_rounds",
+        )
+        _assert_uses(
+            plan_engine,
+            db.query(binary_model.BinaryRound)
+            .filter(binary_model.BinaryRound.game_id == 123)
+            .order_by(binary_model.BinaryRound.turn),
+            "ix_binary_rounds_game_id_turn",
+            "binary_rounds",
+        )
+        _assert_uses(
+            plan_engine,
+            db.query(stroop_model.StroopRound)
+            .filter(stroop_model.StroopRound.game_id == 123)
+            .order_by(stroop_model.StroopRound.round_number),
+            "ix_stroop_rounds_game_id_round_number",
+            "stroop_rounds",
+        )
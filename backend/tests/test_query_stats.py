@@ -0,0 +1,22 @@
+from sqlalchemy import create_engine, text
+
+from monitoring import queries
+
+
+def test_query_stats_count_and_flag_repeated_shapes():
+    engine = create_engine("sqlite://")
+    queries.install(engine)
+
+    stats, token = queries.start_request()
+    try:
+        with engine.connect() as conn:
+            for game_id in range(6):
+                conn.execute(text(f"SELECT {game_id} AS game_id"))
+            conn.execute(text("SELECT 'done'"))
+    finally:
+        queries.end_request(token)
+
+    assert stats.count == 7
+    assert stats.total_time > 0
+    assert stats.repeated(5) == {"SELECT ? AS game_id": 6}
+    assert queries.current_stats() is None
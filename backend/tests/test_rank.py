@@ -0,0 +1,131 @@
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+import percentiles as percentiles_module
+from models.game_summary import GameSummary
+from models.percentile_sketch import PercentileSketch
+from percentiles import percentiles
+from routes.dual import (
+    DualStartRequest,
+    DualSubmitRequest,
+    _start_dual_nback,
+    _submit_dual_nback,
+)
+from routes.rank import get_game_rank
+
+
+pytestmark = pytest.mark.usefixtures("cache_mode")
+
+
+@pytest.fixture(autouse=True)
+def empty_sketches():
+    percentiles.clear()
+    yield
+    percentiles.clear()
+
+
+def _percent_below(scores, score):
+    below = sum(other < score for other in scores)
+    at = sum(other == score for other in scores)
+    return (below + at / 2) * 100 / len(scores)
+
+
+def _play_dual(db, user, response_time):
+    """A finished 20-round dual game that never claims a match."""
+    game_id = _start_dual_nback(db, DualStartRequest(n=1), user)["game_id"]
+    for i in range(20):
+        _submit_dual_nback(
+            db,
+            DualSubmitRequest(
+                game_id=game_id,
+                letter_match=False,
+                position_match=False,
+                response_time=response_time,
+            ),
+            user,
+        )
+    return db.get(GameSummary, game_id)
+
+
+def test_rank_against_everyones_games(db, player):
+    players = [player() for _ in range(4)]
+    played = [
+        _play_dual(db, user, response_time)
+        for user, response_time in zip(players, (0.4, 0.8, 1.2, 1.6))
+    ]
+    # Unflushed games already count on the worker that saw them
+    rank = get_game_rank(game_type="dual", game_id=None, db=db, current_user=players[0])
+    assert rank["game_id"] == played[0].game_id
+    assert rank["games_ranked"] == 4
+    assert rank["avg_response_time_sec"] == pytest.approx(0.4)
+    assert rank["faster_than_percent"] == pytest.approx(87.5, abs=1)
+    scores = [summary.score for summary in played]
+    assert rank["better_score_than_percent"] == pytest.approx(
+        _percent_below(scores, scores[0]), abs=1
+    )
+
+    # After a flush a fresh worker sees the same ranks from the shared rows
+    percentiles.flush()
+    assert db.query(PercentileSketch).count() == 2
+    percentiles.clear()
+    slowest = get_game_rank(
+        game_type="dual", game_id=played[3].game_id, db=db, current_user=players[3]
+    )
+    assert slowest["games_ranked"] == 4
+    assert slowest["faster_than_percent"] == pytest.approx(12.5, abs=1)
+    assert slowest["better_score_than_percent"] == pytest.approx(
+        _percent_below(scores, scores[3]), abs=1
+    )
+
+
+def test_rebuild_folds_in_history(db, player):
+    user = player()
+    _play_dual(db, user, 1.0)
+    percentiles.clear()  # as if the game finished before the sketches existed
+
+    assert percentiles_module.rebuild(db) == 1
+    rank = get_game_rank(game_type="dual", game_id=None, db=db, current_user=user)
+    assert rank["games_ranked"] == 1
+
+
+def test_rank_needs_a_finished_game_of_that_type(db, player):
+    user = player()
+    with pytest.raises(HTTPException) as unsupported:
+        get_game_rank(game_type="stroop", game_id=None, db=db, current_user=user)
+    assert unsupported.value.status_code == 400
+
+    with pytest.raises(HTTPException) as missing:
+        get_game_rank(game_type="pattern", game_id=None, db=db, current_user=user)
+    assert missing.value.status_code == 404
+
+    other = _play_dual(db, player(), 1.0)
+    with pytest.raises(HTTPException) as foreign:
+        get_game_rank(
+            game_type="dual", game_id=other.game_id, db=db, current_user=user
+        )
+    assert foreign.value.status_code == 404
+
+
+def test_observe_leaves_the_flush_to_the_background_thread(db, monkeypatch):
+    service = percentiles_module.PercentileService(
+        compression=100, flush_every=2, refresh_seconds=60
+    )
+    flushed = threading.Event()
+    flush = service.flush
+
+    def flush_in_background():
+        flush()
+        if threading.current_thread().name == "percentile-flush":
+            flushed.set()
+
+    monkeypatch.setattr(service, "flush", flush_in_background)
+    service.observe("dual_nback", score=10)
+    service.observe("dual_nback", score=30)  # due, but not flushed here
+    assert flushed.wait(5)
+    service.close()
+
+    db.expire_all()
+    assert db.query(PercentileSketch).count() == 1
+    assert service.rank("dual_nback", "score", 20) == (pytest.approx(0.5), 2)
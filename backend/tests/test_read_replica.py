@@ -0,0 +1,43 @@
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import database
+
+
+def _use_replica(monkeypatch, url):
+    replica = create_engine(url)
+    monkeypatch.setattr(database, "read_engine", replica)
+    monkeypatch.setattr(database, "ReadSessionLocal", sessionmaker(bind=replica))
+    monkeypatch.setitem(database._replica_health, "checked_at", 0.0)
+    return replica
+
+
+def _session_engine():
+    gen = database.get_read_db()
+    db = next(gen)
+    try:
+        return db.get_bind()
+    finally:
+        gen.close()
+
+
+def test_read_db_uses_healthy_replica(monkeypatch, tmp_path):
+    replica = _use_replica(monkeypatch, f"sqlite:///{tmp_path / 'replica.db'}")
+
+    assert _session_engine() is replica
+    assert database.replica_status()["healthy"] is True
+
+
+def test_read_db_falls_back_when_replica_unreachable(monkeypatch, tmp_path):
+    _use_replica(monkeypatch, f"sqlite:///{tmp_path / 'missing' / 'replica.db'}")
+
+    assert _session_engine() is database.engine
+    status = database.replica_status()
+    assert status["healthy"] is False and status["error"]
+
+
+def test_read_db_falls_back_when_replica_lagging(monkeypatch, tmp_path):
+    _use_replica(monkeypatch, f"sqlite:///{tmp_path / 'replica.db'}")
+    monkeypatch.setattr(database.settings, "READ_REPLICA_MAX_LAG_SECONDS", -1)
+
+    assert _session_engine() is database.engine
@@ -0,0 +1,76 @@
+import json
+
+import pytest
+
+from crud import rounds as rounds_crud
+from game_cache import game_cache
+from models import game as game_model
+from routes.pattern import PatternSubmitRequest, _submit_pattern
+
+
+pytestmark = pytest.mark.usefixtures("cache_mode")
+
+
+def _legacy_pattern_game(db, user, rounds):
+    log = [
+        {"round": i, "correct": True, "score_this_round": 10, "response_time": 2.0}
+        for i in range(1, rounds + 1)
+    ]
+    state = {
+        "grid_size": 3,
+        "sequence": [0, 1, 2],
+        "sequence_length": 3,
+        "round": rounds + 1,
+        "log": log,
+        "correct_streak": rounds,
+        "max_streak": rounds,
+        "revive_used": False,
+        "max_time_sec": 5,
+        "max_rounds": 10,
+        "winner": None,
+    }
+    game = game_model.Game(
+        user_id=user.id, game_type="pattern", score=10 * rounds, state=state
+    )
+    db.add(game)
+    db.commit()
+    return game
+
+
+def test_legacy_log_moves_to_round_table_and_revive_still_applies(db, player):
+    user = player()
+    game = _legacy_pattern_game(db, user, rounds=5)
+
+    res = _submit_pattern(
+        db,
+        PatternSubmitRequest(game_id=game.id, sequence=[2, 1, 0], response_time=1.0),
+        user,
+    )
+
+    assert res["revived"] is True
+    game_cache.flush_game(db, game.id)
+    state = game_cache.load(db, game.id).state
+    assert "log" not in state
+    assert state["rounds_logged"] == 5 and state["score_sum"] == 50
+    assert len(rounds_crud.get_round_log(db, game.id, state)) == 5
+
+
+def test_submit_appends_one_row_and_keeps_state_small(db, player):
+    user = player()
+    game = _legacy_pattern_game(db, user, rounds=2)
+    payload = PatternSubmitRequest(
+        game_id=game.id, sequence=[0, 1, 2], response_time=1.0
+    )
+
+    res = _submit_pattern(db, payload, user)
+    size_after_first = len(json.dumps(game_cache.load(db, game.id).state))
+    payload.sequence = res["next_round"]["sequence"]
+    _submit_pattern(db, payload, user)
+
+    game_cache.flush_game(db, game.id)
+    state = game_cache.load(db, game.id).state
+    log = rounds_crud.get_round_log(db, game.id, state)
+    assert [entry["round"] for entry in log] == [1, 2, 3, 4]
+    assert state["rounds_logged"] == 4 and state["recent_correct"] == [True] * 4
+    # Header only: grows with the next sequence, not with the number of rounds
+    assert len(json.dumps(state)) < size_after_first + 20
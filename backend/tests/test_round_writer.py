@@ -0,0 +1,73 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from pydantic import ValidationError
+from sqlalchemy import update
+
+from config import Settings
+from database import Base, SessionLocal, engine
+from models import game as game_model
+from models.game import Game
+from models.game_round import GameRound
+from round_writer import GroupCommitWriter
+
+
+@pytest.fixture
+def game_id():
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        game = game_model.Game(user_id=1, game_type="stroop", state={})
+        db.add(game)
+        db.commit()
+        return game.id
+
+
+def test_concurrent_writes_share_transactions(game_id):
+    writer = GroupCommitWriter(SessionLocal, max_batch=100, max_delay=0.05)
+
+    def submit(i):
+        writer.write([GameRound(game_id=game_id, round_number=i, entry={"i": i})])
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(submit, range(40)))
+    writer.close()
+
+    with SessionLocal() as db:
+        rows = db.query(GameRound).filter(GameRound.game_id == game_id).all()
+    assert sorted(r.entry["i"] for r in rows) == list(range(40))
+    assert all(r.created_at is not None for r in rows)
+    assert writer.stats()["transactions"] < 40
+
+
+def test_failed_rows_only_fail_their_caller(game_id):
+    writer = GroupCommitWriter(SessionLocal, max_batch=100, max_delay=0.05)
+    good = GameRound(game_id=game_id, round_number=1, entry={"ok": True})
+    bad = GameRound(game_id=game_id, round_number=None, entry={"ok": False})
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        ok = pool.submit(writer.write, [good])
+        failed = pool.submit(writer.write, [bad])
+        ok.result()
+        with pytest.raises(Exception):
+            failed.result()
+    writer.close()
+
+
+def test_header_commits_with_its_rows(game_id):
+    writer = GroupCommitWriter(SessionLocal, max_batch=100, max_delay=0)
+    header = update(Game).where(Game.id == game_id).values(score=7)
+    writer.write([GameRound(game_id=game_id, round_number=1, entry={})], header)
+
+    bad = GameRound(game_id=game_id, round_number=None, entry={})
+    with pytest.raises(Exception):
+        writer.write([bad], update(Game).where(Game.id == game_id).values(score=8))
+    writer.close()
+
+    with SessionLocal() as db:
+        assert db.get(Game, game_id).score == 7
+        assert db.query(GameRound).filter(GameRound.game_id == game_id).count() == 1
+
+
+def test_round_writer_is_refused_in_async_mode():
+    with pytest.raises(ValidationError):
+        Settings(USE_ASYNC_DB=True, ROUND_WRITER_ENABLED=True)
@@ -0,0 +1,62 @@
+import random
+
+import pytest
+
+from sketches import TDigest
+
+
+def _exact_cdf(values, x):
+    below = sum(v < x for v in values)
+    at = sum(v == x for v in values)
+    return (below + at / 2) / len(values)
+
+
+def test_ranks_stay_close_to_exact_and_centroids_bounded():
+    rng = random.Random(7)
+    values = [rng.lognormvariate(0, 0.6) for _ in range(20000)]
+    digest = TDigest(100)
+    for value in values:
+        digest.add(value)
+
+    assert digest.count == len(values)
+    assert len(digest.to_dict()["centroids"]) < 100
+    ordered = sorted(values)
+    for q in (0.01, 0.1, 0.5, 0.9, 0.99):
+        x = ordered[int(q * len(values))]
+        assert digest.cdf(x) == pytest.approx(_exact_cdf(values, x), abs=0.01)
+        assert digest.quantile(q) == pytest.approx(x, rel=0.05)
+    assert digest.cdf(ordered[0] - 1) == 0.0
+    assert digest.cdf(ordered[-1] + 1) == 1.0
+
+
+def test_merged_parts_match_one_digest():
+    rng = random.Random(11)
+    values = [rng.gauss(50, 10) for _ in range(8000)]
+    whole = TDigest()
+    for value in values:
+        whole.add(value)
+
+    merged = TDigest()
+    for start in range(0, len(values), 2000):
+        part = TDigest()
+        for value in values[start:start + 2000]:
+            part.add(value)
+        merged.merge(part)
+
+    assert merged.count == whole.count
+    assert (merged.min, merged.max) == (whole.min, whole.max)
+    for x in (30, 45, 50, 55, 70):
+        assert merged.cdf(x) == pytest.approx(whole.cdf(x), abs=0.01)
+
+
+def test_roundtrip_and_ties():
+    digest = TDigest()
+    for score in [0] * 30 + [10] * 40 + [20] * 30:
+        digest.add(score)
+    restored = TDigest.from_dict(digest.to_dict())
+
+    assert restored.count == 100
+    assert restored.cdf(10) == pytest.approx(0.5, abs=0.01)
+    assert restored.cdf(0) == pytest.approx(0.15, abs=0.01)
+    assert restored.cdf(20) == pytest.approx(0.85, abs=0.01)
+    assert TDigest.from_dict(TDigest().to_dict()).count == 0
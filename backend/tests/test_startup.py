@@ -0,0 +1,27 @@
+from sqlalchemy import create_engine, text
+
+import database
+
+
+def test_alembic_heads_single_head():
+    heads = database.alembic_heads()
+    assert len(heads) == 1
+
+
+def test_schema_is_current_follows_alembic_stamp(monkeypatch, tmp_path):
+    # A throwaway database: the configured one may be a real migrated one
+    engine = create_engine(f"sqlite:///{tmp_path / 'startup.db'}")
+    monkeypatch.setattr(database, "engine", engine)
+    head = next(iter(database.alembic_heads()))
+    assert database.schema_is_current() is False
+
+    with engine.begin() as conn:
+        conn.execute(
+            text("CREATE TABLE alembic_version (version_num VARCHAR(32) NOT NULL)")
+        )
+        conn.execute(text("INSERT INTO alembic_version VALUES ('0000deadbeef')"))
+    assert database.schema_is_current() is False
+
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE alembic_version SET version_num = :v"), {"v": head})
+    assert database.schema_is_current() is True
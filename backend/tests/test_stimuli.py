@@ -0,0 +1,31 @@
+import json
+
+import stimuli
+from routes.dual import LETTERS, _stimulus
+from routes.stroop import COLORS
+
+
+def test_stimuli_are_reproducible_from_seed():
+    seed = stimuli.new_seed()
+
+    pattern = stimuli.pattern_sequence(seed, 4, 5, 7)
+    assert pattern == stimuli.pattern_sequence(seed, 4, 5, 7)
+    assert len(set(pattern)) == 7
+    assert stimuli.stroop_pair(seed, 2, COLORS) == stimuli.stroop_pair(seed, 2, COLORS)
+    assert stimuli.chunk_sequence(seed, 3, 9) == stimuli.chunk_sequence(seed, 3, 9)
+    items = [stimuli.dual_item(seed, i, 3, LETTERS) for i in range(20)]
+    assert items == [stimuli.dual_item(seed, i, 3, LETTERS) for i in range(20)]
+    assert len({(i["grid_pos"], i["letter"]) for i in items}) > 1
+
+
+def test_pattern_sequence_is_capped_at_grid_cells():
+    sequence = stimuli.pattern_sequence(1, 9, 2, 12)
+    assert sorted(sequence) == [0, 1, 2, 3]
+
+
+def test_dual_state_holds_seed_not_sequence():
+    seeded = {"seed": 42, "grid_size": 3, "n": 2, "max_rounds": 20}
+    legacy = {"sequence": [stimuli.dual_item(42, i, 3, LETTERS) for i in range(20)]}
+
+    assert [_stimulus(seeded, i) for i in range(20)] == legacy["sequence"]
+    assert len(json.dumps(seeded)) < len(json.dumps(legacy)) / 10
@@ -0,0 +1,44 @@
+import time
+from datetime import timedelta
+
+import pytest
+from jose import JWTError
+
+from auth import jwt_handler
+from auth.cache import TTLCache
+from auth.user_cache import cache_user, get_cached_user, user_cache
+from models.user import User
+
+
+def test_ttl_cache_expires_and_evicts():
+    cache = TTLCache(max_size=2, ttl=0.05)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.set("c", 3)
+    assert cache.get("a") is None  # evicted, least recently used
+    assert cache.get("c") == 3
+    time.sleep(0.06)
+    assert cache.get("c") is None
+
+
+def test_username_mismatch_invalidates_cached_user():
+    user_cache.clear()
+    cache_user(User(id=42, username="alice", email="alice@example.com"))
+    assert get_cached_user(42, "alice").email == "alice@example.com"
+    assert get_cached_user(42, "renamed") is None
+    assert get_cached_user(42, "alice") is None
+
+
+def test_decode_token_cache_respects_exp():
+    jwt_handler.token_cache.clear()
+    token = jwt_handler.create_access_token(
+        {"user_id": 7}, expires_delta=timedelta(seconds=2)
+    )
+    misses = jwt_handler.token_cache.misses
+    assert jwt_handler.decode_token(token)["user_id"] == 7
+    assert jwt_handler.decode_token(token)["user_id"] == 7
+    assert jwt_handler.token_cache.misses == misses + 1
+
+    time.sleep(3.1)  # exp has whole-second resolution
+    with pytest.raises(JWTError):
+        jwt_handler.decode_token(token)